@@ -1,184 +1,541 @@
-import google.generativeai as genai
+import logging
 import os
-import json
-import random
-from dotenv import load_dotenv
+import threading
 from data_engine import (
-    get_live_details,
-    find_cheapest_store,
-    find_best_alternative,
-    find_category_substitute
+    item_ages,
+    price_basket,
+    purchase_history,
+    item_aggregates,
+    DEFAULT_HOUSEHOLD
 )
+from recipe_index import count_score, get_recipe_index
+from ingredient_matcher import compile_matcher
+from llm_cache import cache_from_env, canonical_key
+from llm_gateway import gateway_from_env
+from json_stream import ArrayItemStream, ParseStats, extract_json
+from prompt_builder import PROMPT_VERSION, low_items_prompt, recipes_prompt, shopping_prompt
+from token_budget import TokenStats, estimate_tokens
+from tracing import current_span, span, traced
 import datetime
-import pandas as pd
 
 # -----------------------------
-# AI SETUP (SAFE ON IMPORT)
+# AI SETUP (LAZY: NOTHING HEAVY ON IMPORT)
 # -----------------------------
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
+MODEL_NAME = "gemini-1.5-flash"
+_model_lock = threading.Lock()
+logger = logging.getLogger(__name__)
 
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
+
+def _create_model():
+    # The Gemini SDK takes most of a second to import and isn't needed for
+    # the offline fallbacks, so it is only loaded here
+    import google.generativeai as genai
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    # Shared by every session: rate limited, prioritized and coalesced (see llm_gateway.py)
+    return gateway_from_env(genai.GenerativeModel(MODEL_NAME))
+
+
+def get_model():
+    """The shared model, created on first use. Assigning ai_logic.model replaces it."""
+    current = globals().get("model")
+    if current is None:
+        with _model_lock:
+            current = globals().get("model")
+            if current is None:
+                current = _create_model()
+                globals()["model"] = current
+    return current
+
+
+def __getattr__(name):
+    # Keeps `ai_logic.model` working without building the model on import
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Parsed responses keyed by normalized inputs (see llm_cache.py)
+LLM_CACHE = cache_from_env()
 
 # -----------------------------
 # HELPER: REAL RECIPES FROM full_format_recipes.json
 # -----------------------------
-def get_real_recipes(pantry_usuals, low_items, dataset_path="full_format_recipes.json", max_recipes=3):
+# Also what the model-call fallbacks search; benchmarks point it at a synthetic corpus
+RECIPE_DATASET = "full_format_recipes.json"
+
+@traced()
+def get_real_recipes(pantry_usuals, low_items, dataset_path=None, max_recipes=3, score_fn=count_score):
     """
-    Uses the full_format_recipes.json dataset to find realistic recipes.
+    Uses the full_format_recipes.json dataset (RECIPE_DATASET unless
+    dataset_path is given) to find realistic recipes.
     Prioritizes items you have plenty of (Surplus) and AVOIDS Low-stock items.
+    Lookups go through the prebuilt inverted index (see recipe_index.py).
+    score_fn(clears_out) ranks candidates (count_score by default).
     """
     try:
-        with open(dataset_path, 'r') as f:
-            all_recipes = json.load(f)
-        
+        index = get_recipe_index(dataset_path or RECIPE_DATASET)
+
         pantry_flat = [item.lower().strip() for items in pantry_usuals.values() for item in items]
         low_flat = [item.lower().strip() for item in low_items]
-        
+
         # Surplus = Items we have in the pantry that are NOT currently low stock
         surplus_items = [item for item in pantry_flat if item not in low_flat]
 
-        valid_matches = []
-        for recipe in all_recipes:
-            ingredients_text = " ".join(recipe.get("ingredients", [])).lower()
-            title_text = recipe.get("title", "").lower()
-
-            # RULE 1: If the recipe requires a low-stock item, skip it.
-            if any(low in ingredients_text for low in low_flat if len(low) > 2):
-                continue
+        # RULE 1 + RULE 2: recipes using our surplus/aging items, minus any
+        # that require a low-stock item (whole words, plurals folded)
+        best = index.search(surplus_items, low_flat, max_recipes, score_fn)
 
-            # RULE 2: Does it use our surplus/aging items?
-            matches = [item for item in surplus_items if item in ingredients_text or item in title_text]
-            
-            if matches:
-                # Score based on how many surplus items it clears out
-                score = len(matches)
-                valid_matches.append({
-                    "name": recipe.get("title", "Untitled Recipe"),
-                    "ingredients": recipe.get("ingredients", []),
-                    "instructions": "\n".join(recipe.get("directions", [])),
-                    "score": score,
-                    "clears_out": matches
-                })
-
-        valid_matches.sort(key=lambda x: x["score"], reverse=True)
-        
+        # Only the survivors pay for building the display payload
         formatted = []
-        for r in valid_matches[:max_recipes]:
-            teaser = f" (Clears out: {', '.join(r['clears_out'][:2])})"
+        for _, rid, clears_out in best:
+            recipe = index.recipes[rid]
+            teaser = f" (Clears out: {', '.join(clears_out[:2])})"
             formatted.append({
-                "name": f"{r['name']}{teaser}",
-                "ingredients": r["ingredients"],
-                "instructions": r["instructions"]
+                "name": f"{recipe.title or 'Untitled Recipe'}{teaser}",
+                "ingredients": list(recipe.ingredients),
+                "instructions": "\n".join(recipe.directions)
             })
+        current_span().set(recipes=len(formatted))
         return formatted
     except Exception as e:
-        print(f"Error loading recipe JSON: {e}")
+        logger.warning("Error loading recipe JSON: %s", e)
+        current_span().set(recipes=0, error=repr(e))
         return []
 
+def recipe_pantry_items(recipe, pantry_usuals):
+    """Usual pantry items a recipe dict (name/ingredients) calls for, whole words only."""
+    usual_flat = tuple(item for items in pantry_usuals.values() for item in items)
+    matcher = compile_matcher(usual_flat, ())
+    ingredients = recipe.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = [ingredients]
+    return matcher.scan(_RecipeText(recipe.get("name", ""), ingredients))
+
+
+class _RecipeText:
+    """The title/ingredients view PantryMatcher.scan expects."""
+    __slots__ = ("title", "ingredients")
+
+    def __init__(self, title, ingredients):
+        self.title = title
+        self.ingredients = ingredients
+
+# -----------------------------
+# HELPER: STORE PRICES FOR A SHOPPING LIST
+# -----------------------------
+def attach_store_prices(shopping_list, stores):
+    """Fills in the cheapest in-stock store and price for every list entry in one batch."""
+    if not shopping_list or not stores:
+        return shopping_list
+    pricing = price_basket([entry.get("item", "") for entry in shopping_list], stores)
+    for entry, offer in zip(shopping_list, pricing["cheapest"]):
+        if offer:
+            entry.setdefault("store", offer["store"])
+            entry.setdefault("price", offer["price"])
+    return shopping_list
+
+# -----------------------------
+# CONCURRENT MODEL CALLS
+# -----------------------------
+# Seconds before a single Gemini call is abandoned and its fallback used
+LLM_TIMEOUT_SECONDS = 30
+
+
+# Gemini answers in JSON mode against these schemas
+RESPONSE_SCHEMAS = {
+    "recipes": {
+        "type": "object",
+        "properties": {
+            "recipes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "ingredients": {"type": "array", "items": {"type": "string"}},
+                        "instructions": {"type": "string"},
+                    },
+                    "required": ["name", "ingredients", "instructions"],
+                },
+            },
+        },
+        "required": ["recipes"],
+    },
+    "shopping_list": {
+        "type": "object",
+        "properties": {
+            "shopping_list": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "item": {"type": "string"},
+                        "recommended_quantity": {"type": "string"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["item", "recommended_quantity", "reason"],
+                },
+            },
+        },
+        "required": ["shopping_list"],
+    },
+    "low_items": {
+        "type": "object",
+        "properties": {"low_items": {"type": "array", "items": {"type": "string"}}},
+        "required": ["low_items"],
+    },
+}
+
+# How often model output failed to parse, per kind of call
+PARSE_STATS = ParseStats()
+
+# Prompt and response tokens, per kind of call
+TOKEN_STATS = TokenStats()
+
+
+def _generation_config(kind):
+    return {"response_mime_type": "application/json", "response_schema": RESPONSE_SCHEMAS[kind]}
+
+
+def _parse_json(text, kind="other"):
+    """First JSON object in the reply (see json_stream.py); failures are counted in PARSE_STATS."""
+    try:
+        parsed = extract_json(text)
+    except ValueError:
+        PARSE_STATS.record(kind, False)
+        raise
+    PARSE_STATS.record(kind, True)
+    return parsed
+
+
+def _record_tokens(kind, prompt, response_text, usage=None):
+    """
+    Counts one call in TOKEN_STATS and on the current span: Gemini's usage
+    metadata if present, else the local estimate.
+    """
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+    response_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(response_text)
+    TOKEN_STATS.record(kind, prompt_tokens, response_tokens)
+    current_span().set(prompt_tokens=prompt_tokens, response_tokens=response_tokens)
+    logger.debug("Gemini %s call: %d prompt tokens, %d response tokens", kind, prompt_tokens, response_tokens)
+
+
+async def _ask_model(prompt, timeout=LLM_TIMEOUT_SECONDS, kind=None):
+    """
+    One Gemini round-trip on a worker thread, parsed as JSON. `timeout` goes
+    with the request (request_options), where the gateway treats it as a
+    deadline for queueing, retries and the request itself, so the thread is
+    never left running after the caller gave up.
+    Known kinds request JSON mode with their RESPONSE_SCHEMAS entry.
+    """
+    import asyncio
+
+    kwargs = {"request_options": {"timeout": timeout}}
+    if kind in RESPONSE_SCHEMAS:
+        kwargs["generation_config"] = _generation_config(kind)
+    with span("gemini.generate_content", kind=kind, prompt_chars=len(prompt)) as s:
+        response = await asyncio.to_thread(get_model().generate_content, prompt, **kwargs)
+        s.set(response_chars=len(response.text))
+        _record_tokens(kind or "other", prompt, response.text, getattr(response, "usage_metadata", None))
+    return _parse_json(response.text, kind or "other")
+
+
+def _cache_key(kind, inputs):
+    """LLM_CACHE key for a call: its inputs, the model and the prompt templates' version."""
+    return canonical_key(kind, model=MODEL_NAME, prompt_version=PROMPT_VERSION, **inputs)
+
+
+async def _ask_model_cached(kind, inputs, prompt, timeout=LLM_TIMEOUT_SECONDS):
+    """_ask_model, answered from LLM_CACHE when the same inputs were seen recently."""
+    with span("ai_logic.ask_model", kind=kind) as s:
+        key = _cache_key(kind, inputs)
+        cached = LLM_CACHE.get(key)
+        s.set(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+        parsed = await _ask_model(prompt, timeout, kind)
+        LLM_CACHE.set(key, parsed)
+        return parsed
+
+
+def _run_sync(coro):
+    """Runs a coroutine to completion from sync code such as a Streamlit script."""
+    # asyncio alone is most of this module's import time; load it on first call
+    import asyncio
+    import concurrent.futures
+    import contextvars
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Already inside an event loop: finish the work on a private loop instead
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(contextvars.copy_context().run, asyncio.run, coro).result()
+
 # -----------------------------
 # CORE AI CURATION ENGINE
 # -----------------------------
-def generate_shopping_list(
+def _pantry_ages(pantry_usuals, household_id=DEFAULT_HOUSEHOLD):
+    """{item: days since bought} for the pantry items with purchase history."""
+    return item_ages([item for items in pantry_usuals.values() for item in items], household_id)
+
+
+def _fallback_shopping_list(low_items):
+    return [{"item": i, "recommended_quantity": "1 unit", "reason": "Low stock"} for i in low_items]
+
+
+def _list_inputs(household_size, last_trip, pantry_usuals, low_items, ages):
+    return {
+        "household_size": household_size,
+        "last_trip": last_trip,
+        "pantry_usuals": pantry_usuals,
+        "low_items": low_items,
+        "ages": ages,
+    }
+
+
+async def generate_shopping_list_async(
     household_size,
     grocery_freq,
     stores,
     pantry_usuals,
     last_trip=None,
-    low_items=None
+    low_items=None,
+    timeout=LLM_TIMEOUT_SECONDS,
+    household_id=DEFAULT_HOUSEHOLD
 ):
+    """
+    Recipes and the shopping list are independent, so both prompts go to
+    Gemini at the same time. Each half falls back on its own if its call
+    fails or times out.
+    """
+    import asyncio
+
     if low_items is None:
         low_items = []
-        
-    flat_items = []
-    for category, items in pantry_usuals.items():
-        for item in items:
-            flat_items.append(f"{item} ({category})")
-
-    store_context = {}
-    for item in flat_items:
-        store_context[item] = get_live_details(item.split(" (")[0], stores)
-
-    prompt = f"""
-You are a professional AI chef. The user is running LOW on certain items—do NOT suggest recipes that use them. 
-Instead, suggest recipes using the OTHER items in the pantry to reduce food waste.
-
-User Profile:
-- Household size: {household_size}
-- Last grocery trip: {last_trip}
-
-Pantry Inventory (Available):
-{json.dumps(pantry_usuals, indent=2)}
-
-Low-stock items (DO NOT USE IN RECIPES - ADD TO SHOPPING LIST):
-{json.dumps(low_items, indent=2)}
-
-Instructions:
-1. Generate 3 REAL, diverse recipes. 
-2. Use ONLY items from the 'Pantry Inventory' that are NOT in the 'Low-stock' list.
-3. If an item is in 'Produce' and the last trip was a while ago, prioritize using it.
-4. Output valid JSON only:
-{{
-  "shopping_list": [{{ "item": "string", "recommended_quantity": "string", "reason": "string" }}],
-  "recipes": [{{ "name": "string", "ingredients": ["string"], "instructions": "string" }}]
-}}
-"""
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        json_start = text.find("{")
-        json_end = text.rfind("}") + 1
-        parsed = json.loads(text[json_start:json_end])
-        return parsed
-    except Exception as e:
-        fallback_recipes = get_real_recipes(pantry_usuals, low_items)
-        fallback_list = [{"item": i, "recommended_quantity": "1 unit", "reason": "Low stock"} for i in low_items]
-        return {"shopping_list": fallback_list, "recipes": fallback_recipes, "upsell_suggestions": [], "error": str(e)}
+
+    with span("ai_logic.generate_shopping_list", pantry_items=sum(map(len, pantry_usuals.values())),
+              low_items=len(low_items)) as s:
+        # Store prices aren't part of the prompts: they are attached to the
+        # model's list afterwards (attach_store_prices)
+        ages = _pantry_ages(pantry_usuals, household_id)
+        inputs = _list_inputs(household_size, last_trip, pantry_usuals, low_items, ages)
+        recipes_result, shopping_result = await asyncio.gather(
+            _ask_model_cached("recipes", inputs,
+                              recipes_prompt(household_size, last_trip, pantry_usuals, low_items, ages).text, timeout),
+            _ask_model_cached("shopping_list", inputs,
+                              shopping_prompt(household_size, last_trip, pantry_usuals, low_items, ages).text, timeout),
+            return_exceptions=True
+        )
+
+        result = {"upsell_suggestions": []}
+        errors = []
+        if isinstance(recipes_result, BaseException):
+            errors.append(recipes_result)
+            result["recipes"] = get_real_recipes(pantry_usuals, low_items)
+            s.set(recipes_from="local_fallback")
+        else:
+            result["recipes"] = recipes_result.get("recipes", [])
+
+        if isinstance(shopping_result, BaseException):
+            errors.append(shopping_result)
+            result["shopping_list"] = _fallback_shopping_list(low_items)
+            s.set(shopping_list_from="low_items_fallback")
+        else:
+            result["shopping_list"] = [dict(entry) for entry in shopping_result.get("shopping_list", [])]
+
+        attach_store_prices(result["shopping_list"], stores)
+        if errors:
+            result["error"] = "; ".join(str(e) or type(e).__name__ for e in errors)
+            s.set(error=result["error"])
+        return result
+
+
+def generate_shopping_list(
+    household_size,
+    grocery_freq,
+    stores,
+    pantry_usuals,
+    last_trip=None,
+    low_items=None,
+    household_id=DEFAULT_HOUSEHOLD
+):
+    return _run_sync(generate_shopping_list_async(
+        household_size, grocery_freq, stores, pantry_usuals, last_trip, low_items, household_id=household_id
+    ))
+
+
+def iter_shopping_list(household_size, last_trip, pantry_usuals, low_items, stores, timeout=LLM_TIMEOUT_SECONDS,
+                       ages=None):
+    """
+    Priced shopping-list entries as they stream out of Gemini. Each entry is
+    pulled out of the partial JSON as soon as it is complete, so the first
+    one can be shown long before the response has finished. Low items the
+    model never got to (errors, timeouts) are filled in with the fallback.
+    """
+    import time
+
+    ages = ages or {}
+    # Not activated: the caller's code runs between yields (see tracing.span)
+    with span("ai_logic.iter_shopping_list", activate=False, low_items=len(low_items)) as s:
+        key = _cache_key("shopping_list", _list_inputs(household_size, last_trip, pantry_usuals, low_items, ages))
+        cached = LLM_CACHE.get(key)
+        if cached is not None:
+            s.set(source="cache")
+            # Price copies: the cached entries are shared, and prices change with the store feeds
+            yield from attach_store_prices([dict(entry) for entry in cached.get("shopping_list", [])], stores)
+            return
+
+        listed = set()
+        try:
+            started = time.monotonic()
+            deadline = started + timeout
+            prompt = shopping_prompt(household_size, last_trip, pantry_usuals, low_items, ages).text
+            s.set(source="stream", prompt_chars=len(prompt))
+            response = get_model().generate_content(
+                prompt,
+                stream=True,
+                generation_config=_generation_config("shopping_list"),
+                request_options={"timeout": timeout}
+            )
+            items = ArrayItemStream("shopping_list")
+            text = []
+            usage = None
+            for chunk in response:
+                text.append(chunk.text)
+                # The last chunk carries the usage totals for the whole response
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                for entry in items.feed(chunk.text):
+                    if not listed:
+                        s.set(first_item_ms=round((time.monotonic() - started) * 1000, 1))
+                    listed.add(entry.get("item"))
+                    yield attach_store_prices([entry], stores)[0]
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"shopping list took longer than {timeout}s")
+            s.set(items=len(listed), response_chars=sum(map(len, text)))
+            _record_tokens("shopping_list", prompt, "".join(text), usage)
+            LLM_CACHE.set(key, _parse_json("".join(text), "shopping_list"))
+        except Exception as e:
+            logger.warning("Shopping list stream failed: %s", e)
+            missing = [i for i in low_items if i not in listed]
+            s.set(items=len(listed), fallback_items=len(missing), error=repr(e))
+            for entry in _fallback_shopping_list(missing):
+                yield attach_store_prices([entry], stores)[0]
 
 # -----------------------------
 # PREDICT LOW-STOCK AI
 # -----------------------------
-def predict_low_stock(usual_items, household_size, grocery_freq, last_trip):
+async def predict_low_stock_async(usual_items, household_size, grocery_freq, last_trip, stores=None,
+                                  timeout=LLM_TIMEOUT_SECONDS, refine_with_llm=False,
+                                  household_id=DEFAULT_HOUSEHOLD):
+    """
+    Low items come from the local consumption model (consumption_model.py),
+    fed with the household's stored purchase history. With refine_with_llm,
+    Gemini may adjust that list; its answer is only used if the call succeeds.
+    """
+    from consumption_model import predict_low_items
+
     today = datetime.date.today()
     days_since = (today - last_trip).days if last_trip else 0
-    flat_items = [item for items in usual_items.values() for item in items]
-
-    prompt = f"""
-You are an AI that predicts pantry consumption.
-Estimate low items for {household_size} people, {days_since} days since shopping.
-Inventory: {usual_items}
-Output JSON: {{"low_items": ["item1"]}}
-"""
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        json_start = text.find("{")
-        json_end = text.rfind("}") + 1
-        parsed = json.loads(text[json_start:json_end])
-        low_items = parsed.get("low_items", [])
-    except Exception:
-        low_items = random.sample(flat_items, min(len(flat_items), 2))
+    with span("consumption_model.predict_low_items", usual_items=sum(map(len, usual_items.values()))) as s:
+        low_items, projection = predict_low_items(usual_items, household_size, grocery_freq, last_trip, today,
+                                                  purchase_history(household_id), item_aggregates(household_id))
+        s.set(low_items=len(low_items))
+
+    if refine_with_llm:
+        ages = _pantry_ages(usual_items, household_id)
+        prompt = low_items_prompt(household_size, days_since, usual_items, low_items, ages).text
+        try:
+            inputs = {"household_size": household_size, "days_since": days_since,
+                      "usual_items": usual_items, "projected_low": low_items, "ages": ages}
+            parsed = await _ask_model_cached("low_items", inputs, prompt, timeout)
+            low_items = parsed.get("low_items", low_items)
+        except Exception as e:
+            # The consumption model's list stands
+            current_span().set(refine_error=repr(e))
+
+    ai_results = await generate_shopping_list_async(
+        household_size, grocery_freq, stores or [], usual_items, last_trip, low_items, timeout, household_id
+    )
+    return _low_stock_result(low_items, projection, last_trip, grocery_freq, ai_results)
 
+
+def _low_stock_result(low_items, projection, last_trip, grocery_freq, ai_results):
     raw_next = last_trip + datetime.timedelta(days=max(1, round(7 / grocery_freq))) if last_trip else None
     suggested_next_str = raw_next.strftime("%A, %b %d") if raw_next else None
 
-    ai_results = generate_shopping_list(household_size, grocery_freq, [], usual_items, last_trip, low_items)
-
     return {
         "low_items": low_items,
         "suggested_next_trip": suggested_next_str,
         "shopping_list": ai_results.get("shopping_list", []),
         "upsell_suggestions": ai_results.get("upsell_suggestions", []),
-        "recipes": ai_results.get("recipes", [])
+        "recipes": ai_results.get("recipes", []),
+        "depletion_dates": {
+            item: date.isoformat() for item, date in zip(projection["items"], projection["depletion_dates"])
+        }
     }
 
+
+def predict_low_stock(usual_items, household_size, grocery_freq, last_trip, stores=None, refine_with_llm=False,
+                      household_id=DEFAULT_HOUSEHOLD):
+    return _run_sync(predict_low_stock_async(
+        usual_items, household_size, grocery_freq, last_trip, stores,
+        refine_with_llm=refine_with_llm, household_id=household_id
+    ))
+
+
+def stream_low_stock(usual_items, household_size, grocery_freq, last_trip, stores=None, timeout=LLM_TIMEOUT_SECONDS,
+                     household_id=DEFAULT_HOUSEHOLD):
+    """
+    predict_low_stock for progressive rendering: yields ("shopping_item", entry)
+    for every list entry as it streams in, then ("result", results) with the
+    same dict predict_low_stock returns. Recipes are generated on a worker
+    thread in the meantime.
+    """
+    import concurrent.futures
+    import contextvars
+    from consumption_model import predict_low_items
+
+    stores = stores or []
+    with span("consumption_model.predict_low_items", usual_items=sum(map(len, usual_items.values()))) as s:
+        low_items, projection = predict_low_items(usual_items, household_size, grocery_freq, last_trip,
+                                                  purchase_history=purchase_history(household_id),
+                                                  aggregates=item_aggregates(household_id))
+        s.set(low_items=len(low_items))
+    ages = _pantry_ages(usual_items, household_id)
+    inputs = _list_inputs(household_size, last_trip, usual_items, low_items, ages)
+    recipe_call = _ask_model_cached("recipes", inputs,
+                                    recipes_prompt(household_size, last_trip, usual_items, low_items, ages).text, timeout)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        # The worker gets a copy of this context, so its spans join the current trace
+        recipes_future = pool.submit(contextvars.copy_context().run, _run_sync, recipe_call)
+        shopping_list = []
+        for entry in iter_shopping_list(household_size, last_trip, usual_items, low_items, stores, timeout, ages):
+            shopping_list.append(entry)
+            yield "shopping_item", entry
+        try:
+            recipes = recipes_future.result().get("recipes", [])
+        except Exception as e:
+            logger.warning("Recipe generation failed: %s", e)
+            with span("ai_logic.recipes_fallback", error=repr(e)):
+                recipes = get_real_recipes(usual_items, low_items)
+
+    ai_results = {"shopping_list": shopping_list, "recipes": recipes, "upsell_suggestions": []}
+    yield "result", _low_stock_result(low_items, projection, last_trip, grocery_freq, ai_results)
+
 # ---------------------------------------------------------
 # STREAMLIT UI - FULL RESTORE
 # ---------------------------------------------------------
-import streamlit as st
-
 if __name__ == "__main__":
+    import streamlit as st
+
     st.set_page_config(page_title="PantryFull", page_icon="🧺", layout="centered")
 
     st.markdown("""
@@ -1,7 +1,20 @@
 import streamlit as st
-import datetime
-from data_engine import find_cheapest_store, find_best_alternative, find_category_substitute
+import uuid
+from data_engine import (
+    freshness_view,
+    waste_risk_items,
+    shopping_cards,
+    purchase_history,
+    record_purchases,
+    record_consumption
+)
+from batch_runner import precomputed_result
+from item_registry import ITEMS
+from pantry_store import get_pantry_store
+from image_assets import get_asset
+from store_feed import get_feed_watcher
 import ai_logic
+import tracing
 
 # -----------------------------
 # PAGE CONFIG
@@ -75,6 +88,38 @@ h2, h3 {
 </style>
 """, unsafe_allow_html=True)
 
+# -----------------------------
+# CACHED RESOURCES + VIEW HELPERS
+# -----------------------------
+def load_image(path):
+    """
+    Display-sized image bytes (see image_assets.py). get_asset already shares
+    them across sessions and rebuilds them when the file changes, so an
+    st.cache_resource here would only hide the change.
+    """
+    return get_asset(path)
+
+
+# Keeps store prices current from the feed directory in PANTRY_FEED_DIR, if set
+get_feed_watcher()
+
+
+def freshness_tracker_html(rows):
+    """
+    All freshness bars as one HTML block. The rows are memoized in data_engine;
+    formatting them is cheaper than st.cache_data hashing them would be.
+    """
+    parts = []
+    for row in rows:
+        # Visual bar: Red for old, Green for fresh
+        parts.append(
+            f"<p><strong>{row['item']}</strong> — {row['days_old']} days old</p>"
+            f"<div style=\"width:100%; background:#f0f2f6; border-radius:10px; height:8px; margin-bottom:1rem;\">"
+            f"<div style=\"width:{row['progress']*100}%; background:{row['color']}; height:8px; border-radius:10px;\"></div>"
+            f"</div>"
+        )
+    return "<div>" + "".join(parts) + "</div>"
+
 # -----------------------------
 # SESSION STATE INIT
 # -----------------------------
@@ -102,6 +147,26 @@ if "last_trip_date" not in st.session_state:
 if "shopping_selection" not in st.session_state:
     st.session_state.shopping_selection = []
 
+# --- HOUSEHOLD (PERSISTED IN THE PANTRY STORE) ---
+# The household id rides along in the URL, so a bookmarked or reloaded page
+# picks up the saved pantry instead of repeating onboarding
+if "household_id" not in st.session_state:
+    household_id = st.query_params.get("household")
+    if not household_id:
+        household_id = uuid.uuid4().hex[:12]
+        st.query_params["household"] = household_id
+    st.session_state.household_id = household_id
+
+    saved = get_pantry_store().load_household(household_id)
+    if saved:
+        st.session_state.usuals = saved["usuals"]
+        st.session_state.h_size = saved["household_size"]
+        st.session_state.grocery_freq = saved["grocery_freq"]
+        st.session_state.last_trip_date = saved["last_trip"]
+        st.session_state.stores = saved["stores"]
+        st.session_state.stores_selected = set(saved["stores"])
+        st.session_state.step = 5
+
 # -----------------------------
 # CATEGORY DATA
 # -----------------------------
@@ -113,303 +178,351 @@ PANTRY_CATEGORIES = {
     "Frozen": ["Frozen Vegetables", "Frozen Pizza", "Ice Cream"]
 }
 CATEGORY_ORDER = list(PANTRY_CATEGORIES.keys())
+# Onboarding items are canonical names too (see item_registry.py)
+ITEMS.register_all(item for items in PANTRY_CATEGORIES.values() for item in items)
 TOTAL_CATEGORIES = len(CATEGORY_ORDER)
-# -----------------------------
-# WELCOME PAGE
-# -----------------------------
-if st.session_state.step == -1:
-    st.title("🧺 PantryFull")
-
-    col_img, col_text = st.columns([1, 2])
-
-    with col_img:
-        st.image("grocerybag.png", use_container_width=True)
-
-    with col_text:
-        st.markdown("""
-        **Welcome to PantryFull!**  
-        You'll never have to say "oh no, we're out" again  
-
-        PantryFull helps you keep your pantry organized, track what you usually buy,  
-        and get AI-powered insights to make shopping easier.  
-
-        Never run out of your essentials again!
-        """)
-
-        st.button("Get Started →", on_click=lambda: st.session_state.update({"step": 0}))
+# Each run of the script is one trace: the step's render plus everything it calls
+with tracing.span(f"app.step_{st.session_state.step}", step=st.session_state.step,
+                  household=st.session_state.household_id):
+    # -----------------------------
+    # WELCOME PAGE
+    # -----------------------------
+    if st.session_state.step == -1:
+        st.title("🧺 PantryFull")
+
+        col_img, col_text = st.columns([1, 2])
+
+        with col_img:
+            st.image(load_image("grocerybag.png"), use_container_width=True)
+
+        with col_text:
+            st.markdown("""
+            **Welcome to PantryFull!**  
+            You'll never have to say "oh no, we're out" again  
+
+            PantryFull helps you keep your pantry organized, track what you usually buy,  
+            and get AI-powered insights to make shopping easier.  
+
+            Never run out of your essentials again!
+            """)
+
+            st.button("Get Started →", on_click=lambda: st.session_state.update({"step": 0}))
+
+
+    # -----------------------------
+    # STEP 0 — LAST GROCERY TRIP
+    # -----------------------------
+    if st.session_state.step == 0:
+        st.title("🧺 PantryFull")
+        st.caption("Your pantry, but proactive.")
+        st.markdown("### When was your last grocery trip?")
+        last_trip = st.date_input("Select a date", value=st.session_state.last_trip_date)
+        st.session_state.last_trip_date = last_trip
+
+        col1, col2 = st.columns(2)
+        if col2.button("Next →"):
+            if last_trip:
+                st.session_state.step = 1
+                st.rerun()
+            else:
+                st.warning("Please select a date for your last grocery trip.")
+
+    # -----------------------------
+    # STEP 1 — STORES
+    # -----------------------------
+    # -----------------------------
+    # STEP 1 — STORES (Logo Pill Buttons)
+    # -----------------------------
+    # -----------------------------
+    # STEP 1 — STORES (Logo Above Button)
+    # -----------------------------
+    elif st.session_state.step == 1:
+        st.title("🧺 PantryFull")
+        st.caption("Where do you usually shop?")
+
+        stores = [
+            ("Walmart", "walmart.png"),
+            ("Costco", "costco.png"),
+            ("Target", "target.png")
+        ]
+
+        cols = st.columns(len(stores))
+        for i, (store_name, logo_file) in enumerate(stores):
+            is_selected = store_name in st.session_state.stores_selected
+            selected_class = "selected-pill" if is_selected else ""
+
+            with cols[i]:
+                # Display logo above button
+                st.image(load_image(logo_file), width=50)
+
+                # Pill-style button
+                if st.button(store_name, key=f"store_{store_name}"):
+                    if is_selected:
+                        st.session_state.stores_selected.remove(store_name)
+                    else:
+                        st.session_state.stores_selected.add(store_name)
+                    st.rerun()
 
+        if st.session_state.stores_selected:
+            st.caption("Selected: " + ", ".join(st.session_state.stores_selected))
 
-# -----------------------------
-# STEP 0 — LAST GROCERY TRIP
-# -----------------------------
-if st.session_state.step == 0:
-    st.title("🧺 PantryFull")
-    st.caption("Your pantry, but proactive.")
-    st.markdown("### When was your last grocery trip?")
-    last_trip = st.date_input("Select a date", value=st.session_state.last_trip_date)
-    st.session_state.last_trip_date = last_trip
-
-    col1, col2 = st.columns(2)
-    if col2.button("Next →"):
-        if last_trip:
+        st.markdown("---")
+        if st.button("Continue →"):
+            if st.session_state.stores_selected:
+                st.session_state.stores = list(st.session_state.stores_selected)
+                st.session_state.step = 2
+                st.rerun()
+            else:
+                st.warning("Please select at least one store.")
+
+
+    # -----------------------------
+    # STEP 2 — HOUSEHOLD + FREQUENCY
+    # -----------------------------
+    elif st.session_state.step == 2:
+        st.title("🧺 PantryFull")
+        st.caption("Just a few details to personalize things.")
+        st.markdown("### How many people are in your household?")
+        h_size = st.slider("Household size", 1, 20, st.session_state.get("h_size", 2))
+        st.markdown("### How often do you grocery shop per week?")
+        grocery_freq = st.slider("Times per week", 1, 7, st.session_state.get("grocery_freq", 2))
+
+        col1, col2 = st.columns(2)
+        if col1.button("← Back"):
             st.session_state.step = 1
             st.rerun()
-        else:
-            st.warning("Please select a date for your last grocery trip.")
-
-# -----------------------------
-# STEP 1 — STORES
-# -----------------------------
-# -----------------------------
-# STEP 1 — STORES (Logo Pill Buttons)
-# -----------------------------
-# -----------------------------
-# STEP 1 — STORES (Logo Above Button)
-# -----------------------------
-elif st.session_state.step == 1:
-    st.title("🧺 PantryFull")
-    st.caption("Where do you usually shop?")
-
-    stores = [
-        ("Walmart", "walmart.png"),
-        ("Costco", "costco.png"),
-        ("Target", "target.png")
-    ]
-
-    cols = st.columns(len(stores))
-    for i, (store_name, logo_file) in enumerate(stores):
-        is_selected = store_name in st.session_state.stores_selected
-        selected_class = "selected-pill" if is_selected else ""
-
-        with cols[i]:
-            # Display logo above button
-            st.image(logo_file, width=50)
-
-            # Pill-style button
-            if st.button(store_name, key=f"store_{store_name}"):
-                if is_selected:
-                    st.session_state.stores_selected.remove(store_name)
-                else:
-                    st.session_state.stores_selected.add(store_name)
-                st.rerun()
-
-    if st.session_state.stores_selected:
-        st.caption("Selected: " + ", ".join(st.session_state.stores_selected))
-
-    st.markdown("---")
-    if st.button("Continue →"):
-        if st.session_state.stores_selected:
-            st.session_state.stores = list(st.session_state.stores_selected)
-            st.session_state.step = 2
+        if col2.button("Next →"):
+            st.session_state.h_size = h_size
+            st.session_state.grocery_freq = grocery_freq
+            st.session_state.step = 3
             st.rerun()
-        else:
-            st.warning("Please select at least one store.")
-
 
-# -----------------------------
-# STEP 2 — HOUSEHOLD + FREQUENCY
-# -----------------------------
-elif st.session_state.step == 2:
-    st.title("🧺 PantryFull")
-    st.caption("Just a few details to personalize things.")
-    st.markdown("### How many people are in your household?")
-    h_size = st.slider("Household size", 1, 20, st.session_state.get("h_size", 2))
-    st.markdown("### How often do you grocery shop per week?")
-    grocery_freq = st.slider("Times per week", 1, 7, st.session_state.get("grocery_freq", 2))
-
-    col1, col2 = st.columns(2)
-    if col1.button("← Back"):
-        st.session_state.step = 1
-        st.rerun()
-    if col2.button("Next →"):
-        st.session_state.h_size = h_size
-        st.session_state.grocery_freq = grocery_freq
-        st.session_state.step = 3
-        st.rerun()
-
-# -----------------------------
-# STEP 3 — USUALS
-# -----------------------------
-elif st.session_state.step == 3:
-    category = CATEGORY_ORDER[st.session_state.category_index]
-    items = PANTRY_CATEGORIES[category]
-    st.title("🧺 PantryFull")
-    st.progress((st.session_state.category_index + 1) / TOTAL_CATEGORIES)
-    st.caption(f"Category {st.session_state.category_index + 1} of {TOTAL_CATEGORIES}")
-    st.markdown(f"### {category}")
-    st.caption("Select what you usually keep at home — or skip if it doesn’t apply.")
-
-    if category not in st.session_state.usuals:
-        st.session_state.usuals[category] = []
-    selected_items = set(st.session_state.usuals[category])
-
-    cols = st.columns(3)
-    for i, item in enumerate(items):
-        col = cols[i % 3]
-        is_selected = item in selected_items
-        container_class = "selected-pill" if is_selected else ""
-        with col:
-            st.markdown(f"<div class='{container_class}'>", unsafe_allow_html=True)
-            if st.button(item, key=f"{category}_{item}"):
-                if is_selected:
-                    selected_items.remove(item)
-                else:
-                    selected_items.add(item)
-                st.session_state.usuals[category] = list(selected_items)
-                st.rerun()
-            st.markdown("</div>", unsafe_allow_html=True)
-
-    st.markdown("---")
-    col1, col2, col3 = st.columns(3)
-    if col1.button("← Back") and st.session_state.category_index > 0:
-        st.session_state.category_index -= 1
-        st.rerun()
-    if col2.button("Skip →"):
-        st.session_state.category_index += 1
-        if st.session_state.category_index >= TOTAL_CATEGORIES:
-            st.session_state.step = 4
-        st.rerun()
-    if col3.button("Next →"):
-        st.session_state.category_index += 1
-        if st.session_state.category_index >= TOTAL_CATEGORIES:
-            st.session_state.step = 4
-        st.rerun()
+    # -----------------------------
+    # STEP 3 — USUALS
+    # -----------------------------
+    elif st.session_state.step == 3:
+        category = CATEGORY_ORDER[st.session_state.category_index]
+        items = PANTRY_CATEGORIES[category]
+        st.title("🧺 PantryFull")
+        st.progress((st.session_state.category_index + 1) / TOTAL_CATEGORIES)
+        st.caption(f"Category {st.session_state.category_index + 1} of {TOTAL_CATEGORIES}")
+        st.markdown(f"### {category}")
+        st.caption("Select what you usually keep at home — or skip if it doesn’t apply.")
+
+        if category not in st.session_state.usuals:
+            st.session_state.usuals[category] = []
+        selected_items = set(st.session_state.usuals[category])
+
+        cols = st.columns(3)
+        for i, item in enumerate(items):
+            col = cols[i % 3]
+            is_selected = item in selected_items
+            container_class = "selected-pill" if is_selected else ""
+            with col:
+                st.markdown(f"<div class='{container_class}'>", unsafe_allow_html=True)
+                if st.button(item, key=f"{category}_{item}"):
+                    if is_selected:
+                        selected_items.remove(item)
+                    else:
+                        selected_items.add(item)
+                    st.session_state.usuals[category] = list(selected_items)
+                    st.rerun()
+                st.markdown("</div>", unsafe_allow_html=True)
+
+        st.markdown("---")
+        col1, col2, col3 = st.columns(3)
+        if col1.button("← Back") and st.session_state.category_index > 0:
+            st.session_state.category_index -= 1
+            st.rerun()
+        if col2.button("Skip →"):
+            st.session_state.category_index += 1
+            if st.session_state.category_index >= TOTAL_CATEGORIES:
+                st.session_state.step = 4
+            st.rerun()
+        if col3.button("Next →"):
+            st.session_state.category_index += 1
+            if st.session_state.category_index >= TOTAL_CATEGORIES:
+                st.session_state.step = 4
+            st.rerun()
 
-# -----------------------------
-# STEP 4 — REVIEW & AI GENERATE
-# -----------------------------
-elif st.session_state.step == 4:
-    st.title("🧺 Review Your Pantry Setup")
-    st.markdown("### 🏪 Stores")
-    st.write(", ".join(st.session_state.stores))
-    st.markdown("### 👨‍👩‍👧 Household")
-    st.write(f"{st.session_state.h_size} people")
-    st.markdown("### 🛒 Grocery Frequency")
-    st.write(f"{st.session_state.grocery_freq} times per week")
-    st.markdown("### 📦 Your Usual Items")
-    for cat, items in st.session_state.usuals.items():
-        if items:
-            st.markdown(f"**{cat}**")
-            for i in items:
-                st.write(f"• {i}")
-
-    col1, col2 = st.columns(2)
-    if col1.button("← Edit Choices"):
-        st.session_state.step = 3
-        st.rerun()
-    if col2.button("Generate AI Insights →"):
-        if not st.session_state.ai_triggered:
-            st.session_state.ai_results = ai_logic.generate_shopping_list(
-                household_size=st.session_state.h_size,
-                grocery_freq=st.session_state.grocery_freq,
-                stores=st.session_state.stores,
-                pantry_usuals=st.session_state.usuals
+    # -----------------------------
+    # STEP 4 — REVIEW & AI GENERATE
+    # -----------------------------
+    elif st.session_state.step == 4:
+        st.title("🧺 Review Your Pantry Setup")
+        st.markdown("### 🏪 Stores")
+        st.write(", ".join(st.session_state.stores))
+        st.markdown("### 👨‍👩‍👧 Household")
+        st.write(f"{st.session_state.h_size} people")
+        st.markdown("### 🛒 Grocery Frequency")
+        st.write(f"{st.session_state.grocery_freq} times per week")
+        st.markdown("### 📦 Your Usual Items")
+        for cat, items in st.session_state.usuals.items():
+            if items:
+                st.markdown(f"**{cat}**")
+                for i in items:
+                    st.write(f"• {i}")
+
+        col1, col2 = st.columns(2)
+        if col1.button("← Edit Choices"):
+            st.session_state.step = 3
+            st.rerun()
+        if col2.button("Generate AI Insights →"):
+            get_pantry_store().save_household(
+                st.session_state.household_id,
+                st.session_state.h_size,
+                st.session_state.grocery_freq,
+                st.session_state.last_trip_date,
+                st.session_state.stores,
+                st.session_state.usuals
             )
-            st.session_state.ai_triggered = True
-        st.session_state.step = 5
-        st.rerun()
+            if not st.session_state.ai_triggered:
+                st.session_state.ai_results = ai_logic.generate_shopping_list(
+                    household_size=st.session_state.h_size,
+                    grocery_freq=st.session_state.grocery_freq,
+                    stores=st.session_state.stores,
+                    pantry_usuals=st.session_state.usuals,
+                    household_id=st.session_state.household_id
+                )
+                st.session_state.ai_triggered = True
+            st.session_state.step = 5
+            st.rerun()
 
-elif st.session_state.step == 5:
-    st.title("⚡ Smart Pantry Dashboard")
+    elif st.session_state.step == 5:
+        st.title("⚡ Smart Pantry Dashboard")
     
-    # --- 1. THE DATA SYNC ---
-    # Force the AI to analyze the data if it hasn't yet
-    if not st.session_state.ai_triggered:
-        with st.spinner("🧠 AI is analyzing your pantry & store prices..."):
-            # This calls your predict_low_stock which handles the Scarcity vs Surplus logic
-            st.session_state.ai_results = ai_logic.predict_low_stock(
-                usual_items=st.session_state.usuals,
-                household_size=st.session_state.h_size,
-                grocery_freq=st.session_state.grocery_freq,
-                last_trip=st.session_state.last_trip_date
+        # --- 1. THE DATA SYNC ---
+        # Results from the nightly batch (batch_runner.py) are shown straight
+        # away if they match this household's current profile
+        if not st.session_state.ai_triggered and not st.session_state.get("skip_precomputed"):
+            precomputed = precomputed_result(
+                st.session_state.household_id,
+                st.session_state.h_size,
+                st.session_state.grocery_freq,
+                st.session_state.last_trip_date,
+                st.session_state.stores,
+                st.session_state.usuals
             )
-            st.session_state.ai_triggered = True
-
-    results = st.session_state.ai_results
-    shopping_list = results.get("shopping_list", [])
-    recipes = results.get("recipes", [])
-    low_items = results.get("low_items", [])
+            if precomputed is not None:
+                st.session_state.ai_results = precomputed
+                st.session_state.ai_triggered = True
 
-    # --- 2. TOP KPI BAR ---
-    from data_engine import MOCK_PURCHASE_HISTORY
-    # Calculate how many items are over 10 days old
-    aging_items = [k for k, v in MOCK_PURCHASE_HISTORY.items() if (datetime.date.today() - v).days > 10]
+        # Force the AI to analyze the data if it hasn't yet
+        if not st.session_state.ai_triggered:
+            with st.status("🧠 AI is analyzing your pantry & store prices...") as status:
+                # Same Scarcity vs Surplus logic as predict_low_stock, but list
+                # items show up here as soon as each one has streamed in
+                for event, payload in ai_logic.stream_low_stock(
+                    usual_items=st.session_state.usuals,
+                    household_size=st.session_state.h_size,
+                    grocery_freq=st.session_state.grocery_freq,
+                    last_trip=st.session_state.last_trip_date,
+                    stores=st.session_state.stores,
+                    household_id=st.session_state.household_id
+                ):
+                    if event == "shopping_item":
+                        st.write(f"🛒 {payload['item']} — {payload.get('reason', 'Refill')}")
+                    else:
+                        st.session_state.ai_results = payload
+                status.update(label="✅ Pantry analysis ready", state="complete", expanded=False)
+                st.session_state.ai_triggered = True
+
+        results = st.session_state.ai_results
+        shopping_list = results.get("shopping_list", [])
+        recipes = results.get("recipes", [])
+        low_items = results.get("low_items", [])
+
+        # --- 2. TOP KPI BAR ---
+        # Items over 10 days old, straight from the pantry store's age index
+        aging_items = waste_risk_items(st.session_state.household_id)
     
-    m1, m2, m3 = st.columns(3)
-    m1.metric("Household", f"{st.session_state.h_size} Ppl")
-    m2.metric("Waste Risk", f"{len(aging_items)} Items", delta="Action Required", delta_color="inverse")
-    m3.metric("Stock Alerts", f"{len(low_items)} Low", delta="-5% vs Last Week")
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Household", f"{st.session_state.h_size} Ppl")
+        m2.metric("Waste Risk", f"{len(aging_items)} Items", delta="Action Required", delta_color="inverse")
+        m3.metric("Stock Alerts", f"{len(low_items)} Low", delta="-5% vs Last Week")
 
-    st.markdown("---")
+        st.markdown("---")
 
-    # --- 3. THE INTERACTIVE GRID ---
-    col_left, col_right = st.columns(2)
+        # --- 3. THE INTERACTIVE GRID ---
+        col_left, col_right = st.columns(2)
 
-    # CARD 1: SMART SHOPPING (Scarcity Logic)
-    with col_left:
-        with st.container(border=True):
-            st.markdown("### 🛒 Smart Cart")
-            st.caption("Cheapest matches for items you're running out of")
+        # CARD 1: SMART SHOPPING (Scarcity Logic)
+        with col_left:
+            with st.container(border=True):
+                st.markdown("### 🛒 Smart Cart")
+                st.caption("Cheapest matches for items you're running out of")
             
-            if shopping_list:
-                for item in shopping_list:
-                    c1, c2 = st.columns([3, 1])
-                    with c1:
-                        # Displaying the item and the reason it was added
-                        st.checkbox(f"**{item['item']}**", key=f"list_{item['item']}", value=True)
-                        st.caption(f"📍 {item.get('store', 'Walmart')} • {item.get('reason', 'Refill')}")
-                    with c2:
-                        # Pulling real mock price from data_engine
-                        price = item.get('price', 0.00)
-                        st.markdown(f"**${price:.2f}**")
-            else:
-                st.success("✅ Shopping list is clear!")
+                if shopping_list:
+                    cards = shopping_cards(shopping_list)
+                    for card in cards:
+                        c1, c2 = st.columns([3, 1])
+                        with c1:
+                            # Displaying the item and the reason it was added
+                            st.checkbox(f"**{card['item']}**", key=f"list_{card['key']}", value=True)
+                            st.caption(f"📍 {card['store']} • {card['reason']}")
+                        with c2:
+                            # Pulling real mock price from data_engine
+                            st.markdown(f"**${card['price']:.2f}**")
+
+                    # Checked items go into the purchase history in one batched write
+                    if st.button("🧾 I bought these", key="record_purchases"):
+                        bought = [card["item"] for card in cards if st.session_state.get(f"list_{card['key']}", True)]
+                        record_purchases(st.session_state.household_id, bought)
+                        st.toast(f"Logged {len(bought)} purchases")
+                else:
+                    st.success("✅ Shopping list is clear!")
 
-    # CARD 2: FRESHNESS TRACKER (Historical Logic)
-    with col_right:
-        with st.container(border=True):
-            st.markdown("### 📦 Freshness Tracker")
-            st.caption("Based on last bought dates in Data Engine")
+        # CARD 2: FRESHNESS TRACKER (Historical Logic)
+        with col_right:
+            with st.container(border=True):
+                st.markdown("### 📦 Freshness Tracker")
+                st.caption("Based on last bought dates in your pantry history")
             
-            for item, buy_date in MOCK_PURCHASE_HISTORY.items():
-                days_old = (datetime.date.today() - buy_date).days
-                # Visual bar: Red for old, Green for fresh
-                progress = min(days_old / 21, 1.0)
-                bar_color = "red" if days_old > 14 else "orange" if days_old > 7 else "green"
-                
-                st.markdown(f"**{item}** — {days_old} days old")
-                st.markdown(f"""
-                    <div style="width:100%; background:#f0f2f6; border-radius:10px; height:8px;">
-                        <div style="width:{progress*100}%; background:{bar_color}; height:8px; border-radius:10px;"></div>
-                    </div>
-                """, unsafe_allow_html=True)
-                st.write("") # Spacer
-
-    # CARD 3: ZERO-WASTE CHEF (Surplus Logic)
-    st.markdown("### 🍳 Zero-Waste Recipes")
-    st.caption("Using aging items while protecting your low-stock staples")
+                # One element for the whole tracker instead of three per item
+                history = purchase_history(st.session_state.household_id)
+                st.markdown(freshness_tracker_html(freshness_view(history)), unsafe_allow_html=True)
+
+        # CARD 3: ZERO-WASTE CHEF (Surplus Logic)
+        st.markdown("### 🍳 Zero-Waste Recipes")
+        st.caption("Using aging items while protecting your low-stock staples")
     
-    if recipes:
-        # Display recipes in a horizontal scrolling-style grid
-        recipe_cols = st.columns(len(recipes))
-        for i, r in enumerate(recipes):
-            with recipe_cols[i]:
-                with st.container(border=True):
-                    st.markdown(f"##### {r['name']}")
-                    # Extract the "clears out" info if available
-                    if "clears out" in r['name'].lower():
-                        st.toast(f"Found recipe for {r['name']}")
+        if recipes:
+            # Display recipes in a horizontal scrolling-style grid
+            recipe_cols = st.columns(len(recipes))
+            for i, r in enumerate(recipes):
+                with recipe_cols[i]:
+                    with st.container(border=True):
+                        st.markdown(f"##### {r['name']}")
+                        # Extract the "clears out" info if available
+                        if "clears out" in r['name'].lower():
+                            st.toast(f"Found recipe for {r['name']}")
                     
-                    with st.expander("View Preparation"):
-                        st.write(r['instructions'])
+                        with st.expander("View Preparation"):
+                            st.write(r['instructions'])
                     
-                    if st.button("Cook This", key=f"cook_{i}", use_container_width=True):
-                        st.balloons()
-    else:
-        st.info("AI is looking for recipes that won't use up the last of your stock...")
-
-    # --- 4. ACTION FOOTER ---
-    st.markdown("---")
-    if st.button("🔄 Force Refresh AI Insights"):
-        st.session_state.ai_triggered = False
-        st.rerun()
\ No newline at end of file
+                        if st.button("Cook This", key=f"cook_{i}", use_container_width=True):
+                            # Logged as consumption of the pantry items the recipe uses
+                            used = ai_logic.recipe_pantry_items(r, st.session_state.usuals)
+                            record_consumption(st.session_state.household_id, used)
+                            st.balloons()
+        else:
+            st.info("AI is looking for recipes that won't use up the last of your stock...")
+
+        # --- 4. ACTION FOOTER ---
+        st.markdown("---")
+        if st.button("🔄 Force Refresh AI Insights"):
+            st.session_state.ai_triggered = False
+            st.session_state.skip_precomputed = True
+            st.rerun()
+
+        # --- 5. DEBUG PANEL (only with tracing on, see tracing.py) ---
+        if tracing.enabled():
+            with st.expander("🔍 Debug: last request timing"):
+                last = next((trace for trace in tracing.recent_traces("app.step")
+                             if trace.attrs.get("household") == st.session_state.household_id), None)
+                if last is not None:
+                    st.code(tracing.format_trace(last), language=None)
+                else:
+                    st.caption("No finished request yet. Interact with the page to record one.")
+                st.json({"tokens": ai_logic.TOKEN_STATS.stats(), "json_parsing": ai_logic.PARSE_STATS.stats(),
+                         "items": ITEMS.stats()}, expanded=False)
@@ -0,0 +1,202 @@
+"""
+Whole-basket store assignment.
+
+find_cheapest_store minimizes price one item at a time, which happily sends
+you to three stores to save a few cents. Here every store trip has a cost
+too: we choose which stores to visit and where to buy each item so that
+
+    total = sum(price * quantity) + visit_cost * stores visited
+
+is as small as possible, only using offers with enough stock and falling
+back to in-stock items from the same category (see find_category_substitute)
+where a store doesn't have the item itself.
+
+  exact:  tries every subset of stores; fine up to MAX_EXACT_STORES
+  greedy: drop/add/swap local search, for large catalogs with many stores
+"""
+import itertools
+
+import numpy as np
+
+import data_engine
+
+MAX_EXACT_STORES = 12
+DEFAULT_VISIT_COST = 3.00
+
+
+def _normalize_basket(basket):
+    """Accepts "Item", ("Item", quantity) or {"item": ..., "quantity": ...} entries."""
+    normalized = []
+    for entry in basket:
+        if isinstance(entry, str):
+            normalized.append((entry, 1))
+        elif isinstance(entry, dict):
+            normalized.append((entry["item"], int(entry.get("quantity", 1))))
+        else:
+            normalized.append((entry[0], int(entry[1])))
+    return normalized
+
+
+def build_cost_matrix(basket, stores, catalog=None, allow_substitutes=True):
+    """
+    items x stores line costs (inf where the store can't fill the line) and
+    the substitute item used for each cell, if any.
+    """
+    catalog = catalog or data_engine.CATALOG
+    items = [item for item, _ in basket]
+    quantity = np.array([q for _, q in basket], dtype=float).reshape(-1, 1)
+
+    price, stock = catalog.matrix(items, stores)
+    fillable = (stock >= quantity) & (stock > 0) & ~np.isnan(price)
+    cost = np.where(fillable, price * quantity, np.inf)
+    substitutes = {}
+
+    if allow_substitutes:
+        for i, item in enumerate(items):
+            if fillable[i].all() or catalog.substitute(item, stores) is None:
+                continue
+            category = catalog.category[item]
+            for j, store in enumerate(stores):
+                if fillable[i, j]:
+                    continue
+                for alt_item, data in catalog.in_stock.get((category, store), ()):
+                    line = data["price"] * quantity[i, 0]
+                    if alt_item != item and data["stock"] >= quantity[i, 0] and line < cost[i, j]:
+                        cost[i, j] = line
+                        substitutes[(i, j)] = alt_item
+    return cost, substitutes
+
+
+def _assignment_cost(cost, open_cols, visit_cost):
+    if not open_cols:
+        return np.inf
+    return cost[:, open_cols].min(axis=1).sum() + visit_cost * len(open_cols)
+
+
+def solve_exact(cost, visit_cost):
+    """Optimal set of store columns by enumerating every subset."""
+    n_stores = cost.shape[1]
+    best_cols, best_total = [], np.inf
+    for size in range(1, n_stores + 1):
+        # Visiting `size` stores costs at least this much; nothing bigger can win
+        if visit_cost * size >= best_total:
+            break
+        for cols in itertools.combinations(range(n_stores), size):
+            total = _assignment_cost(cost, list(cols), visit_cost)
+            if total < best_total:
+                best_cols, best_total = list(cols), total
+    return best_cols
+
+
+def _greedy_drop(cost, visit_cost):
+    """Starts from every store and closes the one whose removal saves the most."""
+    open_cols = list(range(cost.shape[1]))
+    while len(open_cols) > 1:
+        sub = cost[:, open_cols]
+        order = np.argsort(sub, axis=1)
+        best = np.take_along_axis(sub, order[:, :1], axis=1)[:, 0]
+        second = np.take_along_axis(sub, order[:, 1:2], axis=1)[:, 0]
+        # Closing store k re-routes the items it serves to their second choice
+        extra = np.zeros(len(open_cols))
+        np.add.at(extra, order[:, 0], second - best)
+        savings = visit_cost - extra
+        k = int(np.argmax(savings))
+        if not savings[k] > 0:
+            break
+        del open_cols[k]
+    return open_cols
+
+
+def _greedy_add(cost, visit_cost):
+    """Starts from the best single store and opens the one that helps the most."""
+    n_stores = cost.shape[1]
+    open_cols, total = [], np.inf
+    while len(open_cols) < n_stores:
+        trials = [(_assignment_cost(cost, open_cols + [col], visit_cost), col)
+                  for col in range(n_stores) if col not in open_cols]
+        trial_total, col = min(trials)
+        if not trial_total < total:
+            break
+        open_cols, total = sorted(open_cols + [col]), trial_total
+    return open_cols
+
+
+def _local_search(cost, open_cols, visit_cost):
+    """Opens, closes or swaps single stores until no move lowers the total."""
+    n_stores = cost.shape[1]
+    total = _assignment_cost(cost, open_cols, visit_cost)
+    improved = True
+    while improved:
+        improved = False
+        closed = [col for col in range(n_stores) if col not in open_cols]
+        moves = [open_cols + [col] for col in closed]
+        moves += [[c for c in open_cols if c != col] for col in open_cols]
+        moves += [[c for c in open_cols if c != out] + [col] for out in open_cols for col in closed]
+        for trial in moves:
+            trial_total = _assignment_cost(cost, trial, visit_cost)
+            if trial_total < total - 1e-9:
+                open_cols, total, improved = sorted(trial), trial_total, True
+                break
+    return open_cols, total
+
+
+def solve_greedy(cost, visit_cost):
+    """
+    Heuristic store set: greedy drop and greedy add starts, each polished by
+    open/close/swap local search, keeping the cheaper of the two.
+    """
+    results = [_local_search(cost, start(cost, visit_cost), visit_cost)
+               for start in (_greedy_drop, _greedy_add)]
+    return min(results, key=lambda r: r[1])[0]
+
+
+def optimize_basket(basket, stores, visit_cost=DEFAULT_VISIT_COST, method="auto",
+                    catalog=None, allow_substitutes=True):
+    """
+    Assigns a basket to stores minimizing item cost plus visit_cost per store.
+    method is "exact", "greedy" or "auto" (exact up to MAX_EXACT_STORES).
+    """
+    catalog = catalog or data_engine.CATALOG
+    basket = _normalize_basket(basket)
+    stores = list(stores)
+    cost, substitutes = build_cost_matrix(basket, stores, catalog, allow_substitutes)
+
+    coverable = np.isfinite(cost).any(axis=1) if stores else np.zeros(len(basket), dtype=bool)
+    unavailable = [item for (item, _), ok in zip(basket, coverable) if not ok]
+    rows = np.nonzero(coverable)[0]
+
+    if method == "auto":
+        method = "exact" if len(stores) <= MAX_EXACT_STORES else "greedy"
+    solver = solve_exact if method == "exact" else solve_greedy
+    open_cols = solver(cost[rows], visit_cost) if len(rows) else []
+
+    assignments = []
+    item_cost = 0.0
+    used_cols = set()
+    for i in rows:
+        j = open_cols[int(np.argmin(cost[i, open_cols]))]
+        item, quantity = basket[i]
+        used_cols.add(j)
+        alt_item = substitutes.get((i, j))
+        offer = catalog.offer(stores[j], alt_item or item)
+        item_cost += float(cost[i, j])
+        assignments.append({
+            "item": item,
+            "quantity": quantity,
+            "store": stores[j],
+            "substitute": alt_item,
+            "brand": offer["brand"],
+            "price": offer["price"],
+            "cost": float(cost[i, j]),
+        })
+
+    visited = [stores[j] for j in sorted(used_cols)]
+    return {
+        "stores": visited,
+        "assignments": assignments,
+        "unavailable": unavailable,
+        "item_cost": round(item_cost, 2),
+        "visit_cost": round(visit_cost * len(visited), 2),
+        "total": round(item_cost + visit_cost * len(visited), 2),
+        "method": method,
+    }
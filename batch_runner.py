@@ -0,0 +1,344 @@
+"""
+Headless batch mode: predict_low_stock for every household, for the
+nightly job.
+
+    python3 batch_runner.py households.jsonl --out precomputed.jsonl --workers 4 --llm-concurrency 4
+
+The input has one household profile per line, the same fields onboarding
+saves in the pantry store:
+
+    {"household_id": "a1b2", "household_size": 4, "grocery_freq": 2, "stores": ["Walmart"],
+     "usuals": {"Dairy": ["Whole Milk", "Butter"]}, "last_trip": "2026-10-10"}
+
+Households are cut into chunks and fanned out over a process pool. A worker
+runs its chunk's households concurrently on one event loop, with at most
+--llm-concurrency model calls in flight (the loop's thread pool, which the
+model calls run on, has that many threads, and only as many households
+start as can get a thread for every call they make at once). Each worker
+has its own rate-limited gateway, so --requests-per-minute is split evenly
+between them.
+
+Workers hand each household's record to the parent (through a manager
+queue) as soon as it finishes, and the parent appends it to the output as
+one JSON line (household_id, inputs_key, computed_at, seconds, and result or
+error). If a worker process dies, the pool is broken and every chunk still
+in flight fails; only their households without a record yet are run again,
+in a new pool, up to MAX_CHUNK_ATTEMPTS times before they are written as
+errors. Rerunning after a crash picks up where it stopped: households that
+already have a result are skipped, failed ones are retried and a
+half-written last line is dropped.
+
+The dashboard serves these results (precomputed_result) when
+PANTRY_PRECOMPUTED names the output file, as long as the household's
+profile hasn't changed since and the result is recent enough.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import queue
+import time
+
+import ai_logic
+import data_engine
+from llm_cache import canonical_key
+from prompt_builder import PROMPT_VERSION
+from recipe_corpus import load_cached
+
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_LLM_CONCURRENCY = 4
+# predict_low_stock has at most two model calls in flight (recipes + shopping list)
+CALLS_PER_HOUSEHOLD = 2
+PROGRESS_EVERY_SECONDS = 10.0
+# Pools a chunk may be in when its worker process dies before it is given up on
+MAX_CHUNK_ATTEMPTS = 3
+# Nightly results, with slack for a late run
+PRECOMPUTED_MAX_AGE_SECONDS = 36 * 3600
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ("household_size", "grocery_freq", "stores", "usuals", "last_trip")
+
+
+class ProfileError(ValueError):
+    """A household line that can't be run."""
+
+
+def parse_profile(row):
+    """The predict_low_stock arguments for one input line (a dict), with last_trip as a date."""
+    if not isinstance(row, dict) or not row.get("household_id"):
+        raise ProfileError(f"no household_id in {row!r}")
+    try:
+        last_trip = row.get("last_trip")
+        return {
+            "household_id": str(row["household_id"]),
+            "household_size": max(1, int(row.get("household_size") or 1)),
+            "grocery_freq": max(1, int(row.get("grocery_freq") or 1)),
+            "stores": [str(store) for store in row.get("stores") or []],
+            "usuals": {str(category): [str(item) for item in items]
+                       for category, items in (row.get("usuals") or {}).items()},
+            "last_trip": datetime.date.fromisoformat(last_trip) if last_trip else None,
+        }
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ProfileError(f"bad profile for {row.get('household_id')!r}: {e}") from e
+
+
+def inputs_key(profile):
+    """Hash of everything a household's results depend on, to tell whether they are still current."""
+    return canonical_key("batch", prompt_version=PROMPT_VERSION, **{field: profile[field] for field in PROFILE_FIELDS})
+
+
+def iter_rows(path):
+    """Yields each non-blank JSONL line parsed, or None if it isn't valid JSON."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+
+
+# -----------------------------
+# WORKERS
+# -----------------------------
+async def _run_household(profile, refine):
+    start = time.perf_counter()
+    record = {"household_id": profile["household_id"], "inputs_key": inputs_key(profile)}
+    try:
+        record["result"] = await ai_logic.predict_low_stock_async(
+            profile["usuals"], profile["household_size"], profile["grocery_freq"], profile["last_trip"],
+            profile["stores"], refine_with_llm=refine, household_id=profile["household_id"]
+        )
+    except Exception as e:
+        logger.warning("Household %s failed: %s", profile["household_id"], e)
+        record["error"] = repr(e)
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    record["computed_at"] = time.time()
+    return record
+
+
+async def _run_chunk_async(profiles, llm_concurrency, refine, results):
+    import asyncio
+    import concurrent.futures
+
+    # Model calls run on the loop's default executor (asyncio.to_thread), so
+    # its size is the cap on calls in flight
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix="batch-llm"))
+    # Households only start when every call they make at once gets a thread,
+    # so no call sits in the executor queue behind another household's
+    slots = asyncio.Semaphore(max(1, llm_concurrency // CALLS_PER_HOUSEHOLD))
+
+    async def run(profile):
+        async with slots:
+            record = await _run_household(profile, refine)
+        if results is None:
+            return record
+        results.put(record)
+        return record["household_id"]
+
+    return await asyncio.gather(*(run(profile) for profile in profiles))
+
+
+def run_chunk(profiles, llm_concurrency=DEFAULT_LLM_CONCURRENCY, refine=False, results=None):
+    """
+    Runs one chunk of households (in a worker process) and returns their
+    output records. With a `results` queue each record is put on it as its
+    household finishes, and only the household ids are returned.
+    """
+    import asyncio
+
+    # Workers never write history, not even the demo history of "default":
+    # run_batch seeded it before forking, and several processes appending to
+    # one store and event log would interleave their records
+    data_engine.SEED_DEMO_HISTORY = False
+
+    return asyncio.run(_run_chunk_async(profiles, llm_concurrency, refine, results))
+
+
+# -----------------------------
+# OUTPUT + RESUME
+# -----------------------------
+def completed_households(out_path):
+    """Households that already have a result in out_path, after dropping a torn last line."""
+    if not os.path.exists(out_path):
+        return set()
+    with open(out_path, "rb") as f:
+        data = f.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    if len(complete) != len(data):
+        with open(out_path, "r+b") as f:
+            f.truncate(len(complete))
+    done = set()
+    for line in complete.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(record, dict) and "result" in record:
+            done.add(record["household_id"])
+    return done
+
+
+def run_batch(input_path, out_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              llm_concurrency=DEFAULT_LLM_CONCURRENCY, refine=False, progress_every=PROGRESS_EVERY_SECONDS):
+    """Runs every household in input_path not already done in out_path. Returns run totals."""
+    import concurrent.futures
+    import multiprocessing
+    from concurrent.futures.process import BrokenProcessPool
+
+    done = completed_households(out_path)
+    resumed = len(done)
+    pending, invalid = [], 0
+    for row in iter_rows(input_path):
+        try:
+            profile = parse_profile(row)
+        except ProfileError as e:
+            logger.warning("Skipping household: %s", e)
+            invalid += 1
+            continue
+        if profile["household_id"] not in done:
+            done.add(profile["household_id"])
+            pending.append(profile)
+
+    # The only history writes of the run, before any worker exists
+    data_engine.seed_demo_history(profile["household_id"] for profile in pending)
+
+    start = time.perf_counter()
+    finished = errors = 0
+    last_report = start
+    written = set()
+    # Chunk start -> households still to run, and how many pools the chunk has been in
+    chunks = {i: pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)}
+    attempts = dict.fromkeys(chunks, 0)
+
+    with open(out_path, "a", encoding="utf-8") as out, multiprocessing.Manager() as manager:
+        results = manager.Queue()
+
+        def write(record):
+            nonlocal finished, errors, last_report
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            written.add(record["household_id"])
+            finished += 1
+            errors += "error" in record
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                last_report = now
+                logger.info("%d/%d households, %d errors, %.1f households/sec",
+                            finished, len(pending), errors, finished / (now - start))
+
+        def drain():
+            while True:
+                try:
+                    write(results.get_nowait())
+                except queue.Empty:
+                    return
+
+        while chunks:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(run_chunk, profiles, llm_concurrency, refine, results): key
+                           for key, profiles in chunks.items()}
+                outstanding = set(futures)
+                while outstanding:
+                    try:
+                        write(results.get(timeout=0.2))
+                        continue
+                    except queue.Empty:
+                        pass
+                    for future in [future for future in outstanding if future.done()]:
+                        outstanding.discard(future)
+                        try:
+                            future.result()
+                        except BrokenProcessPool:
+                            # Its finished households are in the queue; the rest run again
+                            continue
+                        del chunks[futures[future]]
+            # Records put just before the pool broke
+            drain()
+
+            for key in list(chunks):
+                chunks[key] = [profile for profile in chunks[key] if profile["household_id"] not in written]
+                attempts[key] += 1
+                if not chunks[key]:
+                    del chunks[key]
+                elif attempts[key] >= MAX_CHUNK_ATTEMPTS:
+                    logger.warning("Giving up on %d households whose worker process kept dying",
+                                   len(chunks[key]))
+                    for profile in chunks.pop(key):
+                        write({"household_id": profile["household_id"], "inputs_key": inputs_key(profile),
+                               "error": "worker process died", "seconds": None, "computed_at": time.time()})
+
+    seconds = time.perf_counter() - start
+    return {
+        "households": finished,
+        "errors": errors,
+        "already_done": resumed,
+        "invalid": invalid,
+        "seconds": round(seconds, 2),
+        "households_per_sec": round(finished / seconds, 2) if seconds else 0.0,
+    }
+
+
+# -----------------------------
+# SERVING PRECOMPUTED RESULTS
+# -----------------------------
+def _load_records(path):
+    """{household_id: latest record with a result} from a batch output file."""
+    records = {}
+    for record in iter_rows(path):
+        if isinstance(record, dict) and "result" in record:
+            records[record["household_id"]] = record
+    return records
+
+
+def precomputed_result(household_id, household_size, grocery_freq, last_trip, stores, usuals, path=None,
+                       max_age=PRECOMPUTED_MAX_AGE_SECONDS):
+    """
+    The batch result for a household from PANTRY_PRECOMPUTED (or path), or
+    None if there is none, the profile changed since, or it is too old.
+    Shopping-list prices are refreshed from the live catalog.
+    """
+    path = path or os.getenv("PANTRY_PRECOMPUTED")
+    if not path or not os.path.exists(path):
+        return None
+    record = load_cached(path, _load_records).get(household_id)
+    if record is None or time.time() - record.get("computed_at", 0) > max_age:
+        return None
+    profile = {"household_size": household_size, "grocery_freq": grocery_freq, "stores": list(stores or []),
+               "usuals": usuals, "last_trip": last_trip}
+    if record.get("inputs_key") != inputs_key(profile):
+        return None
+    result = dict(record["result"])
+    # Copies: the loaded records are shared by every session
+    result["shopping_list"] = ai_logic.attach_store_prices(
+        [dict(entry) for entry in result.get("shopping_list", [])], profile["stores"])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute shopping lists and recipes for many households.")
+    parser.add_argument("input", help="household profiles, one JSON object per line")
+    parser.add_argument("--out", default="precomputed.jsonl", help="results JSONL (appended to, and resumed)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY,
+                        help="model calls in flight per worker")
+    parser.add_argument("--requests-per-minute", type=float,
+                        help="total Gemini request rate, split between the workers")
+    parser.add_argument("--refine", action="store_true", help="let Gemini adjust the predicted low items")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.requests_per_minute:
+        # Read by each worker's gateway (llm_gateway.gateway_from_env)
+        os.environ["GEMINI_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute / max(1, args.workers or 1))
+    totals = run_batch(args.input, args.out, args.workers, args.chunk_size, args.llm_concurrency, args.refine)
+    print(json.dumps(totals))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Exact vs greedy basket optimizer: solution quality and runtime.
+
+    python benchmarks/bench_basket_optimizer.py --stores 4 8 12 --items 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from basket_optimizer import _normalize_basket, build_cost_matrix, solve_exact, solve_greedy  # noqa: E402
+from data_engine import StoreCatalog  # noqa: E402
+from synthetic import make_basket, make_store_catalog  # noqa: E402
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stores", type=int, nargs="+", default=[4, 8, 12])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--catalog-items", type=int, default=2000)
+    parser.add_argument("--visit-cost", type=float, default=5.0)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+
+    for n_stores in args.stores:
+        for seed in range(args.seeds):
+            store_data = make_store_catalog(args.catalog_items, n_stores, seed=seed)
+            catalog = StoreCatalog(store_data)
+            basket = make_basket(store_data, args.items, seed=seed)
+            stores = list(store_data)
+            row = {"stores": n_stores, "items": args.items, "seed": seed}
+
+            (cost, _), seconds = _timed(lambda: build_cost_matrix(_normalize_basket(basket), stores, catalog))
+            cost = cost[np.isfinite(cost).any(axis=1)]
+            row["cost_matrix_ms"] = round(seconds * 1000, 1)
+            for method, solver in (("exact", solve_exact), ("greedy", solve_greedy)):
+                cols, seconds = _timed(lambda: solver(cost, args.visit_cost))
+                total = cost[:, cols].min(axis=1).sum() + args.visit_cost * len(cols)
+                row[f"{method}_total"] = round(float(total), 2)
+                row[f"{method}_stores"] = len(cols)
+                row[f"{method}_ms"] = round(seconds * 1000, 2)
+            row["greedy_gap_pct"] = round(100 * (row["greedy_total"] / row["exact_total"] - 1), 3)
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Per-turn prompt size: ConversationManager vs resending the whole transcript.
+
+    python benchmarks/bench_chat_context.py --turns 50
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chat_engine import ConversationManager, pantry_preamble  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+from token_budget import estimate_tokens  # noqa: E402
+
+USUALS = {"Dairy": ["Whole Milk", "Butter"], "Produce": ["Spinach", "Onions"], "Pantry": ["Rice", "Pasta"]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--reply-words", type=int, default=120)
+    args = parser.parse_args()
+
+    model = StubModel(base_latency=0, per_token_latency=0, jitter=0, chat_reply_words=args.reply_words)
+    preamble = pantry_preamble(USUALS, ["Eggs"])
+    manager = ConversationManager(preamble, model=model)
+    transcript_tokens = estimate_tokens(preamble)
+
+    for turn in range(args.turns):
+        question = f"Turn {turn}: what else could I make with spinach and rice this week?"
+        reply = "".join(manager.stream(question))
+        transcript_tokens += estimate_tokens(question)
+        if turn % 5 == 0 or turn == args.turns - 1:
+            print(json.dumps({"turn": turn, "managed_prompt_tokens": manager.prompt_tokens[-1],
+                              "full_transcript_tokens": transcript_tokens}))
+        transcript_tokens += estimate_tokens(reply)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Chat latency with a chunk-emitting stub model: blocking vs streaming.
+
+  blocking:  the user sees nothing until the whole reply has arrived
+  streaming: the user sees the first chunk after time-to-first-token
+
+Also measures how quickly a cancelled stream stops.
+
+    python benchmarks/bench_chat_latency.py --runs 20 --words 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chat_engine import StreamStats, stream_reply  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+
+PROMPT = "What can I cook with spinach and rice?"
+
+
+def _summary(name, samples):
+    ordered = sorted(samples)
+    return {
+        "metric": name,
+        "p50_s": round(statistics.median(ordered), 3),
+        "p95_s": round(ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--base-latency", type=float, default=0.4)
+    parser.add_argument("--per-token-latency", type=float, default=0.01)
+    args = parser.parse_args()
+    model = StubModel(args.base_latency, args.per_token_latency, chat_reply_words=args.words)
+
+    blocking, first_token, throughput, cancel_delay = [], [], [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        model.generate_content(PROMPT)
+        blocking.append(time.perf_counter() - start)
+
+        stats = StreamStats()
+        for _ in stream_reply(PROMPT, model=model, stats=stats):
+            pass
+        first_token.append(stats.first_token_s)
+        throughput.append(stats.tokens_per_sec)
+
+        # Cancel right after the first chunk, then time how long the stream takes to stop
+        cancel = threading.Event()
+        chunks = stream_reply(PROMPT, model=model, cancel_event=cancel)
+        next(chunks)
+        cancel.set()
+        cancelled_at = time.perf_counter()
+        for _ in chunks:
+            pass
+        cancel_delay.append(time.perf_counter() - cancelled_at)
+
+    print(json.dumps(_summary("blocking_first_visible", blocking)))
+    print(json.dumps(_summary("streaming_first_token", first_token)))
+    print(json.dumps(_summary("cancel_to_stop", cancel_delay)))
+    print(json.dumps({"metric": "streaming_tokens_per_sec", "mean": round(statistics.mean(throughput), 1)}))
+
+
+if __name__ == "__main__":
+    main()
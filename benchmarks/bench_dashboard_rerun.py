@@ -0,0 +1,111 @@
+"""
+Wall time of a dashboard (step 5) rerun per widget interaction.
+
+Every checkbox click on the dashboard reruns the whole script. The AI results
+are already in session state, so this measures only what the page itself
+recomputes and re-sends. Runs app.py under Streamlit's AppTest with the stub
+model standing in for Gemini and reports both the script's own run time and
+the AppTest round trip (which includes AppTest's polling).
+
+    python benchmarks/bench_dashboard_rerun.py --clicks 50
+    python benchmarks/bench_dashboard_rerun.py --app /tmp/app_before.py
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Benchmarks use a throwaway pantry store and event log
+os.environ.setdefault("PANTRY_DB", ":memory:")
+os.environ.setdefault("PANTRY_EVENT_LOG", ":memory:")
+
+from item_registry import ITEMS  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+
+USUALS = {
+    "Dairy": ["Whole Milk", "Butter", "Greek Yogurt"],
+    "Protein": ["Eggs", "Chicken Breast"],
+    "Produce": ["Spinach", "Tomatoes", "Onions"],
+    "Pantry": ["Rice", "Olive Oil", "Cereal"],
+}
+STORES = ["Walmart", "Costco", "Target"]
+
+# Runs the app and records how long the script body itself took
+WRAPPER = """
+import time
+import streamlit as st
+_start = time.perf_counter()
+try:
+    exec(compile(open({app!r}).read(), {app!r}, "exec"))
+finally:
+    st.session_state["_bench_script_s"] = time.perf_counter() - _start
+"""
+
+
+def _dashboard(app_path):
+    from streamlit.testing.v1 import AppTest
+
+    import ai_logic
+
+    ai_logic.model = StubModel(base_latency=0.0, per_token_latency=0.0, jitter=0.0)
+    last_trip = datetime.date.today() - datetime.timedelta(days=9)
+    results = ai_logic.predict_low_stock(USUALS, 3, 2, last_trip, STORES)
+
+    wrapper = tempfile.NamedTemporaryFile("w", suffix=".py", delete=False)
+    wrapper.write(WRAPPER.format(app=app_path))
+    wrapper.close()
+    at = AppTest.from_file(wrapper.name, default_timeout=60)
+    at.session_state.step = 5
+    at.session_state.ai_triggered = True
+    at.session_state.ai_results = results
+    at.session_state.usuals = USUALS
+    at.session_state.h_size = 3
+    at.session_state.grocery_freq = 2
+    at.session_state.last_trip_date = last_trip
+    at.session_state.stores = STORES
+    return at, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--clicks", type=int, default=50)
+    args = parser.parse_args()
+
+    # Image paths in app.py are relative to the repo root
+    os.chdir(ROOT)
+    at, results = _dashboard(os.path.abspath(args.app))
+    at.run()
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+
+    # Smart Cart checkboxes are keyed by item ID; AppTest runs the app in this process
+    key = f"list_{ITEMS.id_of(results['shopping_list'][0]['item'])}"
+    samples, script = [], []
+    for i in range(args.clicks):
+        box = at.checkbox(key=key)
+        box = box.uncheck() if i % 2 == 0 else box.check()
+        start = time.perf_counter()
+        box.run()
+        samples.append(time.perf_counter() - start)
+        script.append(at.session_state["_bench_script_s"])
+
+    for name, values in (("script", script), ("apptest_round_trip", samples)):
+        ordered = sorted(values)
+        print(json.dumps({
+            "metric": f"dashboard_rerun_{name}",
+            "app": os.path.relpath(args.app, ROOT),
+            "clicks": args.clicks,
+            "p50_ms": round(statistics.median(ordered) * 1000, 2),
+            "p95_ms": round(ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))] * 1000, 2),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Event log replay and aggregate lookup costs.
+
+Writes a synthetic log of --events fixed-width records (households x items,
+mostly purchases, some consumption) and measures:
+
+  replay:      opening the log cold, folding every record into aggregates
+  checkpoint:  saving the aggregates, then reopening from the checkpoint
+  tail:        reopening with --tail records written after the checkpoint
+  append:      appending events one call at a time
+  lookup:      get an item's aggregate (last purchase, rate, depletion)
+
+    python benchmarks/bench_event_log.py --events 10000000
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_log import CONSUME, PURCHASE, RECORD, EventLog  # noqa: E402
+
+RECORD_DTYPE = np.dtype([("day", "<u4"), ("household", "<u4"), ("item", "<u4"),
+                         ("kind", "u1"), ("pad", "V3"), ("quantity", "<f4")])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+
+def write_synthetic_log(path, n_events, n_households, n_items, seed=0):
+    """Names file plus n_events records, in day order, generated in chunks with NumPy."""
+    with open(f"{path}.names", "w", encoding="utf-8") as f:
+        for h in range(n_households):
+            f.write(json.dumps(f"household-{h}") + "\n")
+        for i in range(n_items):
+            f.write(json.dumps(f"Item {i:05d}") + "\n")
+
+    rng = np.random.default_rng(seed)
+    start_day = (datetime.date.today() - datetime.timedelta(days=365)).toordinal()
+    chunk = 1_000_000
+    with open(path, "wb") as f:
+        for offset in range(0, n_events, chunk):
+            n = min(chunk, n_events - offset)
+            records = np.zeros(n, dtype=RECORD_DTYPE)
+            records["day"] = start_day + (np.arange(offset, offset + n) * 365 // n_events)
+            records["household"] = rng.integers(0, n_households, n)
+            records["item"] = n_households + rng.integers(0, n_items, n)
+            records["kind"] = np.where(rng.random(n) < 0.7, PURCHASE, CONSUME)
+            records["quantity"] = np.where(records["kind"] == PURCHASE, 1.0, 0.25)
+            records.tofile(f)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--households", type=int, default=2_000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--tail", type=int, default=50_000)
+    parser.add_argument("--appends", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pantry.events")
+        _, gen_s = _timed(lambda: write_synthetic_log(path, args.events, args.households, args.items))
+        print(json.dumps({"metric": "generate", "events": args.events,
+                          "bytes": os.path.getsize(path), "seconds": round(gen_s, 2)}))
+
+        log, replay_s = _timed(lambda: EventLog(path))
+        print(json.dumps({"metric": "replay", "events": len(log), "seconds": round(replay_s, 2),
+                          "events_per_sec": round(len(log) / replay_s)}))
+
+        _, checkpoint_s = _timed(log.checkpoint)
+        log.close()
+        reopened, reopen_s = _timed(lambda: EventLog(path))
+        print(json.dumps({"metric": "checkpoint", "save_s": round(checkpoint_s, 2),
+                          "reopen_s": round(reopen_s, 2), "bytes": os.path.getsize(f"{path}.checkpoint")}))
+
+        today = datetime.date.today()
+        tail = [(f"household-{i % args.households}", f"Item {i % args.items:05d}", "purchase", 1, today)
+                for i in range(args.tail)]
+        reopened.append(tail)
+        reopened.close()
+        tailed, tail_s = _timed(lambda: EventLog(path))
+        print(json.dumps({"metric": "tail_replay", "tail_events": args.tail, "reopen_s": round(tail_s, 2)}))
+
+        samples = []
+        for i in range(args.appends):
+            event = [(f"household-{i % args.households}", f"Item {i % args.items:05d}", "consume", 0.25, today)]
+            start = time.perf_counter()
+            tailed.append(event)
+            samples.append(time.perf_counter() - start)
+        print(json.dumps({"metric": "append_us", "p50": round(statistics.median(samples) * 1e6, 2)}))
+
+        samples = []
+        for i in range(100_000):
+            start = time.perf_counter()
+            aggregate = tailed.aggregate(f"household-{i % args.households}", f"Item {i % args.items:05d}")
+            aggregate.depletion_date
+            samples.append(time.perf_counter() - start)
+        print(json.dumps({"metric": "lookup_us", "p50": round(statistics.median(samples) * 1e6, 3)}))
+        tailed.close()
+
+
+if __name__ == "__main__":
+    main()
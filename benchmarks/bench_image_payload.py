@@ -0,0 +1,91 @@
+"""
+Image bytes sent to the browser per page load, for the pages that show images.
+
+Renders each page under Streamlit's AppTest and sums the media files its
+image elements point to, i.e. exactly what a browser would download, then
+times a rerun of the same page.
+
+    python benchmarks/bench_image_payload.py
+    python benchmarks/bench_image_payload.py --app /tmp/app_before.py
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Benchmarks use a throwaway pantry store and event log
+os.environ.setdefault("PANTRY_DB", ":memory:")
+os.environ.setdefault("PANTRY_EVENT_LOG", ":memory:")
+
+PAGES = {"welcome": -1, "store_picker": 1}
+
+
+def _images(node):
+    for child in getattr(node, "children", {}).values():
+        if getattr(child, "type", None) == "image":
+            yield from child.proto.imgs
+        yield from _images(child)
+
+
+def _record_media():
+    """Remembers (size, mimetype) of every media file Streamlit stores, by file id."""
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    seen = {}
+    original = MemoryMediaFileStorage.load_and_get_id
+
+    def load_and_get_id(self, path_or_data, mimetype, kind, filename=None):
+        file_id = original(self, path_or_data, mimetype, kind, filename)
+        seen[file_id] = (len(self.get_file(file_id).content), mimetype)
+        return file_id
+
+    MemoryMediaFileStorage.load_and_get_id = load_and_get_id
+    return seen
+
+
+def page_payload(app_path, step, media):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=60)
+    at.session_state.step = step
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+
+    files = [media[os.path.splitext(os.path.basename(img.url))[0]] for img in _images(at.main)]
+    return {
+        "images": len(files),
+        "bytes": sum(size for size, _ in files),
+        "mimetypes": sorted({mimetype for _, mimetype in files}),
+        "first_render_ms": round(timings[0] * 1000, 1),
+        "rerun_ms": round(timings[1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    args = parser.parse_args()
+
+    # Image paths in app.py are relative to the repo root
+    os.chdir(ROOT)
+    app_path = os.path.abspath(args.app)
+    media = _record_media()
+    for page, step in PAGES.items():
+        print(json.dumps({
+            "metric": "image_payload",
+            "app": os.path.relpath(app_path, ROOT),
+            "page": page,
+            **page_payload(app_path, step, media),
+        }))
+
+
+if __name__ == "__main__":
+    main()
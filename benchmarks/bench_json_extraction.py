@@ -0,0 +1,99 @@
+"""
+Model-output JSON parsing: first-"{"-to-last-"}" slicing vs json_stream.
+
+  parse:  failure rate of both parsers over replies wrapped the ways models
+          actually wrap them (fences, prose before/after, braces in prose)
+  stream: time until the first shopping-list item is usable, waiting for the
+          whole response vs ArrayItemStream over the streamed chunks
+
+    python benchmarks/bench_json_extraction.py --replies 2000 --runs 10
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from json_stream import ArrayItemStream, extract_json  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+
+PROMPT = 'Output valid JSON only: {"shopping_list": [...]}'
+
+WRAPPERS = [
+    "{body}",
+    "```json\n{body}\n```",
+    "Here is your list:\n{body}",
+    "{body}\nLet me know if you need anything else!",
+    "Sure! I kept the format {{like you asked}}:\n```json\n{body}\n```",
+    "```json\n{body}\n```\nNote: swap {{oat milk}} for dairy if needed.",
+]
+
+
+def _slice_parse(text):
+    text = text.strip()
+    return json.loads(text[text.find("{"):text.rfind("}") + 1])
+
+
+def _replies(n, seed):
+    rng = random.Random(seed)
+    replies = []
+    for _ in range(n):
+        body = json.dumps({"shopping_list": [
+            {"item": f"Item {i}", "recommended_quantity": "1 unit", "reason": rng.choice(["Low", "Out {soon}", "Refill"])}
+            for i in range(rng.randint(1, 8))
+        ]})
+        replies.append(rng.choice(WRAPPERS).format(body=body))
+    return replies
+
+
+def _failure_rate(parse, replies):
+    failures = 0
+    for text in replies:
+        try:
+            parse(text)
+        except ValueError:
+            failures += 1
+    return failures / len(replies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replies", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--base-latency", type=float, default=0.4)
+    parser.add_argument("--per-token-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    replies = _replies(args.replies, seed=0)
+    for name, parse in (("slice", _slice_parse), ("extract_json", extract_json)):
+        start = time.perf_counter()
+        rate = _failure_rate(parse, replies)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"metric": "parse", "parser": name, "failure_rate": round(rate, 4),
+                          "us_per_reply": round(elapsed / len(replies) * 1e6, 1)}))
+
+    model = StubModel(args.base_latency, args.per_token_latency, chunk_tokens=4)
+    blocking, streaming = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        _slice_parse(model.generate_content(PROMPT).text)["shopping_list"][0]
+        blocking.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        items = ArrayItemStream("shopping_list")
+        for chunk in model.generate_content(PROMPT, stream=True):
+            if items.feed(chunk.text):
+                break
+        streaming.append(time.perf_counter() - start)
+
+    for name, samples in (("blocking", blocking), ("streaming", streaming)):
+        print(json.dumps({"metric": "first_item", "mode": name, "p50_s": round(statistics.median(samples), 3)}))
+
+
+if __name__ == "__main__":
+    main()
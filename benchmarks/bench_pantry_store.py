@@ -0,0 +1,91 @@
+"""
+Pantry store write and query costs.
+
+  writes:  purchase events written one transaction each vs batched
+  older:   "items older than N days" for one household, via the
+           last_purchase age index vs aggregating the raw event table
+
+    python benchmarks/bench_pantry_store.py --households 2000 --events 50
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pantry_store import PURCHASE, PantryStore  # noqa: E402
+from synthetic import make_store_catalog  # noqa: E402
+
+SCAN_QUERY = (
+    "SELECT item, MAX(happened_on) AS bought_on FROM events NOT INDEXED"
+    " WHERE household_id = ? AND kind = 'purchase' GROUP BY item HAVING bought_on < ? ORDER BY bought_on"
+)
+
+
+def _events(households, per_household, items, seed=0):
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    return [
+        (f"h{h}", rng.choice(items), PURCHASE, 1, today - datetime.timedelta(days=rng.randint(0, 60)))
+        for h in range(households) for _ in range(per_household)
+    ]
+
+
+def _p50_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--households", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=50, help="purchase events per household")
+    parser.add_argument("--single-writes", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = make_store_catalog(n_items=400, n_stores=3)
+    items = sorted({item for inventory in catalog.values() for item in inventory})
+    events = _events(args.households, args.events, items)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PantryStore(os.path.join(tmp, "pantry.db"))
+
+        start = time.perf_counter()
+        for event in events[:args.single_writes]:
+            store.record_events([event])
+        single = (time.perf_counter() - start) / args.single_writes
+
+        start = time.perf_counter()
+        store.record_events(events[args.single_writes:])
+        batched = (time.perf_counter() - start) / max(1, len(events) - args.single_writes)
+        print(json.dumps({"metric": "write_per_event_us", "single": round(single * 1e6, 1),
+                          "batched": round(batched * 1e6, 1), "events": len(events)}))
+
+        cutoff = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
+        household = f"h{args.households // 2}"
+        indexed = store.items_older_than(household, 30)
+        scanned = store._conn.execute(SCAN_QUERY, (household, cutoff)).fetchall()
+        assert sorted(indexed) == sorted((item, datetime.date.fromisoformat(day)) for item, day in scanned)
+        print(json.dumps({
+            "metric": "items_older_than_ms",
+            "indexed_p50": _p50_ms(lambda: store.items_older_than(household, 30), args.runs),
+            "event_scan_p50": _p50_ms(lambda: store._conn.execute(SCAN_QUERY, (household, cutoff)).fetchall(), 20),
+            "matches": len(indexed),
+        }))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
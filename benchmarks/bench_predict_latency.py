@@ -0,0 +1,70 @@
+"""
+Wall time of predict_low_stock against a local stub model.
+
+  serial:     low-items call, then one combined recipes + shopping-list call
+              (how predict_low_stock used to work)
+  concurrent: low-items call, then recipes and shopping list in parallel
+
+    python benchmarks/bench_predict_latency.py --runs 20
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Benchmarks use a throwaway pantry store and event log
+os.environ.setdefault("PANTRY_DB", ":memory:")
+os.environ.setdefault("PANTRY_EVENT_LOG", ":memory:")
+
+import ai_logic  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+
+USUALS = {"Dairy": ["Whole Milk", "Butter"], "Protein": ["Eggs"], "Produce": ["Spinach", "Onions"], "Pantry": ["Rice"]}
+LAST_TRIP = datetime.date.today() - datetime.timedelta(days=6)
+COMBINED_PROMPT = 'Output JSON: {"shopping_list": [], "recipes": []}'
+
+
+def serial(stub):
+    ai_logic._parse_json(stub.generate_content('Output JSON: {"low_items": ["item1"]}').text)
+    ai_logic._parse_json(stub.generate_content(COMBINED_PROMPT).text)
+
+
+def concurrent(stub):
+    ai_logic.predict_low_stock(USUALS, 3, 2, LAST_TRIP, stores=["Walmart", "Target"])
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--base-latency", type=float, default=0.4)
+    parser.add_argument("--per-token-latency", type=float, default=0.004)
+    args = parser.parse_args()
+
+    stub = StubModel(args.base_latency, args.per_token_latency)
+    ai_logic.model = stub
+    for name, fn in (("serial", serial), ("concurrent", concurrent)):
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            fn(stub)
+            samples.append(time.perf_counter() - start)
+        print(json.dumps({
+            "path": name,
+            "runs": args.runs,
+            "p50_s": round(statistics.median(samples), 3),
+            "p95_s": round(_percentile(samples, 95), 3),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Prompt size: the compact prompt_builder encoding vs the indented-JSON
+prompts it replaced, for growing pantries.
+
+  tokens:   estimated prompt tokens (token_budget.estimate_tokens)
+  omitted:  items the DEFAULT_PROMPT_TOKENS budget left out
+  build:    time to build one prompt
+
+    python benchmarks/bench_prompt_tokens.py --sizes 10 50 200 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from prompt_builder import DEFAULT_PROMPT_TOKENS, shopping_prompt  # noqa: E402
+from synthetic import CATEGORIES, INGREDIENT_WORDS  # noqa: E402
+from token_budget import estimate_tokens  # noqa: E402
+
+
+def legacy_shopping_prompt(household_size, last_trip, pantry_usuals, low_items):
+    """The shopping-list prompt as ai_logic built it before prompt_builder."""
+    return f"""
+You are a grocery planning assistant. Build this household's next shopping list.
+
+User Profile:
+- Household size: {household_size}
+- Last grocery trip: {last_trip}
+
+Pantry Inventory (Usuals):
+{json.dumps(pantry_usuals, indent=2)}
+
+Low-stock items (MUST BE ON THE SHOPPING LIST):
+{json.dumps(low_items, indent=2)}
+
+Instructions:
+1. Include every low-stock item, with a quantity sized for the household.
+2. Give a short reason for each item.
+3. Output valid JSON only:
+{{
+  "shopping_list": [{{ "item": "string", "recommended_quantity": "string", "reason": "string" }}]
+}}
+"""
+
+
+def make_pantry(n_items):
+    pantry = {}
+    for i in range(n_items):
+        name = INGREDIENT_WORDS[i % len(INGREDIENT_WORDS)].title()
+        pantry.setdefault(CATEGORIES[i % len(CATEGORIES)], []).append(
+            name if i < len(INGREDIENT_WORDS) else f"{name} {i}")
+    items = [item for items in pantry.values() for item in items]
+    ages = {item: (i * 7) % 35 for i, item in enumerate(items) if i % 3}
+    return pantry, items[::10][:20], ages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        pantry, low, ages = make_pantry(n)
+        legacy = legacy_shopping_prompt(4, "2026-10-10", pantry, low)
+        prompt = shopping_prompt(4, "2026-10-10", pantry, low, ages)
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            shopping_prompt(4, "2026-10-10", pantry, low, ages)
+        build_us = (time.perf_counter() - start) / args.runs * 1e6
+        print(json.dumps({
+            "metric": "shopping_prompt_tokens", "pantry_items": n, "low_items": len(low),
+            "legacy": estimate_tokens(legacy), "compact": prompt.tokens, "budget": DEFAULT_PROMPT_TOKENS,
+            "omitted": prompt.omitted, "build_us": round(build_us, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
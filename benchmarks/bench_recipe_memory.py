@@ -0,0 +1,85 @@
+"""
+Resident memory of the recipe fallback with N simultaneous sessions.
+
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation:
+
+    python benchmarks/bench_recipe_memory.py --sessions 1 8 32 --recipes 20000
+
+  per_request: every session parses the dataset itself (the old behaviour)
+  shared:      every session calls ai_logic.get_real_recipes (shared loader)
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PANTRY = {"Produce": ["Spinach", "Onions", "Tomatoes"], "Pantry": ["Rice", "Pasta", "Olive Oil"]}
+LOW = ["Butter"]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_sessions(mode, dataset, sessions):
+    barrier = threading.Barrier(sessions)
+    held = []
+
+    if mode == "shared":
+        import ai_logic
+
+        def session():
+            barrier.wait()
+            held.append(ai_logic.get_real_recipes(PANTRY, LOW, dataset_path=dataset))
+    else:
+        def session():
+            barrier.wait()
+            with open(dataset) as f:
+                held.append(json.load(f))
+
+    baseline = _peak_rss_mb()
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"mode": mode, "sessions": sessions, "baseline_rss_mb": round(baseline, 1),
+            "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "DATASET", "SESSIONS"))
+    args = parser.parse_args()
+
+    if args.child:
+        mode, dataset, sessions = args.child
+        print(json.dumps(_run_sessions(mode, dataset, int(sessions))))
+        return
+
+    from synthetic import write_recipe_corpus
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = write_recipe_corpus(os.path.join(tmp, "recipes.json"), args.recipes)
+        print(f"dataset: {args.recipes} recipes, {os.path.getsize(dataset) / 1e6:.1f} MB")
+        for sessions in args.sessions:
+            for mode in ("per_request", "shared"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, dataset, str(sessions)],
+                    capture_output=True, text=True, check=True,
+                ).stdout.strip().splitlines()[-1]
+                print(out)
+
+
+if __name__ == "__main__":
+    main()
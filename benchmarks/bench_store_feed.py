@@ -0,0 +1,122 @@
+"""
+Store feed ingestion throughput and catalog update cost.
+
+Loads a synthetic catalog, writes a full snapshot feed of it with
+--change-rate of the offers repriced or restocked, then measures:
+
+  ingest:  streaming the feed, diffing it and publishing the delta
+           (rows/sec, peak traced memory vs the feed size)
+  apply:   with_changes() on the delta vs rebuilding StoreCatalog
+  readers: find_cheapest_store latency while feeds are being applied
+
+    python benchmarks/bench_store_feed.py --items 50000 --stores 20 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_engine  # noqa: E402
+from data_engine import StoreCatalog, find_cheapest_store  # noqa: E402
+from store_feed import compute_delta, ingest_feed, iter_feed  # noqa: E402
+from synthetic import make_store_catalog  # noqa: E402
+
+FIELDS = ["store", "item", "brand", "category", "stock", "price"]
+
+
+def write_feed(path, catalog, change_rate, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for store, inventory in catalog.items():
+        for item, data in inventory.items():
+            row = {"store": store, "item": item, **data}
+            if rng.random() < change_rate:
+                row["price"] = round(data["price"] * rng.uniform(0.8, 1.2), 2)
+                row["stock"] = rng.randint(0, 60)
+            rows.append(row)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--change-rate", type=float, default=0.02)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    args = parser.parse_args()
+
+    catalog = make_store_catalog(n_items=args.items, n_stores=args.stores)
+    data_engine.apply_catalog_changes(catalog)
+    data_engine.CATALOG.price  # batch pricing matrices in use, as on a live server
+    stores = list(catalog)
+    items = sorted({item for inventory in catalog.values() for item in inventory})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"feed.{args.format}")
+        n_rows = write_feed(path, catalog, args.change_rate)
+
+        tracemalloc.start()
+        upserts, removals, counts = compute_delta(iter_feed(path), data_engine.CATALOG, snapshot=True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(json.dumps({"metric": "feed_diff_memory", "rows": n_rows, "file_bytes": os.path.getsize(path),
+                          "peak_traced_bytes": peak, "changed": counts["changed"]}))
+
+        start = time.perf_counter()
+        incremental = data_engine.CATALOG.with_changes(upserts, removals)
+        incremental.price
+        incremental_s = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuilt = StoreCatalog(incremental.store_data)
+        rebuilt.price
+        rebuild_s = time.perf_counter() - start
+        print(json.dumps({"metric": "catalog_update_ms", "with_changes": round(incremental_s * 1000, 1),
+                          "full_rebuild": round(rebuild_s * 1000, 1)}))
+
+        # Readers run throughout the ingest; none of them take a lock
+        latencies = []
+        stop = threading.Event()
+
+        def reader():
+            rng = random.Random(1)
+            while not stop.is_set():
+                item = rng.choice(items)
+                t0 = time.perf_counter()
+                find_cheapest_store(item, stores)
+                latencies.append(time.perf_counter() - t0)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        result = ingest_feed(path, snapshot=True)
+        stop.set()
+        thread.join()
+        latencies.sort()
+        print(json.dumps({"metric": "ingest", "format": args.format, "rows": result["rows"],
+                          "changed": result["changed"], "read_s": round(result["read_s"], 2),
+                          "apply_ms": round(result["apply_s"] * 1000, 1),
+                          "rows_per_sec": round(result["rows_per_sec"])}))
+        print(json.dumps({"metric": "reader_during_ingest_us", "lookups": len(latencies),
+                          "p50": round(statistics.median(latencies) * 1e6, 1),
+                          "p99": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Cost of the tracing instrumentation on a hot lookup.
+
+find_cheapest_store called undecorated (__wrapped__), through @traced with
+tracing off, and with tracing on (in-memory only, no exporters); plus the
+bare cost of entering and leaving a span() block.
+
+    python benchmarks/bench_tracing.py --calls 200000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tracing  # noqa: E402
+from data_engine import find_cheapest_store  # noqa: E402
+
+STORES = ["Walmart", "Costco", "Target"]
+
+
+def _per_call_ns(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn("Whole Milk", STORES)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def _span_ns(calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with tracing.span("bench"):
+            pass
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    tracing.enable(False)
+    bare = _per_call_ns(find_cheapest_store.__wrapped__, args.calls)
+    off = _per_call_ns(find_cheapest_store, args.calls)
+    span_off = _span_ns(args.calls)
+    tracing.enable(True)
+    on = _per_call_ns(find_cheapest_store, args.calls)
+    span_on = _span_ns(args.calls)
+    tracing.enable(False)
+
+    print(json.dumps({"metric": "find_cheapest_store_ns", "undecorated": round(bare), "tracing_off": round(off),
+                      "tracing_on": round(on), "off_overhead_ns": round(off - bare)}))
+    print(json.dumps({"metric": "span_block_ns", "tracing_off": round(span_off), "tracing_on": round(span_on)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Import-time budget check, meant to run in CI.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+fails (exit code 1) if its cumulative import time is over budget, or if it
+pulled in one of the heavy modules that must stay lazy.
+
+    python benchmarks/check_import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative milliseconds, with headroom for slow CI machines
+BUDGET_MS = {
+    "data_engine": 60,
+    "ai_logic": 150,
+}
+MUST_STAY_LAZY = ["google.generativeai", "pandas", "streamlit", "numpy", "asyncio"]
+_LINE_RE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module):
+    """({module: cumulative microseconds} for top-level imports, all module names imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    top_level, imported = {}, set()
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            cumulative, indent, name = match.groups()
+            imported.add(name)
+            if len(indent) == 1:
+                top_level[name] = int(cumulative)
+    return top_level, imported
+
+
+def main():
+    failures = []
+    for module, budget_ms in BUDGET_MS.items():
+        top_level, imported = import_profile(module)
+        took_ms = top_level.get(module, 0) / 1000
+        heavy = [name for name in MUST_STAY_LAZY if name in imported]
+        status = "ok" if took_ms <= budget_ms and not heavy else "FAIL"
+        print(f"{status:4} {module}: {took_ms:.1f} ms (budget {budget_ms} ms)"
+              + (f", imported {', '.join(heavy)}" if heavy else ""))
+        if status != "ok":
+            failures.append(module)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
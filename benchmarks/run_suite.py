@@ -0,0 +1,256 @@
+"""
+Reproducible benchmark suite: the hot paths end to end on deterministic
+synthetic data, compared against a stored baseline.
+
+Everything is generated from fixed seeds (synthetic.py) and the model is
+the local stub (stub_model.py, no jitter), so two runs on the same machine
+do the same work:
+
+  catalog_build             StoreCatalog over a --items x --stores catalog
+  find_cheapest_store       per lookup, over a fixed sample of items
+  find_category_substitute  per lookup, same sample
+  get_real_recipes          cold (index built from the corpus), then warm
+  generate_shopping_list    recipes + shopping list, stub model
+  generate_shopping_list    the same with --failure-rate of calls failing (failed
+                            recipe calls search the synthetic corpus)
+  predict_low_stock         consumption model, LLM refinement, shopping list
+
+Results are one JSON line per case on stdout, and with --out a single JSON
+document. When the baseline file exists, each case's best run is compared
+with it (the least noisy statistic on a busy machine) and the run exits
+with status 1 if any case is more than --tolerance slower. Baselines are
+only meaningful on the machine that recorded them: record one with
+--save-baseline before changing code, then rerun after. The committed
+baseline.json was recorded on a 1-CPU machine (its "machine" block), where
+threads and worker processes can't overlap, so record a local one before
+comparing against it anywhere else.
+
+    python benchmarks/run_suite.py --items 10 1000 100000 --stores 8
+    python benchmarks/run_suite.py --quick --save-baseline
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Benchmarks use a throwaway pantry store and event log
+os.environ.setdefault("PANTRY_DB", ":memory:")
+os.environ.setdefault("PANTRY_EVENT_LOG", ":memory:")
+# Every call should reach the model, not the response cache
+os.environ.setdefault("PANTRY_LLM_CACHE", "off")
+
+import ai_logic  # noqa: E402
+import data_engine  # noqa: E402
+from data_engine import StoreCatalog, find_category_substitute, find_cheapest_store  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+from synthetic import (  # noqa: E402
+    make_basket, make_pantry, make_purchase_history, make_store_catalog, write_recipe_corpus,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+HOUSEHOLD = "bench-household"
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def _measure(name, fn, runs, ops=1, unit="ms", warmup=1, **params):
+    """Times fn() runs times after warmup calls; each run does `ops` operations, reported per operation."""
+    scale = {"ms": 1e3, "us": 1e6}[unit]
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) / ops * scale)
+    return {
+        "case": name,
+        "params": params,
+        "unit": unit,
+        "runs": runs,
+        "p50": round(statistics.median(samples), 3),
+        "p95": round(_percentile(samples, 95), 3),
+        "min": round(min(samples), 3),
+    }
+
+
+def _case_key(result):
+    params = ",".join(f"{key}={value}" for key, value in sorted(result["params"].items()))
+    return f"{result['case']}[{params}]" if params else result["case"]
+
+
+def _install_catalog(store_data):
+    catalog = StoreCatalog(store_data)
+    with data_engine._catalog_lock:
+        data_engine.LIVE_STORE_DATA = store_data
+        data_engine.CATALOG = catalog
+    return catalog
+
+
+# -----------------------------
+# CASES
+# -----------------------------
+def catalog_cases(n_items, n_stores, lookups, runs):
+    store_data = make_store_catalog(n_items, n_stores, seed=n_items)
+    results = [_measure("catalog_build", lambda: _install_catalog(store_data), 1, warmup=0,
+                        items=n_items, stores=n_stores)]
+    stores = list(store_data)
+    # Half the stores, as a household would pick them; every item in the sample is in the catalog
+    preferred = stores[: max(1, n_stores // 2)]
+    sample = [item for item, _ in make_basket(store_data, lookups, seed=n_items)]
+
+    def cheapest():
+        for item in sample:
+            find_cheapest_store(item, preferred)
+
+    def substitute():
+        for item in sample:
+            find_category_substitute(item, preferred)
+
+    for name, fn in (("find_cheapest_store", cheapest), ("find_category_substitute", substitute)):
+        results.append(_measure(name, fn, runs, ops=len(sample), unit="us", items=n_items, stores=n_stores))
+    return results
+
+
+def recipe_cases(path, n_recipes, pantry, low_items, runs):
+    def search():
+        return ai_logic.get_real_recipes(pantry, low_items, dataset_path=path)
+
+    cold = _measure("get_real_recipes_cold", search, 1, warmup=0, recipes=n_recipes)
+    warm = _measure("get_real_recipes", search, runs, recipes=n_recipes)
+    return [cold, warm]
+
+
+def llm_cases(args, pantry, low_items, stores, recipes_path):
+    last_trip = datetime.date.today() - datetime.timedelta(days=6)
+    # Failed recipe calls fall back to a corpus search; the default dataset isn't shipped
+    ai_logic.RECIPE_DATASET = recipes_path
+    results = []
+    for failure_rate in sorted({0.0, args.failure_rate}):
+        ai_logic.model = StubModel(args.base_latency, args.per_token_latency, jitter=0.0,
+                                   failure_rate=failure_rate, seed=0)
+
+        fallbacks = []
+
+        def shopping_list():
+            result = ai_logic.generate_shopping_list(4, 2, stores, pantry, last_trip, low_items,
+                                                     household_id=HOUSEHOLD)
+            fallbacks.append("error" in result)
+
+        result = _measure("generate_shopping_list", shopping_list, args.llm_runs,
+                          pantry_items=args.pantry_items, failure_rate=failure_rate)
+        # Runs (warmup included) where at least one call failed and fell back
+        result["fallbacks"] = sum(fallbacks)
+        results.append(result)
+
+    ai_logic.model = StubModel(args.base_latency, args.per_token_latency, jitter=0.0, seed=0)
+
+    def low_stock():
+        ai_logic.predict_low_stock(pantry, 4, 2, last_trip, stores, refine_with_llm=True, household_id=HOUSEHOLD)
+
+    results.append(_measure("predict_low_stock", low_stock, args.llm_runs, pantry_items=args.pantry_items))
+    return results
+
+
+# -----------------------------
+# BASELINE
+# -----------------------------
+def compare(results, baseline, tolerance):
+    """Per-case comparison rows, and whether any case regressed past the tolerance."""
+    previous = {_case_key(r): r for r in baseline.get("results", [])}
+    rows, regressed = [], False
+    for result in results:
+        key = _case_key(result)
+        before = previous.get(key)
+        if before is None or not before["min"]:
+            rows.append({"compare": key, "status": "new"})
+            continue
+        ratio = result["min"] / before["min"]
+        status = "slower" if ratio > 1 + tolerance else "faster" if ratio < 1 / (1 + tolerance) else "ok"
+        regressed = regressed or status == "slower"
+        rows.append({"compare": key, "status": status, "baseline_min": before["min"],
+                     "min": result["min"], "ratio": round(ratio, 3)})
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--stores", type=int, default=8)
+    parser.add_argument("--lookups", type=int, default=1_000)
+    parser.add_argument("--recipes", type=int, default=20_000)
+    parser.add_argument("--pantry-items", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--llm-runs", type=int, default=10)
+    parser.add_argument("--base-latency", type=float, default=0.05)
+    parser.add_argument("--per-token-latency", type=float, default=0.0005)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--quick", action="store_true", help="small catalog and corpus, fewer runs")
+    parser.add_argument("--out", help="write all results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="record this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown of the best run, 0.25 = 25%%")
+    args = parser.parse_args()
+    if args.quick:
+        args.items, args.recipes, args.runs, args.llm_runs = [10, 1_000], 2_000, 5, 3
+
+    pantry = make_pantry(args.pantry_items)
+    pantry_flat = [item for items in pantry.values() for item in items]
+    low_items = pantry_flat[:3]
+    data_engine.record_events(HOUSEHOLD, make_purchase_history(pantry))
+
+    results = []
+    # Keep stdout for results, whatever the code under test prints
+    with contextlib.redirect_stdout(sys.stderr):
+        for n_items in args.items:
+            results += catalog_cases(n_items, args.stores, args.lookups, args.runs)
+        stores = list(data_engine.LIVE_STORE_DATA)[: max(1, args.stores // 2)]
+        with tempfile.TemporaryDirectory() as tmp:
+            recipes_path = write_recipe_corpus(os.path.join(tmp, f"recipes-{args.recipes}.json"), args.recipes)
+            results += recipe_cases(recipes_path, args.recipes, pantry, low_items, args.runs)
+            results += llm_cases(args, pantry, low_items, stores, recipes_path)
+    for result in results:
+        print(json.dumps(result))
+
+    document = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.machine(), "cpus": os.cpu_count()},
+        "args": {key: value for key, value in vars(args).items()
+                 if key not in ("out", "baseline", "save_baseline", "tolerance")},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    regressed = False
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != document["machine"]:
+            print(json.dumps({"warning": "baseline was recorded on a different machine",
+                              "baseline_machine": baseline.get("machine")}))
+        rows, regressed = compare(results, baseline, args.tolerance)
+        for row in rows:
+            print(json.dumps(row))
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(json.dumps({"saved_baseline": args.baseline}))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
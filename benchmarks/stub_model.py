@@ -0,0 +1,102 @@
+"""
+Local stand-in for ai_logic.model (a google.generativeai GenerativeModel).
+
+Latency is `base_latency + per_token_latency * response tokens`, so a prompt
+that asks for more output takes longer, like the real API. Responses are
+canned JSON chosen by what the prompt asks for: bare when JSON mode was
+requested through generation_config, otherwise in a ```json fence.
+StubModel(stream=True) streams every reply unless a call says otherwise,
+for code (and tests) that iterate over the response chunk by chunk.
+"""
+import json
+import random
+import time
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubChat:
+    """Minimal ChatSession: the history is flattened into the prompt."""
+
+    def __init__(self, model, history):
+        self.model = model
+        self.history = list(history)
+
+    def send_message(self, content, stream=None, **kwargs):
+        turns = [part for entry in self.history for part in entry["parts"]]
+        return self.model.generate_content("\n".join(turns + [content]), stream=stream, **kwargs)
+
+
+class StubModel:
+    def __init__(self, base_latency=0.4, per_token_latency=0.004, jitter=0.1, failure_rate=0.0, seed=0,
+                 chat_reply_words=150, chunk_tokens=8, per_prompt_token_latency=0.0, stream=False):
+        self.base_latency = base_latency
+        self.per_prompt_token_latency = per_prompt_token_latency
+        self.chat_reply_words = chat_reply_words
+        self.chunk_tokens = chunk_tokens
+        self.per_token_latency = per_token_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.stream = stream
+        self.calls = 0
+        self.last_prompt_tokens = 0
+        self._rng = random.Random(seed)
+
+    def _reply(self, prompt, json_mode=False):
+        body = {}
+        if '"low_items"' in prompt:
+            body["low_items"] = ["Whole Milk", "Eggs"]
+        if '"shopping_list"' in prompt:
+            body["shopping_list"] = [
+                {"item": item, "recommended_quantity": "2 units", "reason": "Running low for the household"}
+                for item in ("Whole Milk", "Eggs", "Bread")
+            ]
+        if '"recipes"' in prompt:
+            body["recipes"] = [
+                {
+                    "name": f"Stub Recipe {i}",
+                    "ingredients": ["rice", "spinach", "olive oil", "onions"],
+                    "instructions": "Chop everything. " * 40,
+                }
+                for i in range(3)
+            ]
+        if not body:
+            # Free-form chat
+            words = ["Try", "a", "spinach", "and", "rice", "bowl", "with", "olive", "oil."]
+            return " ".join(words[i % len(words)] for i in range(self.chat_reply_words))
+        if json_mode:
+            return json.dumps(body)
+        return "```json\n" + json.dumps(body) + "\n```"
+
+    def _jittered(self, delay):
+        delay += self.per_prompt_token_latency * self.last_prompt_tokens
+        return delay * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def start_chat(self, history=None):
+        return StubChat(self, history or [])
+
+    def generate_content(self, prompt, stream=None, **kwargs):
+        stream = self.stream if stream is None else stream
+        self.calls += 1
+        self.last_prompt_tokens = len(prompt) / 4
+        if self._rng.random() < self.failure_rate:
+            time.sleep(self._jittered(self.base_latency))
+            raise RuntimeError("stub model failure")
+        config = kwargs.get("generation_config") or {}
+        text = self._reply(prompt, config.get("response_mime_type") == "application/json")
+        if stream:
+            return self._stream(text)
+        tokens = len(text) / 4
+        time.sleep(self._jittered(self.base_latency + self.per_token_latency * tokens))
+        return StubResponse(text)
+
+    def _stream(self, text):
+        """Chunks of about chunk_tokens tokens, paced like a streaming response."""
+        time.sleep(self._jittered(self.base_latency))
+        step = self.chunk_tokens * 4
+        for start in range(0, len(text), step):
+            time.sleep(self._jittered(self.per_token_latency * self.chunk_tokens))
+            yield StubResponse(text[start:start + step])
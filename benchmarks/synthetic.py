@@ -0,0 +1,101 @@
+"""
+Deterministic synthetic data shaped like the real inputs, for benchmarks.
+"""
+import datetime
+import json
+import random
+
+INGREDIENT_WORDS = [
+    "rice", "pasta", "olive oil", "onions", "tomatoes", "spinach", "butter",
+    "whole milk", "eggs", "chicken breast", "ground beef", "apples", "bananas",
+    "garlic", "salt", "black pepper", "flour", "sugar", "lemon", "parsley",
+    "cheddar cheese", "greek yogurt", "carrots", "celery", "thyme", "honey",
+]
+QUANTITIES = ["1 cup", "2 tablespoons", "1/2 teaspoon", "3", "1 pound", "4 ounces", "2 large"]
+
+
+def make_recipe_corpus(n_recipes, seed=0):
+    """Records in the full_format_recipes.json schema."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n_recipes):
+        picked = rng.sample(INGREDIENT_WORDS, rng.randint(4, 10))
+        corpus.append({
+            "title": f"{picked[0].title()} and {picked[1].title()} #{i}",
+            "ingredients": [f"{rng.choice(QUANTITIES)} {name}" for name in picked],
+            "directions": [
+                f"Step {step}: prepare the {rng.choice(picked)} and cook for {rng.randint(2, 40)} minutes."
+                for step in range(1, rng.randint(3, 8))
+            ],
+        })
+    return corpus
+
+
+def write_recipe_corpus(path, n_recipes, seed=0):
+    with open(path, "w") as f:
+        json.dump(make_recipe_corpus(n_recipes, seed), f)
+    return path
+
+
+CATEGORIES = ["Dairy", "Protein", "Produce", "Pantry", "Bakery", "Frozen", "Beverages", "Snacks"]
+
+
+def make_store_catalog(n_items, n_stores, seed=0, carry_rate=0.7, out_of_stock_rate=0.1):
+    """A LIVE_STORE_DATA-shaped {store: {item: data}} catalog."""
+    rng = random.Random(seed)
+    items = [(f"Item {i:06d}", CATEGORIES[i % len(CATEGORIES)], rng.uniform(0.5, 15.0)) for i in range(n_items)]
+    catalog = {}
+    for s in range(n_stores):
+        markup = rng.uniform(0.85, 1.2)
+        inventory = {}
+        for name, category, base_price in items:
+            if rng.random() > carry_rate:
+                continue
+            inventory[name] = {
+                "brand": f"Brand {s}",
+                "category": category,
+                "stock": 0 if rng.random() < out_of_stock_rate else rng.randint(1, 60),
+                "price": round(base_price * markup * rng.uniform(0.9, 1.1), 2),
+            }
+        catalog[f"Store {s:03d}"] = inventory
+    return catalog
+
+
+def make_basket(catalog, size, seed=0, max_quantity=3):
+    """(item, quantity) pairs drawn from the catalog's items."""
+    rng = random.Random(seed)
+    names = sorted({item for inventory in catalog.values() for item in inventory})
+    return [(name, rng.randint(1, max_quantity)) for name in rng.sample(names, min(size, len(names)))]
+
+
+def make_pantry(n_items, seed=0, names=None):
+    """A pantry_usuals-shaped {category: [items]}, from recipe ingredients unless names are given."""
+    rng = random.Random(seed)
+    names = names or [word.title() for word in INGREDIENT_WORDS]
+    pantry = {}
+    for name in rng.sample(names, min(n_items, len(names))):
+        pantry.setdefault(rng.choice(CATEGORIES), []).append(name)
+    return pantry
+
+
+def make_purchase_history(pantry_usuals, days=120, seed=0, today=None):
+    """
+    (item, kind, quantity, date) events for data_engine.record_events: each
+    item is rebought on its own 3-21 day cycle, with some use in between.
+    """
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    start = today - datetime.timedelta(days=days)
+    events = []
+    for items in pantry_usuals.values():
+        for item in items:
+            cycle = rng.randint(3, 21)
+            day = start + datetime.timedelta(days=rng.randint(0, cycle))
+            while day <= today:
+                events.append((item, "purchase", rng.randint(1, 3), day))
+                used = day + datetime.timedelta(days=cycle // 2)
+                if used <= today and rng.random() < 0.5:
+                    events.append((item, "consume", 0.25, used))
+                day += datetime.timedelta(days=cycle)
+    events.sort(key=lambda event: event[3])
+    return events
@@ -1,5 +1,7 @@
+import threading
+
 import streamlit as st
-import ai_logic  # This imports your model and setup
+from chat_engine import ConversationManager, StreamStats, pantry_preamble
 
 st.set_page_config(page_title="Pantry AI", layout="wide")
 
@@ -12,6 +14,25 @@ if "messages" not in st.session_state:
         {"role": "assistant", "content": "Hi! I'm your Pantry AI. Ask me for a recipe or shopping advice! 🤖"}
     ]
 
+# Streaming state: the prompt waiting for a reply, the text received so far,
+# and the event that stops generation
+if "pending_prompt" not in st.session_state:
+    st.session_state.pending_prompt = None
+if "partial_reply" not in st.session_state:
+    st.session_state.partial_reply = ""
+if "chat_cancel" not in st.session_state:
+    st.session_state.chat_cancel = threading.Event()
+if "chat_stats" not in st.session_state:
+    st.session_state.chat_stats = []
+
+# Multi-turn context: pantry preamble + recent turns + rolling summary
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationManager()
+st.session_state.conversation.set_preamble(pantry_preamble(
+    st.session_state.get("usuals", {}),
+    st.session_state.get("ai_results", {}).get("low_items", [])
+))
+
 # 2. CSS: ADAPTIVE FONT COLORS BASED ON DEVICE THEME
 st.markdown("""
 <style>
@@ -101,22 +122,65 @@ if st.session_state.chat_open:
                     # Note: The CSS above will handle the text color automatically
                     st.markdown(f"<p><b>{role_label}:</b> {msg['content']}</p>", unsafe_allow_html=True)
 
-            # 5. Input Function
+            # 5. Input Function: only queue the prompt here; the reply is
+            # streamed below, where Streamlit can render while it arrives
             def send_to_ai():
                 user_text = st.session_state.chat_input
                 if user_text:
                     st.session_state.messages.append({"role": "user", "content": user_text})
-                    try:
-                        # Use the model object from your ai_logic file
-                        response = ai_logic.model.generate_content(user_text)
-                        st.session_state.messages.append({"role": "assistant", "content": response.text})
-                    except Exception as e:
-                        # Better error catching to avoid showing ugly code
-                        if "429" in str(e):
-                            st.session_state.messages.append({"role": "assistant", "content": "⚠️ Rate limit reached. Please wait a minute!"})
-                        else:
-                            st.session_state.messages.append({"role": "assistant", "content": "I'm having a bit of trouble connecting."})
+                    st.session_state.pending_prompt = user_text
+                    st.session_state.partial_reply = ""
+                    st.session_state.chat_cancel = threading.Event()
                     st.session_state.chat_input = "" 
 
+            def stop_reply():
+                st.session_state.chat_cancel.set()
+
+            def finish_reply(text):
+                st.session_state.messages.append({"role": "assistant", "content": text})
+                st.session_state.pending_prompt = None
+                st.session_state.partial_reply = ""
+
+            if st.session_state.pending_prompt and st.session_state.chat_cancel.is_set():
+                # Stopped mid-reply: keep what already arrived
+                finish_reply((st.session_state.partial_reply + " …(stopped)").strip())
+                stats = st.session_state.get("chat_stream_stats")
+                if stats is not None:
+                    stats.cancelled = True
+                    st.session_state.chat_stats.append(stats.as_dict())
+
+            elif st.session_state.pending_prompt:
+                st.button("⏹ Stop", key="stop_reply", on_click=stop_reply)
+                stats = StreamStats()
+                st.session_state.chat_stream_stats = stats
+
+                def tracked_chunks():
+                    for text in st.session_state.conversation.stream(
+                            st.session_state.pending_prompt,
+                            cancel_event=st.session_state.chat_cancel, stats=stats):
+                        st.session_state.partial_reply += text
+                        yield text
+
+                try:
+                    with msg_area:
+                        st.markdown("<p><b>AI:</b></p>", unsafe_allow_html=True)
+                        st.write_stream(tracked_chunks())
+                    finish_reply(st.session_state.partial_reply)
+                except Exception as e:
+                    # Better error catching to avoid showing ugly code
+                    if "429" in str(e):
+                        finish_reply("⚠️ Rate limit reached. Please wait a minute!")
+                    else:
+                        finish_reply("I'm having a bit of trouble connecting.")
+                st.session_state.chat_stats.append(stats.as_dict())
+                st.rerun()
+
+            if st.session_state.chat_stats:
+                last = st.session_state.chat_stats[-1]
+                prompt_tokens = st.session_state.conversation.prompt_tokens
+                if last["first_token_s"] is not None:
+                    st.caption(f"⚡ first token {last['first_token_s']:.2f}s · {last['tokens_per_sec']:.0f} tokens/s"
+                               f" · prompt ~{prompt_tokens[-1] if prompt_tokens else 0} tokens")
+
             st.text_input("Ask me anything...", key="chat_input", on_change=send_to_ai)
-            st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+            st.markdown('</div>', unsafe_allow_html=True)
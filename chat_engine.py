@@ -0,0 +1,191 @@
+"""
+Chat plumbing for chat_bot.py: streaming replies from the Gemini model.
+
+stream_reply yields text chunks as they arrive so the UI can render them
+incrementally, stops early when its cancel event is set, and records
+time-to-first-token and throughput in a StreamStats.
+
+ConversationManager keeps multi-turn chats cheap: pantry context goes in
+once as a preamble, recent turns are sent verbatim and older ones are folded
+into a rolling summary, so the prompt stays under a fixed token budget no
+matter how long the conversation runs.
+"""
+import re
+import time
+
+import ai_logic
+from token_budget import estimate_tokens
+
+
+class StreamStats:
+    """Timing for one streamed reply."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_s = None
+        self.total_s = None
+        self.tokens = 0
+        self.cancelled = False
+
+    @property
+    def tokens_per_sec(self):
+        if not self.total_s or self.first_token_s is None:
+            return 0.0
+        generating = self.total_s - self.first_token_s
+        return self.tokens / generating if generating > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "first_token_s": self.first_token_s,
+            "total_s": self.total_s,
+            "tokens": self.tokens,
+            "tokens_per_sec": self.tokens_per_sec,
+            "cancelled": self.cancelled,
+        }
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks without text parts (e.g. a trailing safety/finish chunk)
+        return ""
+
+
+def stream_reply(prompt, model=None, cancel_event=None, stats=None):
+    """
+    Yields the model's reply to prompt chunk by chunk. Setting cancel_event
+    (a threading.Event) stops generation at the next chunk boundary.
+    """
+    model = model or ai_logic.model
+    stats = stats if stats is not None else StreamStats()
+    yield from _stream_chunks(model.generate_content(prompt, stream=True), cancel_event, stats)
+
+
+def _stream_chunks(response, cancel_event, stats):
+    try:
+        for chunk in response:
+            if cancel_event is not None and cancel_event.is_set():
+                stats.cancelled = True
+                break
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if stats.first_token_s is None:
+                stats.first_token_s = time.perf_counter() - stats.started_at
+            stats.tokens += estimate_tokens(text)
+            yield text
+    finally:
+        stats.total_s = time.perf_counter() - stats.started_at
+
+
+# -----------------------------
+# CONVERSATIONS
+# -----------------------------
+DEFAULT_CONTEXT_TOKENS = 1500
+DEFAULT_RECENT_TURNS = 6
+DEFAULT_SUMMARY_TOKENS = 250
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def pantry_preamble(usuals, low_items):
+    """System-style context describing the user's pantry."""
+    lines = ["You are Pantry AI, a friendly cooking and grocery assistant."]
+    stocked = [f"{category}: {', '.join(items)}" for category, items in (usuals or {}).items() if items]
+    if stocked:
+        lines.append("The user usually keeps: " + "; ".join(stocked) + ".")
+    if low_items:
+        lines.append("They are running low on: " + ", ".join(low_items) + ". Don't build recipes around those.")
+    lines.append("Keep answers short and practical.")
+    return " ".join(lines)
+
+
+def _first_sentence(text, limit=120):
+    sentence = _SENTENCE_END.split(text.strip(), 1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit].rstrip() + "…"
+
+
+def summarize_turn(user_text, reply_text):
+    """Default local summarizer: one short line per folded turn."""
+    return f"User asked: {_first_sentence(user_text)} You replied: {_first_sentence(reply_text)}"
+
+
+class ConversationManager:
+    """
+    Bounded-context chat on top of model.start_chat.
+
+    Each turn starts a chat whose history is the preamble (plus the rolling
+    summary), then the most recent turns. Turns beyond max_recent_turns, or
+    beyond token_budget, are folded into the summary, which is itself capped
+    at summary_tokens by dropping its oldest lines. prompt_tokens records the
+    estimated prompt size of every turn sent.
+    """
+
+    def __init__(self, preamble="", token_budget=DEFAULT_CONTEXT_TOKENS, max_recent_turns=DEFAULT_RECENT_TURNS,
+                 summary_tokens=DEFAULT_SUMMARY_TOKENS, summarizer=summarize_turn, model=None):
+        self.preamble = preamble
+        self.token_budget = token_budget
+        self.max_recent_turns = max_recent_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.model = model
+        self.turns = []
+        self.summary_lines = []
+        self.prompt_tokens = []
+
+    def set_preamble(self, preamble):
+        self.preamble = preamble
+
+    def _fold_oldest_turn(self):
+        self.summary_lines.append(self.summarizer(*self.turns.pop(0)))
+        while len(self.summary_lines) > 1 and estimate_tokens("\n".join(self.summary_lines)) > self.summary_tokens:
+            self.summary_lines.pop(0)
+
+    def _context(self):
+        context = self.preamble
+        if self.summary_lines:
+            context += "\n\nEarlier in this conversation:\n" + "\n".join(self.summary_lines)
+        return context
+
+    def _history(self):
+        history = [
+            {"role": "user", "parts": [self._context()]},
+            {"role": "model", "parts": ["Got it. How can I help?"]},
+        ]
+        for user_text, reply_text in self.turns:
+            history.append({"role": "user", "parts": [user_text]})
+            history.append({"role": "model", "parts": [reply_text]})
+        return history
+
+    def _history_tokens(self):
+        return sum(estimate_tokens(part) for entry in self._history() for part in entry["parts"])
+
+    def build(self, user_text):
+        """History to send with user_text, trimmed to budget, and its token estimate."""
+        while len(self.turns) > self.max_recent_turns:
+            self._fold_oldest_turn()
+        message_tokens = estimate_tokens(user_text)
+        while self.turns and self._history_tokens() + message_tokens > self.token_budget:
+            self._fold_oldest_turn()
+        history = self._history()
+        return history, self._history_tokens() + message_tokens
+
+    def stream(self, user_text, cancel_event=None, stats=None):
+        """
+        Yields the reply chunk by chunk, like stream_reply. The turn is added
+        to the conversation once the reply finishes or is cancelled.
+        """
+        model = self.model or ai_logic.model
+        stats = stats if stats is not None else StreamStats()
+        history, tokens = self.build(user_text)
+        self.prompt_tokens.append(tokens)
+
+        chat = model.start_chat(history=history)
+        reply = []
+        try:
+            for text in _stream_chunks(chat.send_message(user_text, stream=True), cancel_event, stats):
+                reply.append(text)
+                yield text
+        finally:
+            if reply:
+                self.turns.append((user_text, "".join(reply)))
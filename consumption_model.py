@@ -0,0 +1,127 @@
+"""
+Local pantry consumption model.
+
+Every usual item has a "pack life": how many days the amount people usually
+buy lasts a single person. Bigger households go through food faster but also
+buy bigger packs, so a pack lasts pack_life / household_size ** HOUSEHOLD_EXPONENT
+days. Counting from the item's last purchase (or the last grocery trip) that
+gives a projected depletion date, and anything that runs out before the next
+planned trip is low.
+
+Items with enough logged history (see event_log.py) use what was learned
+instead: once an item has been rebought, its projected depletion comes from
+the observed consumption rate, and "Cook This" consumption pulls the date
+forward either way.
+
+Every item is used up at a constant daily rate, so its depletion day is a
+closed-form division rather than a day-by-day simulation. Everything is
+computed for all items at once with NumPy, so a prediction takes well under a
+millisecond and is the same on every rerun.
+"""
+import datetime
+
+import numpy as np
+
+from data_engine import purchase_history as stored_purchase_history
+from item_registry import ITEMS
+
+# Days a typical purchase lasts one person
+PACK_LIFE_DAYS = {
+    "Whole Milk": 8, "Oat Milk": 10, "Almond Milk": 10, "Greek Yogurt": 6,
+    "Butter": 30, "Cheddar Cheese": 14,
+    "Eggs": 7, "Chicken Breast": 5, "Ground Beef": 5, "Salmon": 4, "Tofu": 6,
+    "Apples": 7, "Bananas": 5, "Spinach": 5, "Tomatoes": 6, "Onions": 14,
+    "Rice": 45, "Pasta": 30, "Olive Oil": 60, "Cereal": 14, "Peanut Butter": 30,
+    "Frozen Vegetables": 21, "Frozen Pizza": 10, "Ice Cream": 14,
+}
+CATEGORY_PACK_LIFE_DAYS = {
+    "Dairy": 8, "Protein": 5, "Produce": 6, "Pantry": 30, "Frozen": 14,
+}
+DEFAULT_PACK_LIFE_DAYS = 14
+HOUSEHOLD_EXPONENT = 0.7
+
+# Keyed by item ID (item_registry.py), so any spelling of an item finds its pack life
+_PACK_LIFE_BY_ID = {ITEMS.register(item): days for item, days in PACK_LIFE_DAYS.items()}
+
+
+def _pack_life(item_id, category):
+    return _PACK_LIFE_BY_ID.get(item_id, CATEGORY_PACK_LIFE_DAYS.get(category, DEFAULT_PACK_LIFE_DAYS))
+
+
+def next_trip_date(last_trip, grocery_freq, today=None):
+    """Next planned trip: last trip plus the usual gap, but never in the past."""
+    today = today or datetime.date.today()
+    if not last_trip:
+        return today
+    planned = last_trip + datetime.timedelta(days=max(1, round(7 / grocery_freq)))
+    return max(planned, today)
+
+
+def project_depletion(usual_items, household_size, last_trip, today=None, purchase_history=None, aggregates=None):
+    """
+    Columns for every usual item: days since it was bought, how many days a
+    purchase lasts this household, days of stock left (negative once it has
+    run out) and the projected depletion date. purchase_history defaults to
+    the default household's history in the pantry store; aggregates is an
+    optional {item: ItemAggregate} from the event log. Both are matched to
+    the usual items by item ID.
+    """
+    today = today or datetime.date.today()
+    purchase_history = stored_purchase_history() if purchase_history is None else purchase_history
+    bought = ITEMS.keyed(purchase_history)
+    aggregates = ITEMS.keyed(aggregates, key=lambda agg: agg.last_purchase or 0) if aggregates else {}
+    pairs = [(item, category) for category, items in usual_items.items() for item in items]
+    items = [item for item, _ in pairs]
+    item_ids = [ITEMS.id_of(item) for item in items]
+
+    pack_life = np.array([_pack_life(item_id, category) for item_id, (_, category) in zip(item_ids, pairs)],
+                         dtype=float)
+    today_ordinal = today.toordinal()
+    bought_on = np.array([bought[item_id].toordinal() if item_id in bought else np.nan for item_id in item_ids],
+                         dtype=float)
+    default_days = (today - last_trip).days if last_trip else 0
+    days_since = np.where(np.isnan(bought_on), default_days, today_ordinal - bought_on)
+
+    lasts_days = pack_life / max(household_size, 1) ** HOUSEHOLD_EXPONENT
+    remaining_days = lasts_days - days_since
+
+    # Event-log state, one column per field, for the items that have it
+    learned = [(row, aggregates[item_id]) for row, item_id in enumerate(item_ids)
+               if item_id in aggregates and aggregates[item_id].last_quantity]
+    if learned:
+        rows = np.array([row for row, _ in learned], dtype=np.intp)
+        stock, last_quantity, rate, last_event = np.array(
+            [(agg.stock, agg.last_quantity, agg.rate or 0.0, agg.last_event or 0) for _, agg in learned], dtype=float
+        ).T
+        observed = rate > 0
+        # Rebought items use the observed rate (as ItemAggregate.remaining_days); items
+        # only bought once use the pack-life model, minus what was used up
+        by_rate = last_event + np.floor(stock / np.where(observed, rate, 1.0)) - today_ordinal
+        by_pack_life = lasts_days[rows] * stock / last_quantity - days_since[rows]
+        remaining_days[rows] = np.where(observed, by_rate, by_pack_life)
+
+    depletion = np.datetime64(today, "D") + np.floor(remaining_days).astype("timedelta64[D]")
+    return {
+        "items": items,
+        "days_since": days_since,
+        "lasts_days": lasts_days,
+        "remaining_days": remaining_days,
+        "depletion_dates": depletion.tolist(),
+    }
+
+
+def predict_low_items(usual_items, household_size, grocery_freq, last_trip, today=None, purchase_history=None,
+                      aggregates=None):
+    """
+    Items projected to run out before the next planned trip, soonest first,
+    with the full projection for callers that want the dates.
+    """
+    today = today or datetime.date.today()
+    projection = project_depletion(usual_items, household_size, last_trip, today, purchase_history, aggregates)
+    horizon = (next_trip_date(last_trip, grocery_freq, today) - today).days
+
+    remaining = projection["remaining_days"]
+    low = np.nonzero(remaining <= horizon)[0]
+    # Stable sort so equally urgent items keep pantry order
+    low = low[np.argsort(remaining[low], kind="stable")]
+    return [projection["items"][i] for i in low], projection
@@ -1,7 +1,16 @@
+import bisect
 import datetime
+import os
+import threading
+from functools import lru_cache
+
+from item_registry import ITEMS, normalize
+from tracing import current_span, traced
 
 # --- NEW: PURCHASE HISTORY DATA ---
-# Tracks when items were last bought to identify waste risk
+# Tracks when items were last bought to identify waste risk. Real history
+# lives in the pantry store (pantry_store.py); this demo history seeds any
+# household that hasn't recorded purchases yet.
 MOCK_PURCHASE_HISTORY = {
     "Onions": datetime.date.today() - datetime.timedelta(days=21),  # 3 weeks old
     "Tomatoes": datetime.date.today() - datetime.timedelta(days=10),
@@ -50,48 +59,578 @@ LIVE_STORE_DATA = {
     }
 }
 
+# --- ITEM IDENTITY ---
+# Catalog and history spellings are the canonical item names (see
+# item_registry.py); these are other names the same items go by.
+ITEM_ALIASES = {
+    "Whole Milk": ("milk",),
+    "Oat Milk": ("oatmilk",),
+    "Cheddar Cheese": ("cheddar",),
+    "Greek Yogurt": ("yogurt", "greek yoghurt", "yoghurt"),
+    "Eggs": ("large eggs",),
+    "Chicken Breast": ("boneless chicken breast", "skinless chicken breast"),
+    "Ground Beef": ("minced beef", "beef mince"),
+    "Olive Oil": ("extra virgin olive oil", "evoo"),
+    "Frozen Vegetables": ("frozen veggies", "mixed frozen vegetables"),
+    "Orange Juice": ("oj",),
+}
+
+def _register_items():
+    for inventory in LIVE_STORE_DATA.values():
+        ITEMS.register_all(inventory)
+    ITEMS.register_all(MOCK_PURCHASE_HISTORY)
+    for name, aliases in ITEM_ALIASES.items():
+        ITEMS.register(name, aliases)
+
+_register_items()
+
+DEFAULT_HOUSEHOLD = "default"
+
+# --- PURCHASE HISTORY STORE ---
+# Every purchase and consumption is written to the pantry store
+# (pantry_store.py) in one transaction; it answers queries like "bought more
+# than N days ago" and is the record of what happened. The append-only event
+# log (event_log.py), whose per-item aggregates answer age, consumption rate
+# and depletion lookups in O(1), is derived from it: before it is used it
+# replays whatever store events it hasn't seen, so a crash between the two
+# writes only delays the log. Items are stored under their canonical names,
+# so every spelling finds the same history.
+# The demo history is only ever written for DEFAULT_HOUSEHOLD, or for every
+# new household when PANTRY_DEMO_HISTORY is set; real households start empty.
+# SEED_DEMO_HISTORY turns seeding off altogether (batch workers, whose parent
+# seeds before forking).
+DEMO_HISTORY = bool(os.getenv("PANTRY_DEMO_HISTORY"))
+SEED_DEMO_HISTORY = True
+_seeded = set()
+_seed_lock = threading.Lock()
+
+# Share of a usual purchase that one cooked recipe is assumed to use
+COOK_USE_FRACTION = 0.25
+
+@traced()
+def record_events(household_id, events):
+    """Writes (item, kind, quantity, date) events, kind "purchase" or "consume", in one batch."""
+    # sqlite3 and the log are only loaded once history is actually needed
+    from pantry_store import get_pantry_store
+
+    rows = [(household_id, ITEMS.canonical(item, register=True), kind, quantity, day or datetime.date.today())
+            for item, kind, quantity, day in events]
+    store = get_pantry_store()
+    written = store.record_events(rows)
+    _event_log(store)
+    return written
+
+def _event_log(store):
+    """The event log, caught up with the store's events (log record N is store event N)."""
+    from event_log import get_event_log
+
+    log = get_event_log()
+    log.sync(store.events_after)
+    return log
+
+def _history_store(household_id):
+    """The pantry store, with the demo history seeded for the demo household if it has none."""
+    from pantry_store import get_pantry_store
+
+    store = get_pantry_store()
+    if household_id not in _seeded:
+        with _seed_lock:
+            if household_id not in _seeded:
+                if (SEED_DEMO_HISTORY and (household_id == DEFAULT_HOUSEHOLD or DEMO_HISTORY)
+                        and not store.has_history(household_id)):
+                    record_events(household_id,
+                                  [(item, "purchase", 1, day) for item, day in MOCK_PURCHASE_HISTORY.items()])
+                _seeded.add(household_id)
+    return store
+
+def seed_demo_history(household_ids):
+    """Writes the demo history now for those of household_ids that get it (see _history_store)."""
+    for household_id in household_ids:
+        _history_store(household_id)
+
+@traced()
+def purchase_history(household_id=DEFAULT_HOUSEHOLD):
+    """{item: date last bought} for a household, oldest first."""
+    return _history_store(household_id).last_purchases(household_id)
+
+@traced()
+def item_aggregates(household_id=DEFAULT_HOUSEHOLD):
+    """{item: event_log.ItemAggregate} with last purchase, consumption rate and projected depletion."""
+    return _event_log(_history_store(household_id)).aggregates(household_id)
+
+def record_purchases(household_id, items, day=None):
+    """Marks items as bought (today by default) in one batched write."""
+    return record_events(household_id, [(item, "purchase", 1, day) for item in items])
+
+def record_consumption(household_id, items, day=None, quantity=COOK_USE_FRACTION):
+    """Marks items as partly used up, e.g. by a cooked recipe."""
+    return record_events(household_id, [(item, "consume", quantity, day) for item in items])
+
 # --- NEW: FRESHNESS CALCULATOR ---
-def get_item_age(item_name):
+@traced()
+def get_item_age(item_name, household_id=DEFAULT_HOUSEHOLD):
     """Returns the number of days since an item was last purchased."""
-    purchase_date = MOCK_PURCHASE_HISTORY.get(item_name.capitalize())
+    item_id = ITEMS.id_of(item_name)
+    if item_id is None:
+        return 0 # Unknown item (counted as a registry miss): assume fresh
+    item = ITEMS.name_of(item_id)
+    store = _history_store(household_id)
+    aggregate = _event_log(store).aggregate(household_id, item)
+    if aggregate is not None:
+        purchase_date = aggregate.last_purchase_date
+    else:
+        # The log holds events the store lacks (it was started against another store)
+        purchase_date = store.last_purchase(household_id, item)
     if purchase_date:
         return (datetime.date.today() - purchase_date).days
     return 0 # Assume fresh if not in history
 
+@traced()
+def item_ages(items, household_id=DEFAULT_HOUSEHOLD, today=None):
+    """{item: days since bought} for those of items with purchase history, matched by item ID."""
+    bought = ITEMS.keyed(purchase_history(household_id))
+    today = today or datetime.date.today()
+    ages = {}
+    for item in items:
+        day = bought.get(ITEMS.id_of(item))
+        if day is not None:
+            ages[item] = (today - day).days
+    return ages
+
+# --- DASHBOARD VIEW MODELS ---
+# Every widget click on the dashboard reruns the script, so what it displays
+# is computed by these pure functions and memoized on their inputs. Purchase
+# history is passed in as a snapshot of its items: changing the history
+# changes the key, which is all the invalidation needed.
+WASTE_RISK_DAYS = 10
+
+def _history_snapshot(history):
+    history = purchase_history() if history is None else history
+    return tuple(history.items())
+
+@lru_cache(maxsize=32)
+def _freshness_rows(snapshot, today):
+    rows = []
+    for item, buy_date in snapshot:
+        days_old = (today - buy_date).days
+        rows.append({
+            "item": item,
+            "days_old": days_old,
+            # Visual bar: Red for old, Green for fresh
+            "progress": min(days_old / 21, 1.0),
+            "color": "red" if days_old > 14 else "orange" if days_old > 7 else "green",
+        })
+    return tuple(rows)
+
+@traced()
+def freshness_view(history=None, today=None):
+    """Freshness bar data for every item in the purchase history, in history order."""
+    return _freshness_rows(_history_snapshot(history), today or datetime.date.today())
+
+@traced()
+def waste_risk_items(household_id=DEFAULT_HOUSEHOLD, today=None, threshold_days=WASTE_RISK_DAYS):
+    """Items bought more than threshold_days ago, oldest first (an index range scan, not a history walk)."""
+    store = _history_store(household_id)
+    return tuple(item for item, _ in store.items_older_than(household_id, threshold_days, today))
+
+@lru_cache(maxsize=32)
+def _cards(entries, catalog_version, known_items):
+    # The versions are only part of the key: cards built before a feed update
+    # (or before an item was registered) would show its old name and key
+    cards = []
+    seen = set()
+    for item, store, reason, price in entries:
+        # The model may list one item twice under different spellings; names
+        # it makes up aren't registered, so they're told apart by spelling
+        item_id = ITEMS.id_of(item)
+        key = str(item_id) if item_id is not None else f"name:{normalize(item)}"
+        if key in seen:
+            continue
+        seen.add(key)
+        cards.append({"item": item if item_id is None else ITEMS.name_of(item_id), "item_id": item_id, "key": key,
+                      "store": store or "Walmart", "reason": reason or "Refill", "price": float(price or 0.0)})
+    return tuple(cards)
+
+@traced()
+def shopping_cards(shopping_list):
+    """Display fields for each Smart Cart item (canonical name, item ID, widget key), with the dashboard's defaults."""
+    return _cards(tuple(
+        (entry["item"], entry.get("store"), entry.get("reason"), entry.get("price"))
+        for entry in shopping_list
+    ), CATALOG.version, len(ITEMS))
+
+# --- STORE CATALOG INDEXES ---
+# Lookups used on every dashboard render go through these precomputed indexes
+# instead of walking every store's inventory.
+def _insort(entries, keys, entry, key):
+    """bisect.insort(entries, entry, key=...) where keys holds each entry's key (key= needs Python 3.10)."""
+    position = bisect.bisect_right(keys, key)
+    keys.insert(position, key)
+    entries.insert(position, entry)
+
+class StoreCatalog:
+    """
+    Indexed view of a {store: {item: data}} catalog:
+      offers:    item -> [(store, data)] sorted by price (ties in catalog order)
+      in_stock:  (category, store) -> [(item, data)] with stock > 0, catalog order
+      category:  item -> category
+    plus dense item x store `price` (NaN if not carried) and `stock` matrices
+    for batch pricing, built on first use. Row/column -1 is padding for
+    unknown items and stores.
+
+    A catalog is never modified once built: with_changes() returns a new one
+    that shares everything the change didn't touch, with `version` one higher.
+    """
+
+    def __init__(self, store_data):
+        self.store_data = store_data
+        self.version = 0
+        self.store_rank = {store: rank for rank, store in enumerate(store_data)}
+        self.offers = {}
+        self.in_stock = {}
+        self.category = {}
+
+        for store, inventory in store_data.items():
+            for item, data in inventory.items():
+                self.offers.setdefault(item, []).append((store, data))
+                self.category.setdefault(item, data["category"])
+                if data["stock"] > 0:
+                    self.in_stock.setdefault((data["category"], store), []).append((item, data))
+        for item_offers in self.offers.values():
+            item_offers.sort(key=lambda offer: offer[1]["price"])
+
+        self.stores = list(store_data)
+        self.items = list(self.offers)
+        self.item_row = {item: row for row, item in enumerate(self.items)}
+        self._price = None
+        self._stock = None
+        # store -> ({item: inventory rank}, next rank); see with_changes
+        self._positions = {}
+
+    def with_changes(self, upserts, removals=None):
+        """
+        A new catalog with {store: {item: data}} upserts applied and
+        {store: items} removed. Only the touched stores' inventories, the
+        touched items' offers and the touched (category, store) lists are
+        rebuilt; the rest is shared with this catalog.
+        """
+        removals = removals or {}
+        store_data = dict(self.store_data)
+        positions = dict(self._positions)
+        touched = {}  # item -> stores whose offer of it changed
+        changed_in = {}  # store -> items whose offer there changed
+        categories = {}  # store -> categories whose in-stock list changed
+        for store in list(upserts) + [store for store in removals if store not in upserts]:
+            inventory = dict(store_data.get(store, {}))
+            store_categories = categories.setdefault(store, set())
+            changed = changed_in.setdefault(store, set())
+            for item in removals.get(store, ()):
+                old = inventory.pop(item, None)
+                if old is not None:
+                    touched.setdefault(item, set()).add(store)
+                    changed.add(item)
+                    store_categories.add(old["category"])
+            appended = []
+            for item, data in upserts.get(store, {}).items():
+                old = inventory.get(item)
+                if old is None:
+                    appended.append(item)
+                else:
+                    store_categories.add(old["category"])
+                inventory[item] = data
+                touched.setdefault(item, set()).add(store)
+                changed.add(item)
+                store_categories.add(data["category"])
+            store_data[store] = inventory
+            if store in positions and appended:
+                # Items new to the store (or re-added) go to the end of its inventory
+                rank, next_rank = positions[store]
+                rank = dict(rank)
+                for item in appended:
+                    rank[item] = next_rank
+                    next_rank += 1
+                positions[store] = (rank, next_rank)
+
+        catalog = StoreCatalog.__new__(StoreCatalog)
+        catalog.store_data = store_data
+        catalog.version = self.version + 1
+        catalog._positions = positions
+        catalog.store_rank = self.store_rank
+        catalog.stores = self.stores
+        new_stores = [store for store in store_data if store not in self.store_rank]
+        if new_stores:
+            catalog.stores = self.stores + new_stores
+            catalog.store_rank = {store: rank for rank, store in enumerate(catalog.stores)}
+        store_rank = catalog.store_rank
+
+        catalog.offers = dict(self.offers)
+        catalog.category = dict(self.category)
+        catalog.items = self.items
+        catalog.item_row = self.item_row
+        new_items = sorted(item for item in touched if item not in self.item_row)
+        if new_items:
+            catalog.items = self.items + new_items
+            catalog.item_row = dict(self.item_row)
+            for item in new_items:
+                catalog.item_row[item] = len(catalog.item_row)
+        offer_key = lambda offer: (offer[1]["price"], store_rank[offer[0]])
+        for item, stores in touched.items():
+            item_offers = [offer for offer in self.offers.get(item, ()) if offer[0] not in stores]
+            keys = [offer_key(offer) for offer in item_offers]
+            for store in stores:
+                data = store_data[store].get(item)
+                if data is not None:
+                    _insort(item_offers, keys, (store, data), offer_key((store, data)))
+            if item_offers:
+                catalog.offers[item] = item_offers
+                # As in a full build: the category of the first store carrying the item
+                catalog.category[item] = min(item_offers, key=lambda offer: store_rank[offer[0]])[1]["category"]
+            else:
+                catalog.offers.pop(item, None)
+                catalog.category.pop(item, None)
+
+        catalog.in_stock = dict(self.in_stock)
+        restocked = {}  # (category, store) -> touched items now in stock there
+        for item, stores in touched.items():
+            for store in stores:
+                data = store_data[store].get(item)
+                if data is not None and data["stock"] > 0:
+                    restocked.setdefault((data["category"], store), []).append((item, data))
+        for store, store_categories in categories.items():
+            # Patch the old lists rather than rescan the inventory: drop the
+            # touched items, then put the in-stock ones back in inventory order
+            rank = catalog._item_positions(store)
+            changed = changed_in[store]
+            for category in store_categories:
+                key = (category, store)
+                available = [entry for entry in self.in_stock.get(key, ()) if entry[0] not in changed]
+                keys = [rank[entry[0]] for entry in available]
+                for entry in restocked.get(key, ()):
+                    _insort(available, keys, entry, rank[entry[0]])
+                if available:
+                    catalog.in_stock[key] = available
+                else:
+                    catalog.in_stock.pop(key, None)
+
+        catalog._price = catalog._stock = None
+        if self._price is not None and not new_items and not new_stores:
+            # Same shape: patch the changed cells of a copy instead of rebuilding
+            price, stock = self._price.copy(), self._stock.copy()
+            for item, stores in touched.items():
+                row = catalog.item_row[item]
+                for store in stores:
+                    data = store_data[store].get(item)
+                    col = store_rank[store]
+                    price[row, col] = data["price"] if data else float("nan")
+                    stock[row, col] = data["stock"] if data else 0
+            catalog._price, catalog._stock = price, stock
+        return catalog
+
+    def _item_positions(self, store):
+        """{item: rank} giving the store's inventory order, built on first use."""
+        if store not in self._positions:
+            self._positions[store] = (
+                {item: rank for rank, item in enumerate(self.store_data[store])}, len(self.store_data[store]))
+        return self._positions[store][0]
+
+    def _build_matrices(self):
+        # NumPy is only imported once batch pricing is actually used
+        import numpy as np
+
+        price = np.full((len(self.items) + 1, len(self.stores) + 1), np.nan)
+        stock = np.zeros((len(self.items) + 1, len(self.stores) + 1), dtype=np.int64)
+        for item, item_offers in self.offers.items():
+            for store, data in item_offers:
+                price[self.item_row[item], self.store_rank[store]] = data["price"]
+                stock[self.item_row[item], self.store_rank[store]] = data["stock"]
+        self._price, self._stock = price, stock
+
+    @property
+    def price(self):
+        if self._price is None:
+            self._build_matrices()
+        return self._price
+
+    @property
+    def stock(self):
+        if self._stock is None:
+            self._build_matrices()
+        return self._stock
+
+    def matrix(self, items, stores):
+        """(price, stock) sub-matrices for items x stores, in the given order."""
+        import numpy as np
+
+        rows = np.array([self.item_row.get(item, -1) for item in items], dtype=np.intp)
+        cols = np.array([self.store_rank.get(store, -1) for store in stores], dtype=np.intp)
+        grid = np.ix_(rows, cols)
+        return self.price[grid], self.stock[grid]
+
+    def offer(self, store, item):
+        return self.store_data.get(store, {}).get(item)
+
+    def cheapest(self, item, stores):
+        """Lowest-priced in-stock (store, data) among stores; ties go to the store listed first."""
+        stores = stores if isinstance(stores, (list, tuple)) else list(stores)
+        best = None
+        for store, data in self.offers.get(item, ()):
+            if data["stock"] <= 0 or store not in stores:
+                continue
+            if best is None:
+                best = (store, data)
+            elif data["price"] > best[1]["price"]:
+                break
+            elif stores.index(store) < stores.index(best[0]):
+                best = (store, data)
+        return best
+
+    def alternative(self, item, excluded_stores):
+        """First store in catalog order, outside excluded_stores, with item in stock."""
+        best = None
+        for store, data in self.offers.get(item, ()):
+            if data["stock"] > 0 and store not in excluded_stores:
+                if best is None or self.store_rank[store] < self.store_rank[best[0]]:
+                    best = (store, data)
+        return best
+
+    def substitute(self, item, stores):
+        """First in-stock (item, store, data) in the same category across stores, in order."""
+        if not any(store in stores for store, _ in self.offers.get(item, ())):
+            return None
+        category = self.category[item]
+        for store in stores:
+            available = self.in_stock.get((category, store))
+            if available:
+                alt_item, data = available[0]
+                return alt_item, store, data
+        return None
+
+
+CATALOG = StoreCatalog(LIVE_STORE_DATA)
+
+# --- LIVE CATALOG UPDATES ---
+# Store feeds (store_feed.py) replace CATALOG with an updated copy in a single
+# assignment. Readers take no lock: each lookup reads CATALOG once and sees
+# either the old catalog or the new one, never a half-applied update.
+_catalog_lock = threading.Lock()
+
+@traced()
+def apply_catalog_changes(upserts, removals=None, expected_version=None):
+    """
+    Publishes CATALOG.with_changes(upserts, removals) as the live catalog and
+    returns it. With expected_version (the version the changes were computed
+    against), nothing is changed and None is returned if CATALOG has moved on.
+    """
+    global CATALOG, LIVE_STORE_DATA
+    with _catalog_lock:
+        if expected_version is not None and CATALOG.version != expected_version:
+            return None
+        catalog = CATALOG.with_changes(upserts, removals)
+        LIVE_STORE_DATA = catalog.store_data
+        CATALOG = catalog
+    return catalog
+
+def _catalog_item(catalog, item):
+    """item as the catalog spells it: unchanged if listed, otherwise its canonical name."""
+    return item if item in catalog.category else ITEMS.canonical(item)
+
+@traced()
 def get_live_details(item, store_list):
+    catalog = CATALOG
+    item = _catalog_item(catalog, item)
     return {
-        store: LIVE_STORE_DATA.get(store, {}).get(item, {
+        store: catalog.offer(store, item) or {
             "brand": None, "category": None, "stock": 0, "price": None
-        }) for store in store_list
+        } for store in store_list
     }
 
+@traced()
 def find_cheapest_store(item, store_list):
-    cheapest = None
-    for store in store_list:
-        data = LIVE_STORE_DATA.get(store, {}).get(item)
-        if data and data["stock"] > 0:
-            if not cheapest or data["price"] < cheapest["price"]:
-                cheapest = {"store": store, **data}
-    return cheapest
-
-def find_best_alternative(item, preferred_stores):
-    for store, inventory in LIVE_STORE_DATA.items():
-        if store not in preferred_stores:
-            data = inventory.get(item)
-            if data and data["stock"] > 0:
-                return {"store": store, **data}
-    return None
-
-def find_category_substitute(item, preferred_stores):
-    category = None
-    for store in preferred_stores:
-        data = LIVE_STORE_DATA.get(store, {}).get(item)
-        if data:
-            category = data["category"]
-            break
-    if not category: return None
-    for store in preferred_stores:
-        for alt_item, data in LIVE_STORE_DATA.get(store, {}).items():
-            if data["category"] == category and data["stock"] > 0:
-                return {"item": alt_item, "store": store, **data}
-    return None
\ No newline at end of file
+    catalog = CATALOG
+    found = catalog.cheapest(_catalog_item(catalog, item), store_list)
+    if not found: return None
+    store, data = found
+    return {"store": store, **data}
+
+@traced()
+def find_best_alternative(item, preferred_stores, catalog=None):
+    catalog = catalog or CATALOG
+    found = catalog.alternative(_catalog_item(catalog, item), preferred_stores)
+    if not found: return None
+    store, data = found
+    return {"store": store, **data}
+
+@traced()
+def find_category_substitute(item, preferred_stores, catalog=None):
+    catalog = catalog or CATALOG
+    found = catalog.substitute(_catalog_item(catalog, item), preferred_stores)
+    if not found: return None
+    alt_item, store, data = found
+    return {"item": alt_item, "store": store, **data}
+
+# --- BATCH PRICING ---
+@traced()
+def price_basket(items, store_list):
+    """
+    Prices a whole shopping list against store_list in one vectorized pass.
+    Returns columns aligned with `items` (price/stock are items x stores
+    arrays) plus per-store basket totals and a single-store vs split-basket
+    comparison. Per-item entries match find_cheapest_store,
+    find_best_alternative and find_category_substitute.
+    """
+    import numpy as np
+
+    items = list(items)
+    stores = list(store_list)
+    current_span().set(items=len(items), stores=len(stores))
+    # One snapshot for the whole basket, even if a feed update lands meanwhile
+    catalog = CATALOG
+    listed = [_catalog_item(catalog, item) for item in items]
+    price, stock = catalog.matrix(listed, stores)
+
+    available = (stock > 0) & ~np.isnan(price)
+    offer_price = np.where(available, price, np.inf)
+    has_offer = available.any(axis=1)
+    # argmin returns the first minimum, so ties go to the store listed first
+    best_col = offer_price.argmin(axis=1) if stores else np.zeros(len(items), dtype=np.intp)
+    cheapest_price = np.where(has_offer, offer_price.min(axis=1) if stores else np.inf, np.nan)
+
+    cheapest = []
+    for item, col, found in zip(listed, best_col, has_offer):
+        if found:
+            store = stores[col]
+            cheapest.append({"store": store, **catalog.offer(store, item)})
+        else:
+            cheapest.append(None)
+
+    store_totals = np.where(available, price, 0.0).sum(axis=0)
+    store_missing = (~available).sum(axis=0)
+    split_total = float(np.nansum(cheapest_price))
+    split_missing = int((~has_offer).sum())
+
+    single_store = None
+    if stores:
+        # Fewest missing items first, then the cheapest basket
+        best = min(range(len(stores)), key=lambda s: (store_missing[s], store_totals[s], s))
+        single_store = {
+            "store": stores[best],
+            "total": float(store_totals[best]),
+            "missing": int(store_missing[best]),
+        }
+
+    return {
+        "items": items,
+        "stores": stores,
+        "price": price,
+        "stock": stock,
+        "cheapest_price": cheapest_price,
+        "cheapest": cheapest,
+        "alternatives": [find_best_alternative(item, stores, catalog) for item in listed],
+        "substitutes": [find_category_substitute(item, stores, catalog) for item in listed],
+        "store_totals": dict(zip(stores, store_totals.tolist())),
+        "store_missing": dict(zip(stores, store_missing.tolist())),
+        "split": {"total": split_total, "missing": split_missing},
+        "single_store": single_store,
+        "split_savings": (single_store["total"] - split_total)
+            if single_store and single_store["missing"] == split_missing else None,
+    }
@@ -0,0 +1,357 @@
+"""
+Append-only pantry event log with materialized per-item aggregates.
+
+Every purchase and consumption ("Cook This") is one fixed-width 20-byte
+record:
+
+    day ordinal  u32 | household id  u32 | item id  u32 | kind  u8 | pad 3 | quantity  f32
+
+Household and item names are interned to ids in a sidecar `<log>.names`
+file (one JSON string per line, id = line number), written before any
+record that refers to them.
+
+Each (household, item) pair keeps an ItemAggregate that is updated in place
+as events arrive, so last purchase, consumption rate and projected depletion
+are O(1) lookups and never recomputed from full history. checkpoint()
+pickles the aggregates with the log offset they cover (every
+CHECKPOINT_EVERY appends and at exit); opening the log loads the checkpoint
+and replays only the records after it.
+
+Several processes may share one log (the dashboard and batch workers).
+Appends take an exclusive flock on the log file and first read whatever
+names and records other processes added since, so name ids stay in step
+across processes and no record is written twice. (Without fcntl, on
+Windows, only one process may append.)
+
+Pick the file with PANTRY_EVENT_LOG (default pantry.events, ":memory:" to
+keep events in memory only).
+"""
+import atexit
+import contextlib
+import datetime
+import json
+import os
+import pickle
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_LOG_PATH = "pantry.events"
+
+RECORD = struct.Struct("<IIIB3xf")
+PURCHASE = 1
+CONSUME = 2
+KIND_CODES = {"purchase": PURCHASE, "consume": CONSUME}
+
+# Appended events between automatic checkpoints
+CHECKPOINT_EVERY = 100_000
+
+# Weight of the newest purchase gap in the rolling consumption rate
+RATE_SMOOTHING = 0.3
+
+
+class ItemAggregate:
+    """
+    Running state for one item in one household. `rate` is units used per
+    day, an exponentially weighted average over purchase gaps (assuming an
+    item is rebought when it runs out); `stock` is the estimated units left
+    as of `last_event`.
+    """
+    __slots__ = ("last_purchase", "last_quantity", "purchases", "consumed", "rate", "stock", "last_event")
+
+    def __init__(self):
+        self.last_purchase = None
+        self.last_quantity = 0.0
+        self.purchases = 0
+        self.consumed = 0.0
+        self.rate = None
+        self.stock = 0.0
+        self.last_event = None
+
+    def state(self):
+        return (self.last_purchase, self.last_quantity, self.purchases, self.consumed,
+                self.rate, self.stock, self.last_event)
+
+    @classmethod
+    def from_state(cls, state):
+        agg = cls.__new__(cls)
+        (agg.last_purchase, agg.last_quantity, agg.purchases, agg.consumed,
+         agg.rate, agg.stock, agg.last_event) = state
+        return agg
+
+    def apply(self, day, kind, quantity):
+        if kind == PURCHASE and self.last_purchase is not None and day > self.last_purchase:
+            observed = self.last_quantity / (day - self.last_purchase)
+            self.rate = observed if self.rate is None else (
+                RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * self.rate)
+        # Backdated events (older than last_event) don't decay the stock
+        if self.last_event is not None and self.rate and day > self.last_event:
+            self.stock = max(0.0, self.stock - self.rate * (day - self.last_event))
+        if kind == PURCHASE:
+            self.stock += quantity
+            # The last purchase only moves forward, as in pantry_store
+            if self.last_purchase is None or day >= self.last_purchase:
+                self.last_purchase = day
+                self.last_quantity = quantity
+            self.purchases += 1
+        elif kind == CONSUME:
+            self.stock = max(0.0, self.stock - quantity)
+            self.consumed += quantity
+        if self.last_event is None or day > self.last_event:
+            self.last_event = day
+
+    @property
+    def last_purchase_date(self):
+        return datetime.date.fromordinal(self.last_purchase) if self.last_purchase else None
+
+    @property
+    def depletion_date(self):
+        """Projected run-out date, or None until a consumption rate has been observed."""
+        if not self.rate:
+            return None
+        return datetime.date.fromordinal(self.last_event + int(self.stock / self.rate))
+
+    def remaining_days(self, today=None):
+        depletion = self.depletion_date
+        if depletion is None:
+            return None
+        return (depletion - (today or datetime.date.today())).days
+
+
+class EventLog:
+    """Thread-safe appender and aggregate view over one log file (or memory)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._names = []
+        self._ids = {}
+        # household id -> {item id: ItemAggregate}
+        self._aggregates = {}
+        self.events = 0
+        self._checkpointed = 0
+        self._file = None
+        self._names_file = None
+        # Bytes of the names file read so far
+        self._names_size = 0
+        if path:
+            self._open()
+
+    # --- FILES ---
+    def _open(self):
+        self._names_file = open(f"{self.path}.names", "ab")
+        self._file = open(self.path, "ab")
+        with self._file_lock():
+            # No other writer is mid-append, so a crash left any half name or
+            # half record at the end; drop it
+            names_size = os.fstat(self._names_file.fileno()).st_size
+            self._read_names()
+            if self._names_size != names_size:
+                self._names_file.truncate(self._names_size)
+            size = os.fstat(self._file.fileno()).st_size
+            whole = size - size % RECORD.size
+            if whole != size:
+                self._file.truncate(whole)
+            offset = self._load_checkpoint(whole)
+            self._read_records(offset, whole)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Excludes other processes appending to the same log."""
+        if self._file is None or fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _read_names(self):
+        """Interns the complete names added to the names file since the last read."""
+        with open(f"{self.path}.names", "rb") as f:
+            f.seek(self._names_size)
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            self._intern_loaded(json.loads(line))
+        self._names_size += len(complete)
+
+    def _read_records(self, offset, end):
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            self._replay(f, end - offset)
+
+    def _catch_up(self):
+        """Reads the names and records other processes appended (call with the file lock held)."""
+        end = os.fstat(self._file.fileno()).st_size
+        end -= end % RECORD.size
+        if os.fstat(self._names_file.fileno()).st_size != self._names_size:
+            self._read_names()
+        if end > self.events * RECORD.size:
+            self._read_records(self.events * RECORD.size, end)
+
+    def _load_checkpoint(self, log_size):
+        try:
+            with open(f"{self.path}.checkpoint", "rb") as f:
+                offset, events, rows = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return 0
+        if offset > log_size:
+            return 0
+        from_state = ItemAggregate.from_state
+        for household, items in rows:
+            self._aggregates[household] = {item: from_state(state) for item, state in items}
+        self.events = self._checkpointed = events
+        return offset
+
+    def checkpoint(self):
+        """Saves the aggregates so the next open only replays newer records."""
+        if not self.path:
+            return
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            # Plain tuples, not ItemAggregate objects: pickled and loaded in C
+            rows = [(household, [(item, agg.state()) for item, agg in per_household.items()])
+                    for household, per_household in self._aggregates.items()]
+            state = (self.events * RECORD.size, self.events, rows)
+            # Per-process name: batch workers may checkpoint the same log at exit
+            tmp = f"{self.path}.checkpoint.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, f"{self.path}.checkpoint")
+            self._checkpointed = self.events
+
+    def _replay(self, f, size, chunk_records=65536):
+        aggregates = self._aggregates
+        while size > 0:
+            chunk = f.read(min(size, RECORD.size * chunk_records))
+            if not chunk:
+                break
+            size -= len(chunk)
+            for day, household, item, kind, quantity in RECORD.iter_unpack(chunk):
+                per_household = aggregates.get(household)
+                if per_household is None:
+                    per_household = aggregates[household] = {}
+                agg = per_household.get(item)
+                if agg is None:
+                    agg = per_household[item] = ItemAggregate()
+                agg.apply(day, kind, quantity)
+            self.events += len(chunk) // RECORD.size
+
+    # --- NAMES ---
+    def _intern_loaded(self, name):
+        self._ids[name] = len(self._names)
+        self._names.append(name)
+
+    def _intern(self, name):
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            if self._names_file:
+                line = (json.dumps(name) + "\n").encode("utf-8")
+                self._names_file.write(line)
+                self._names_size += len(line)
+            self._intern_loaded(name)
+        return name_id
+
+    # --- WRITES ---
+    def append(self, events):
+        """
+        Appends (household, item, kind, quantity, date) events, where kind is
+        "purchase" or "consume", and folds each into its aggregate.
+        """
+        return self.sync(lambda count: events)
+
+    def sync(self, events_after):
+        """
+        Appends events_after(n), the events a source holds beyond the first n,
+        where n is the number of events in the log once it has read what other
+        processes appended. Keeps a log that mirrors another store in step with
+        it without writing anything twice.
+        """
+        with self._lock, self._file_lock():
+            if self._file:
+                self._catch_up()
+            records = []
+            events = events_after(self.events)
+            for household, item, kind, quantity, day in events:
+                day = day.toordinal() if isinstance(day, datetime.date) else int(day)
+                records.append((day, self._intern(household), self._intern(item), KIND_CODES[kind], float(quantity)))
+            if self._file:
+                self._names_file.flush()
+                self._file.write(b"".join(RECORD.pack(*record) for record in records))
+                self._file.flush()
+            for day, household, item, kind, quantity in records:
+                per_household = self._aggregates.setdefault(household, {})
+                agg = per_household.get(item)
+                if agg is None:
+                    agg = per_household[item] = ItemAggregate()
+                agg.apply(day, kind, quantity)
+            self.events += len(records)
+        if self.path and self.events - self._checkpointed >= CHECKPOINT_EVERY:
+            self.checkpoint()
+        return len(records)
+
+    # --- READS ---
+    def aggregate(self, household, item):
+        """The item's ItemAggregate in this household, or None if it has no events."""
+        household_id = self._ids.get(household)
+        item_id = self._ids.get(item)
+        if household_id is None or item_id is None:
+            return None
+        return self._aggregates.get(household_id, {}).get(item_id)
+
+    def aggregates(self, household):
+        """{item: ItemAggregate} for every item the household has events for."""
+        household_id = self._ids.get(household)
+        per_household = self._aggregates.get(household_id, {})
+        return {self._names[item_id]: agg for item_id, agg in list(per_household.items())}
+
+    def __len__(self):
+        return self.events
+
+    def close(self):
+        with self._lock:
+            for f in (self._file, self._names_file):
+                if f:
+                    f.close()
+
+
+_log = None
+_log_pid = None
+_log_lock = threading.Lock()
+# The process that registered the exit checkpoint
+_atexit_pid = None
+
+
+def _checkpoint_at_exit():
+    # A forked child inherits this handler, but checkpoints are left to the
+    # process that registered it
+    if _log is not None and _log_pid == _atexit_pid == os.getpid():
+        _log.checkpoint()
+
+
+def get_event_log():
+    """
+    The process-wide event log at PANTRY_EVENT_LOG, opened (and replayed) on
+    first use. A forked child (batch_runner's workers) opens its own: the
+    parent's file handles share its flock.
+    """
+    global _log, _log_pid, _atexit_pid
+    if _log is None or _log_pid != os.getpid():
+        with _log_lock:
+            if _log is None or _log_pid != os.getpid():
+                path = os.getenv("PANTRY_EVENT_LOG", DEFAULT_LOG_PATH)
+                _log = EventLog(None if path in ("", ":memory:") else path)
+                _log_pid = os.getpid()
+                if _atexit_pid is None:
+                    _atexit_pid = _log_pid
+                    atexit.register(_checkpoint_at_exit)
+    return _log
@@ -0,0 +1,127 @@
+"""
+Display-sized image variants.
+
+The images shipped with the app are print-sized (grocerybag.png is
+4267x4267) but shown a few hundred pixels wide at most. Handed a file path,
+st.image decodes and resizes the full-size original on every rerun and
+sends a re-encoded copy. Instead, each asset is resized once to the width
+it is served at, recompressed, and kept in memory for the life of the
+server process.
+
+Variants are written in the formats st.image passes through untouched:
+256-colour PNG for images with transparency, progressive JPEG otherwise.
+(st.image converts anything else, WebP included, back into a PNG on every
+rerun, so WebP would end up bigger.)
+
+Encoded variants are also saved to ASSET_CACHE_DIR, named after the source
+file's stamp, so a restart skips the resize; `python image_assets.py` builds
+them all ahead of time. Without Pillow the original bytes are served.
+"""
+import io
+import logging
+import os
+import sys
+from functools import lru_cache
+
+from recipe_corpus import file_stamp, load_cached
+
+ASSET_CACHE_DIR = ".asset_cache"
+JPEG_QUALITY = 82
+logger = logging.getLogger(__name__)
+
+# Pixel width each image is served at
+SERVED_WIDTHS = {
+    "grocerybag.png": 480,              # welcome page: ~240px column, 2x for high-DPI screens
+    "walmart.png": 50,                  # store picker logos: st.image(width=50) shrinks
+    "costco.png": 50,                   # anything wider back down to 50px
+    "target.png": 50,
+    "open_fridge_close_up.jpg": 720,
+    "closed_fridge.jpg": 720,
+}
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+
+def encode_variant(path, width):
+    """(bytes, format) of the image scaled down to at most `width` pixels wide."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.load()
+        alpha = _has_alpha(image)
+        image = image.convert("RGBA" if alpha else "RGB")
+        if image.width > width:
+            # reducing_gap downsamples by whole factors first: nearly the same result, much faster
+            image.thumbnail((width, image.height), Image.LANCZOS, reducing_gap=3.0)
+
+        out = io.BytesIO()
+        if alpha:
+            image = image.quantize(256, method=Image.Quantize.FASTOCTREE)
+            image.save(out, "PNG", optimize=True)
+            return out.getvalue(), "png"
+        image.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return out.getvalue(), "jpg"
+
+
+def _cached_variant_path(path, width):
+    mtime_ns, size = file_stamp(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(ASSET_CACHE_DIR, f"{stem}.{width}w.{mtime_ns:x}-{size:x}")
+
+
+def _build_variant(path, width):
+    cached = _cached_variant_path(path, width)
+    for fmt in ("png", "jpg"):
+        if os.path.exists(f"{cached}.{fmt}"):
+            with open(f"{cached}.{fmt}", "rb") as f:
+                return f.read()
+
+    try:
+        data, fmt = encode_variant(path, width)
+    except ImportError:
+        # No Pillow: serve the original
+        with open(path, "rb") as f:
+            return f.read()
+
+    try:
+        os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, f"{cached}.{fmt}")
+    except OSError as e:
+        logger.warning("Could not write image variant %s.%s: %s", cached, fmt, e)
+    return data
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def _loader(width):
+    # One loader per width, so load_cached keeps a separate entry for each
+    return lambda path: _build_variant(path, width)
+
+
+def get_asset(path, width=None):
+    """
+    Image bytes sized for display: `width` pixels wide, by default the
+    SERVED_WIDTHS entry for the file. Shared by every session and rebuilt
+    only if the source file changes. Unlisted files are returned as-is.
+    """
+    width = width or SERVED_WIDTHS.get(os.path.basename(path))
+    return load_cached(path, _read if width is None else _loader(width))
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    for name, width in SERVED_WIDTHS.items():
+        path = os.path.join(root, name)
+        if not os.path.exists(path):
+            continue
+        data = get_asset(path)
+        print(f"{name}: {os.path.getsize(path):,} -> {len(data):,} bytes ({width}px wide)")
@@ -0,0 +1,108 @@
+"""
+Word-boundary pantry term matching for the recipe fallback.
+
+Pantry items are matched as whole-word phrases ("olive oil", not "oil" inside
+"boil") with simple plural folding ("tomatoes" == "tomato"). All surplus and
+low-stock terms for a request are compiled into one Aho-Corasick automaton
+over word tokens, so each recipe's text is scanned once no matter how many
+pantry items there are.
+"""
+import re
+from collections import deque
+from functools import lru_cache
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def singular(token):
+    """Folds common English plurals onto their singular form."""
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lower-cased, plural-folded word tokens."""
+    return [singular(t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+class PantryMatcher:
+    """
+    Aho-Corasick automaton over word tokens for one (surplus, low) set.
+    Pattern ids below len(surplus_items) are surplus items, the rest are
+    low-stock items.
+    """
+
+    def __init__(self, surplus_items, low_items):
+        self.surplus_items = list(surplus_items)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pid, term in enumerate(self.surplus_items + list(low_items)):
+            self._add(pid, tokenize(term))
+        self._low_ids = frozenset(range(len(self.surplus_items), len(self.surplus_items) + len(low_items)))
+        self._link()
+
+    def _add(self, pid, tokens):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pid)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, tokens, found):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                found.update(out[state])
+
+    def scan(self, recipe):
+        """
+        Surplus items a recipe uses (ingredients or title), in pantry order,
+        or None if its ingredients call for a low-stock item.
+        """
+        found = set()
+        # One line at a time so a phrase can't straddle two ingredients
+        for line in recipe.ingredients:
+            self._scan(tokenize(line), found)
+        if not found.isdisjoint(self._low_ids):
+            return None
+        self._scan(tokenize(recipe.title), found)
+        return [item for pid, item in enumerate(self.surplus_items) if pid in found]
+
+
+@lru_cache(maxsize=64)
+def compile_matcher(surplus_items, low_items):
+    """Cached PantryMatcher for a (surplus, low) pair of tuples."""
+    return PantryMatcher(surplus_items, low_items)
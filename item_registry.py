@@ -0,0 +1,134 @@
+"""
+Canonical item identities.
+
+The same grocery item is spelled differently depending on where the name
+came from: "Chicken Breast" in the catalog, "chicken breasts" in a recipe,
+"Whole milk" from the model. Every spelling that normalizes to the same
+key (lower case, words only, plurals folded as in ingredient_matcher) or is
+registered as an alias maps to one small integer item ID, and the first
+spelling registered is the item's canonical name.
+
+Data is stored under canonical names (data_engine writes history and feed
+items through canonical()), and lookups resolve a name to its ID first:
+
+    item_id = ITEMS.id_of("chicken breasts")   # same ID as "Chicken Breast"
+    ITEMS.name_of(item_id)                     # "Chicken Breast"
+
+Resolution is one dict lookup for a spelling that has been seen before;
+normalizing only happens the first time. Names that resolve to nothing are
+counted, and the most frequent ones listed, in stats(), so silent misses
+show up.
+"""
+import re
+import threading
+from collections import Counter
+
+from ingredient_matcher import singular
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Distinct missed names remembered for stats(); later ones are only counted
+MAX_TRACKED_MISSES = 1000
+
+
+def normalize(name):
+    """The key spellings of one item share: lower-case words, plurals folded."""
+    return " ".join(singular(word) for word in _WORD_RE.findall(str(name).lower()))
+
+
+class ItemRegistry:
+    """Thread-safe map from item spellings and aliases to compact integer IDs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_spelling = {}  # exact spelling -> id, the fast path
+        self._by_key = {}  # normalized key -> id
+        self.names = []  # id -> canonical name
+        self.aliases = 0
+        self.misses = 0
+        self._missed = Counter()
+
+    def register(self, name, aliases=()):
+        """ID for name, adding it (with any aliases) if it's new."""
+        item_id = self._by_spelling.get(name)
+        if item_id is not None and not aliases:
+            return item_id
+        with self._lock:
+            item_id = self._add(name)
+            for alias in aliases:
+                key = normalize(alias)
+                if key and key not in self._by_key:
+                    self._by_key[key] = item_id
+                    self.aliases += 1
+            return item_id
+
+    def register_all(self, names):
+        return [self.register(name) for name in names]
+
+    def _add(self, name):
+        item_id = self._by_spelling.get(name)
+        if item_id is None:
+            key = normalize(name)
+            item_id = self._by_key.get(key)
+            if item_id is None:
+                item_id = self._by_key[key] = len(self.names)
+                self.names.append(name)
+            self._by_spelling[name] = item_id
+        return item_id
+
+    def id_of(self, name):
+        """The item's ID, or None (counted as a miss) if no registered item matches."""
+        item_id = self._by_spelling.get(name)
+        if item_id is not None:
+            return item_id
+        key = normalize(name)
+        with self._lock:
+            item_id = self._by_key.get(key)
+            if item_id is not None:
+                self._by_spelling[name] = item_id
+                return item_id
+            self.misses += 1
+            if key in self._missed or len(self._missed) < MAX_TRACKED_MISSES:
+                self._missed[key] += 1
+        return None
+
+    def name_of(self, item_id):
+        return self.names[item_id]
+
+    def canonical(self, name, register=False):
+        """The canonical spelling of name; unknown names come back as given unless register adds them."""
+        item_id = self.register(name) if register else self.id_of(name)
+        return name if item_id is None else self.names[item_id]
+
+    def keyed(self, mapping, key=None):
+        """
+        {item ID: value} for the entries of a {name: value} mapping whose names
+        resolve. When several names share an ID the largest value (by key) wins,
+        e.g. the latest purchase date.
+        """
+        by_id = {}
+        for name, value in mapping.items():
+            item_id = self.id_of(name)
+            if item_id is None:
+                continue
+            current = by_id.get(item_id)
+            if current is None or (key(value) if key else value) > (key(current) if key else current):
+                by_id[item_id] = value
+        return by_id
+
+    def __len__(self):
+        return len(self.names)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self.names),
+                "spellings": len(self._by_spelling),
+                "aliases": self.aliases,
+                "misses": self.misses,
+                "top_misses": self._missed.most_common(10),
+            }
+
+
+# Process-wide registry; data_engine seeds it with the catalog and history items
+ITEMS = ItemRegistry()
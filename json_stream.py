@@ -0,0 +1,139 @@
+"""
+Tolerant JSON extraction for model output.
+
+Gemini is asked for JSON mode with a response schema (see ai_logic.py), but
+replies can still come back wrapped in ```json fences or a sentence of prose,
+and prose may contain braces of its own. Instead of slicing from the first
+"{" to the last "}", these helpers look for a complete object that actually
+parses:
+
+  extract_json(text)     first top-level object in the text that decodes
+  ArrayItemStream(key)   feed() streaming chunks; returns each element of the
+                         `key` array as soon as its closing brace arrives
+  ParseStats             attempt/failure counters, reported as a failure rate
+"""
+import json
+import re
+import threading
+
+_DECODER = json.JSONDecoder()
+
+
+def extract_json(text):
+    """
+    First JSON object in `text` that decodes, ignoring fences, prose and
+    stray braces around it. Raises ValueError if there is none.
+    """
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", start + 1)
+    raise ValueError("no JSON object found in model output")
+
+
+class ArrayItemStream:
+    """
+    Incremental parser for one array field of a streamed JSON object.
+
+        items = ArrayItemStream("shopping_list")
+        for chunk in response:
+            for entry in items.feed(chunk.text):
+                ...
+
+    Object elements are decoded and returned as soon as they close; elements
+    that don't decode are counted in `skipped` and dropped.
+    """
+
+    def __init__(self, key):
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = None        # next character to scan, once the array was found
+        self._depth = 0         # nesting inside the array; 0 between elements
+        self._start = None      # where the current element began
+        self._in_string = False
+        self._escaped = False
+        self.done = False
+        self.skipped = 0
+
+    def feed(self, chunk):
+        """Adds a chunk of text; returns the elements completed by it."""
+        if self.done:
+            return []
+        self._buffer += chunk
+        if self._pos is None:
+            match = self._key_re.search(self._buffer)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        completed = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # End of the array itself
+                    self.done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(json.loads(buffer[self._start:i + 1]))
+                    except ValueError:
+                        self.skipped += 1
+                    self._start = None
+        self._pos = len(buffer)
+
+        # Everything before the element in progress has been dealt with
+        keep = self._start if self._start is not None else self._pos
+        self._buffer = buffer[keep:]
+        self._pos -= keep
+        if self._start is not None:
+            self._start = 0
+        return [item for item in completed if isinstance(item, dict)]
+
+
+class ParseStats:
+    """Thread-safe parse attempt/failure counts, overall and per kind of call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, kind, ok):
+        with self._lock:
+            attempts, failures = self._counts.get(kind, (0, 0))
+            self._counts[kind] = (attempts + 1, failures + (not ok))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        attempts = sum(a for a, _ in counts.values())
+        failures = sum(f for _, f in counts.values())
+        return {
+            "attempts": attempts,
+            "failures": failures,
+            "failure_rate": failures / attempts if attempts else 0.0,
+            "by_kind": {
+                kind: {"attempts": a, "failures": f, "failure_rate": f / a}
+                for kind, (a, f) in sorted(counts.items())
+            },
+        }
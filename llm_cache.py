@@ -0,0 +1,206 @@
+"""
+Response cache for Gemini calls.
+
+Prompts are rebuilt from the same household inputs over and over (every
+"Force Refresh", every new session with the default pantry), so parsed
+responses are cached under a canonical hash of those inputs rather than of
+the prompt text. Callers add the prompt templates' version to the inputs
+(prompt_builder.PROMPT_VERSION), so changed prompts start from an empty
+cache even on the persistent backend. Entries expire after a TTL and the least recently used are
+evicted past a size limit.
+
+Backends:
+  MemoryBackend   per-process, the default
+  SQLiteBackend   on disk, survives restarts
+
+Pick one with PANTRY_LLM_CACHE ("memory", "sqlite:/path/to/cache.db" or
+"off") and PANTRY_LLM_CACHE_TTL (seconds).
+"""
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {_normalize(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        # Item lists are sets as far as the model is concerned
+        return sorted((_normalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    return value
+
+
+def canonical_key(kind, **inputs):
+    """Stable hash of a call's inputs: case, whitespace and ordering don't matter."""
+    payload = json.dumps({"kind": kind, "inputs": _normalize(inputs)}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# BACKENDS
+# -----------------------------
+class MemoryBackend:
+    """LRU dict of key -> (stored_at, text), bounded by max_entries."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, stored_at, text):
+        """Stores an entry; returns how many entries were evicted."""
+        with self._lock:
+            self._entries[key] = (stored_at, text)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Same contract as MemoryBackend, persisted in a SQLite file."""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, last_used REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT stored_at, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            return row
+
+    def set(self, key, stored_at, text):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, stored_at, last_used, value) VALUES (?, ?, ?, ?)",
+                (key, stored_at, time.time(), text),
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+            return max(cursor.rowcount, 0)
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+# -----------------------------
+# CACHE
+# -----------------------------
+class ResponseCache:
+    """
+    TTL cache of JSON-serializable responses. Values are stored as JSON
+    text, so every get() hands back a fresh copy that callers may mutate.
+    """
+
+    def __init__(self, backend=None, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter, n=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+            self.backend.delete(key)
+            self._count("expired")
+            entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(entry[1])
+
+    def set(self, key, value):
+        evicted = self.backend.set(key, time.time(), json.dumps(value))
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "size": len(self.backend),
+        }
+
+
+class NullCache:
+    """Drop-in ResponseCache that never stores anything."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def stats(self):
+        return {"hits": 0, "misses": 0, "hit_rate": 0.0, "expired": 0, "evictions": 0, "size": 0}
+
+
+def cache_from_env():
+    setting = os.getenv("PANTRY_LLM_CACHE", "memory")
+    ttl = float(os.getenv("PANTRY_LLM_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    if setting == "off":
+        return NullCache()
+    if setting.startswith("sqlite:"):
+        return ResponseCache(SQLiteBackend(setting[len("sqlite:"):]), ttl)
+    return ResponseCache(MemoryBackend(), ttl)
@@ -0,0 +1,262 @@
+"""
+Process-wide gateway in front of the shared Gemini model.
+
+Every Streamlit session in the server process shares one API key, so all
+calls go through one RateLimitedModel:
+
+  * a token bucket caps the request rate (GEMINI_REQUESTS_PER_MINUTE)
+  * callers queue by priority, so interactive chat goes ahead of dashboard
+    refreshes
+  * rate-limit and unavailable errors are retried with jittered exponential
+    backoff, waiting at least as long as the server's retry-after hint
+  * identical non-streaming requests already in flight are coalesced: the
+    first caller makes the request and everyone else shares its response,
+    each waiting no longer than its own deadline
+  * a call's request_options={"timeout": ...} is a deadline for the whole
+    call: queueing and retries stop (TimeoutError, or the last error) once
+    it passes, and each attempt is sent with the time that is left
+
+metrics() reports queue depth, wait times and retry/coalescing counts.
+"""
+import concurrent.futures
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_BURST = 5
+
+# gRPC RetryInfo, as printed in the error: retry_delay { seconds: 37 nanos: 500000000 }
+_RETRY_INFO_RE = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)(?:\s*nanos:\s*(\d+))?", re.IGNORECASE)
+# Prose and JSON forms: "Please retry in 37.5s", "retryDelay": "37s"
+_RETRY_DELAY_RE = re.compile(r"retry(?:_delay)?\D{0,20}?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+def _is_retryable(exc):
+    code = getattr(exc, "code", None)
+    code = getattr(code, "value", code)
+    if isinstance(code, tuple):
+        code = code[0]
+    return code in (429, 503) or "429" in str(exc) or "Resource has been exhausted" in str(exc)
+
+
+def retry_after_seconds(exc):
+    """Server-suggested wait from an API error, if it carries one."""
+    hint = getattr(exc, "retry_after", None)
+    if hint is not None:
+        return float(hint)
+    text = str(exc)
+    match = _RETRY_INFO_RE.search(text)
+    if match:
+        return int(match.group(1)) + int(match.group(2) or 0) / 1e9
+    match = _RETRY_DELAY_RE.search(text)
+    return float(match.group(1)) if match else None
+
+
+def _deadline(kwargs):
+    """Monotonic deadline from a call's request_options timeout, or None."""
+    options = kwargs.get("request_options")
+    timeout = options.get("timeout") if isinstance(options, dict) else None
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _with_remaining_time(kwargs, deadline):
+    """kwargs with the request timeout cut down to what is left before deadline."""
+    if deadline is None:
+        return kwargs
+    options = dict(kwargs["request_options"], timeout=max(0.0, deadline - time.monotonic()))
+    return {**kwargs, "request_options": options}
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket whose waiters are served strictly by (priority, arrival):
+    lower priority numbers go first.
+    """
+
+    def __init__(self, rate_per_sec, capacity):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def queue_depth(self):
+        return len(self._waiters)
+
+    def acquire(self, priority=PRIORITY_BACKGROUND, deadline=None):
+        """
+        Blocks until this caller may send a request; returns seconds waited.
+        Raises TimeoutError, without taking a token, if the monotonic deadline
+        passes first.
+        """
+        start = time.monotonic()
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == entry and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        self._cond.notify_all()
+                        return time.monotonic() - start
+                    wait = (1 - self._tokens) / self.rate if self._tokens < 1 else None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("deadline passed while waiting for a rate-limit token")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+
+class _GatedChat:
+    """ChatSession whose send_message goes through the gateway."""
+
+    def __init__(self, gateway, chat, priority):
+        self._gateway = gateway
+        self._chat = chat
+        self._priority = priority
+
+    def send_message(self, content, stream=False, **kwargs):
+        deadline = _deadline(kwargs)
+        return self._gateway._call(
+            lambda: self._chat.send_message(content, stream=stream, **_with_remaining_time(kwargs, deadline)),
+            self._priority, deadline)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class RateLimitedModel:
+    """Wraps a GenerativeModel with the same generate_content/start_chat surface."""
+
+    def __init__(self, model, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=DEFAULT_BURST,
+                 max_retries=4, base_delay=1.0, max_delay=30.0):
+        self._model = model
+        self.bucket = PriorityTokenBucket(requests_per_minute / 60.0, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._waits = deque(maxlen=1000)
+        self.requests = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.max_queue_depth = 0
+
+    def _backoff(self, attempt, exc):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hint = retry_after_seconds(exc)
+        if hint is not None:
+            delay = max(delay, hint + random.uniform(0, self.base_delay))
+        return delay
+
+    def _call(self, fn, priority, deadline=None):
+        attempt = 0
+        while True:
+            with self._metrics_lock:
+                self.max_queue_depth = max(self.max_queue_depth, self.bucket.queue_depth + 1)
+            waited = self.bucket.acquire(priority, deadline)
+            with self._metrics_lock:
+                self._waits.append(waited)
+                self.requests += 1
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                with self._metrics_lock:
+                    self.retries += 1
+                time.sleep(delay)
+                attempt += 1
+
+    def generate_content(self, contents, stream=False, priority=PRIORITY_BACKGROUND, **kwargs):
+        deadline = _deadline(kwargs)
+        call = lambda: self._model.generate_content(  # noqa: E731
+            contents, stream=stream, **_with_remaining_time(kwargs, deadline))
+        if stream:
+            return self._call(call, priority, deadline)
+
+        key = repr((contents, sorted(kwargs.items(), key=lambda kv: kv[0])))
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+        if not leader:
+            with self._metrics_lock:
+                self.coalesced += 1
+            # Followers keep their own deadline while the leader's call runs
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                return future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                raise TimeoutError("deadline passed while waiting for a coalesced request") from None
+
+        try:
+            future.set_result(self._call(call, priority, deadline))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+        return future.result()
+
+    def start_chat(self, history=None, priority=PRIORITY_INTERACTIVE, **kwargs):
+        return _GatedChat(self, self._model.start_chat(history=history, **kwargs), priority)
+
+    def metrics(self):
+        with self._metrics_lock:
+            waits = sorted(self._waits)
+            return {
+                "queue_depth": self.bucket.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "retries": self.retries,
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95_s": waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else 0.0,
+                "wait_max_s": waits[-1] if waits else 0.0,
+            }
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def gateway_from_env(model):
+    return RateLimitedModel(
+        model,
+        requests_per_minute=float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)),
+        burst=int(os.getenv("GEMINI_BURST", DEFAULT_BURST)),
+    )
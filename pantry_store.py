@@ -0,0 +1,218 @@
+"""
+Persistent pantry repository (SQLite).
+
+Onboarding answers and purchase history used to live only in session state
+and in data_engine.MOCK_PURCHASE_HISTORY. Here they persist per household:
+
+  households     size, shopping frequency, last trip and stores
+  usuals         (household, category, item) the household keeps at home
+  events         append-only purchase / consumption events
+  last_purchase  latest purchase date per (household, item), kept up to date
+                 as events are written, so ages never scan the event table
+
+The connection runs in WAL mode so dashboard reads don't block writers, all
+SQL is constant text (sqlite3 reuses the prepared statement), and events are
+written in batches inside one transaction. "Items older than N days" is a
+range scan on the (household, bought_on) index.
+
+Pick the database file with PANTRY_DB (default pantry.db, ":memory:" for a
+throwaway store).
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+DEFAULT_DB_PATH = "pantry.db"
+DEFAULT_HOUSEHOLD = "default"
+
+PURCHASE = "purchase"
+CONSUME = "consume"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS households (
+    household_id TEXT PRIMARY KEY,
+    household_size INTEGER,
+    grocery_freq INTEGER,
+    last_trip TEXT,
+    stores TEXT NOT NULL DEFAULT '[]',
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usuals (
+    household_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (household_id, category, item)
+);
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    household_id TEXT NOT NULL,
+    item TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    happened_on TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_household_item ON events (household_id, item, happened_on);
+CREATE TABLE IF NOT EXISTS last_purchase (
+    household_id TEXT NOT NULL,
+    item TEXT NOT NULL,
+    bought_on TEXT NOT NULL,
+    PRIMARY KEY (household_id, item)
+);
+CREATE INDEX IF NOT EXISTS last_purchase_age ON last_purchase (household_id, bought_on);
+"""
+
+_INSERT_EVENT = (
+    "INSERT INTO events (household_id, item, kind, quantity, happened_on) VALUES (?, ?, ?, ?, ?)"
+)
+_UPSERT_LAST_PURCHASE = (
+    "INSERT INTO last_purchase (household_id, item, bought_on) VALUES (?, ?, ?)"
+    " ON CONFLICT (household_id, item) DO UPDATE SET bought_on = excluded.bought_on"
+    " WHERE excluded.bought_on > last_purchase.bought_on"
+)
+
+
+def _iso(day):
+    return day.isoformat() if isinstance(day, (datetime.date, datetime.datetime)) else day
+
+
+class PantryStore:
+    """One shared connection, serialized by a lock (sessions run in threads)."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=128)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # --- HOUSEHOLDS ---
+    def save_household(self, household_id, household_size, grocery_freq, last_trip, stores, usuals):
+        """Stores the onboarding answers, replacing the household's usuals."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO households"
+                " (household_id, household_size, grocery_freq, last_trip, stores, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, strftime('%s', 'now'))",
+                (household_id, household_size, grocery_freq, _iso(last_trip), json.dumps(list(stores))),
+            )
+            self._conn.execute("DELETE FROM usuals WHERE household_id = ?", (household_id,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO usuals (household_id, category, item) VALUES (?, ?, ?)",
+                [(household_id, category, item) for category, items in usuals.items() for item in items],
+            )
+
+    def load_household(self, household_id):
+        """The saved onboarding answers, or None for a household we haven't seen."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT household_size, grocery_freq, last_trip, stores FROM households WHERE household_id = ?",
+                (household_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            usual_rows = self._conn.execute(
+                "SELECT category, item FROM usuals WHERE household_id = ? ORDER BY rowid", (household_id,)
+            ).fetchall()
+        usuals = {}
+        for category, item in usual_rows:
+            usuals.setdefault(category, []).append(item)
+        return {
+            "household_size": row[0],
+            "grocery_freq": row[1],
+            "last_trip": datetime.date.fromisoformat(row[2]) if row[2] else None,
+            "stores": json.loads(row[3]),
+            "usuals": usuals,
+        }
+
+    # --- EVENTS ---
+    def record_events(self, events):
+        """
+        Appends (household_id, item, kind, quantity, date) events in one
+        transaction and advances last_purchase for the purchases among them.
+        """
+        rows = [(household_id, item, kind, float(quantity), _iso(day))
+                for household_id, item, kind, quantity, day in events]
+        purchases = [(household_id, item, day) for household_id, item, kind, _, day in rows if kind == PURCHASE]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_EVENT, rows)
+            self._conn.executemany(_UPSERT_LAST_PURCHASE, purchases)
+        return len(rows)
+
+    def events_after(self, count):
+        """
+        (household_id, item, kind, quantity, date) for every event after the
+        first `count`, in the order they were written (a rowid range scan).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT household_id, item, kind, quantity, happened_on FROM events WHERE event_id > ?"
+                " ORDER BY event_id",
+                (count,),
+            ).fetchall()
+        return [(household_id, item, kind, quantity, datetime.date.fromisoformat(day))
+                for household_id, item, kind, quantity, day in rows]
+
+    def record_purchase(self, household_id, item, day=None, quantity=1):
+        return self.record_events([(household_id, item, PURCHASE, quantity, day or datetime.date.today())])
+
+    def has_history(self, household_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM last_purchase WHERE household_id = ? LIMIT 1", (household_id,)
+            ).fetchone() is not None
+
+    # --- QUERIES ---
+    def last_purchases(self, household_id):
+        """{item: date last bought}, oldest purchase first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item, bought_on FROM last_purchase WHERE household_id = ? ORDER BY bought_on, item",
+                (household_id,),
+            ).fetchall()
+        return {item: datetime.date.fromisoformat(day) for item, day in rows}
+
+    def last_purchase(self, household_id, item):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT bought_on FROM last_purchase WHERE household_id = ? AND item = ?", (household_id, item)
+            ).fetchone()
+        return datetime.date.fromisoformat(row[0]) if row else None
+
+    def items_older_than(self, household_id, days, today=None):
+        """[(item, date)] last bought more than `days` days ago, oldest first (index range scan)."""
+        cutoff = (today or datetime.date.today()) - datetime.timedelta(days=days)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item, bought_on FROM last_purchase WHERE household_id = ? AND bought_on < ?"
+                " ORDER BY bought_on",
+                (household_id, cutoff.isoformat()),
+            ).fetchall()
+        return [(item, datetime.date.fromisoformat(day)) for item, day in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_pantry_store():
+    """
+    The process-wide store at PANTRY_DB, opened on first use. A forked
+    child (batch_runner's workers) opens its own: SQLite connections must
+    not be shared across processes.
+    """
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store_pid != os.getpid():
+                _store = PantryStore(os.getenv("PANTRY_DB", DEFAULT_DB_PATH))
+                _store_pid = os.getpid()
+    return _store
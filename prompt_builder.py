@@ -0,0 +1,157 @@
+"""
+Compact, token-budgeted prompts for the Gemini calls in ai_logic.
+
+The pantry used to be pasted in as indented JSON, which spends most of its
+tokens on whitespace and quotes and grows without limit with the pantry.
+Every prompt now shares one compact encoding:
+
+    Household: 4 people, last trip 2026-10-10
+    Low (must buy): Eggs, Whole Milk
+    Pantry (~Nd = days since bought):
+    Dairy: Butter~30d, Cheddar Cheese
+    Produce: Onions~21d, Spinach~14d
+
+Categories are sorted by name and items oldest purchase first, so the same
+inputs always give the same text. Low items are listed once, not repeated
+in the pantry.
+
+Each prompt has a hard token budget (estimated, see token_budget.py). When
+everything doesn't fit, items are kept in priority order (low items first,
+then the pantry items bought longest ago) and the prompt says how many
+were left out.
+"""
+import hashlib
+
+from token_budget import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_PROMPT_TOKENS = 800
+
+RECIPES_TEMPLATE = """You are a professional chef. Suggest 3 real, diverse recipes that use this household's pantry to reduce food waste.
+{context}
+Rules: use only pantry items; never use low items; prefer items bought longest ago.
+Output JSON: {{"recipes":[{{"name":"","ingredients":[""],"instructions":""}}]}}"""
+
+SHOPPING_TEMPLATE = """You are a grocery planning assistant. Build this household's next shopping list.
+{context}
+Rules: include every low item, with a quantity sized for the household and a short reason.
+Output JSON: {{"shopping_list":[{{"item":"","recommended_quantity":"","reason":""}}]}}"""
+
+LOW_ITEMS_TEMPLATE = """You predict pantry consumption. Which pantry items will run out before the next trip?
+{context}
+Output JSON: {{"low_items":["item"]}}"""
+
+PANTRY_HEADING = "Pantry (~Nd = days since bought):"
+
+# Part of every response cache key, so a cached answer is never served for a
+# prompt that has since changed. Template edits change the hash on their own;
+# bump PROMPT_FORMAT when the way the context is written changes.
+PROMPT_FORMAT = 1
+PROMPT_VERSION = f"{PROMPT_FORMAT}-" + hashlib.sha256(
+    "\0".join((RECIPES_TEMPLATE, SHOPPING_TEMPLATE, LOW_ITEMS_TEMPLATE, PANTRY_HEADING)).encode("utf-8")
+).hexdigest()[:12]
+# Room kept for the "... more not listed" notes when items are dropped
+_OMITTED_NOTE_CHARS = 48
+
+
+class Prompt:
+    """Prompt text, its estimated token count and how many items the budget left out."""
+    __slots__ = ("text", "tokens", "omitted")
+
+    def __init__(self, text, tokens, omitted):
+        self.text = text
+        self.tokens = tokens
+        self.omitted = omitted
+
+
+def _label(item, ages):
+    age = ages.get(item)
+    return item if age is None else f"{item}~{age}d"
+
+
+def _pantry_entries(pantry_usuals, low, ages):
+    """Unique (category, item) pairs not already listed as low, highest priority first."""
+    seen = set(low)
+    entries = []
+    for category, items in pantry_usuals.items():
+        for item in items:
+            if item not in seen:
+                seen.add(item)
+                entries.append((category, item))
+    # Oldest purchase first; items with no history last
+    entries.sort(key=lambda entry: (-ages.get(entry[1], -1), entry[0], entry[1]))
+    return entries
+
+
+def _context(header, low_label, low_items, pantry_usuals, ages, budget_chars):
+    """Context text with as many items as fit in budget_chars, and how many were left out."""
+    low = list(dict.fromkeys(low_items))
+    # Every item in priority order, with what listing it costs in characters
+    candidates = [(None, item) for item in low] + _pantry_entries(pantry_usuals, low, ages)
+    costs = []
+    categories = set()
+    for category, item in candidates:
+        cost = len(_label(item, ages)) + 2
+        if category is not None and category not in categories:
+            categories.add(category)
+            cost += len(category) + 3
+        costs.append(cost)
+
+    available = budget_chars - len(header) - len(low_label) - len(PANTRY_HEADING) - 8
+    if sum(costs) > available:
+        available -= _OMITTED_NOTE_CHARS
+    kept = 0
+    for cost in costs:
+        if cost > available:
+            break
+        available -= cost
+        kept += 1
+
+    kept_low = low[:kept]
+    pantry = {}
+    for category, item in candidates[len(low):kept]:
+        pantry.setdefault(category, []).append(item)
+    low_omitted = len(low) - len(kept_low)
+    pantry_omitted = len(candidates) - len(low) - sum(len(items) for items in pantry.values())
+
+    low_text = ", ".join(_label(item, ages) for item in kept_low) or "none"
+    if low_omitted:
+        low_text += f" (+{low_omitted} more)"
+    lines = [header, f"{low_label}: {low_text}", PANTRY_HEADING]
+    for category in sorted(pantry):
+        lines.append(f"{category}: " + ", ".join(_label(item, ages) for item in pantry[category]))
+    if pantry_omitted:
+        lines.append(f"(+{pantry_omitted} more pantry items not listed)")
+    return "\n".join(lines), low_omitted + pantry_omitted
+
+
+def _build(template, header, low_label, low_items, pantry_usuals, ages, budget):
+    ages = ages or {}
+    fixed = len(template.format(context=""))
+    budget_chars = max(0, budget * CHARS_PER_TOKEN - fixed)
+    context, omitted = _context(header, low_label, low_items or [], pantry_usuals or {}, ages, budget_chars)
+    text = template.format(context=context)
+    return Prompt(text, estimate_tokens(text), omitted)
+
+
+def _household(household_size, last_trip):
+    trip = last_trip.isoformat() if hasattr(last_trip, "isoformat") else (last_trip or "unknown")
+    return f"Household: {household_size} people, last trip {trip}"
+
+
+def recipes_prompt(household_size, last_trip, pantry_usuals, low_items, ages=None, budget=DEFAULT_PROMPT_TOKENS):
+    """Recipes from the pantry, avoiding low items. ages is {item: days since bought}."""
+    return _build(RECIPES_TEMPLATE, _household(household_size, last_trip), "Low (do not use)",
+                  low_items, pantry_usuals, ages, budget)
+
+
+def shopping_prompt(household_size, last_trip, pantry_usuals, low_items, ages=None, budget=DEFAULT_PROMPT_TOKENS):
+    """The next shopping list, which must cover every low item."""
+    return _build(SHOPPING_TEMPLATE, _household(household_size, last_trip), "Low (must buy)",
+                  low_items, pantry_usuals, ages, budget)
+
+
+def low_items_prompt(household_size, days_since, pantry_usuals, projected_low, ages=None,
+                     budget=DEFAULT_PROMPT_TOKENS):
+    """Second opinion on the consumption model's projected low items."""
+    header = f"Household: {household_size} people, {days_since} days since last trip"
+    return _build(LOW_ITEMS_TEMPLATE, header, "Projected low", projected_low, pantry_usuals, ages, budget)
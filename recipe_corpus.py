@@ -0,0 +1,93 @@
+"""
+Process-wide recipe corpus loader.
+
+Every Streamlit session runs in its own script thread of the same server
+process, so the recipe dataset is parsed once and shared by all of them.
+Entries are keyed by path and reloaded only when the file's mtime or size
+changes.
+"""
+import json
+import os
+import sys
+import threading
+
+# (loader, path) -> (file stamp, loaded value)
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+# One lock per key so a slow parse of one file doesn't block readers of another
+_KEY_LOCKS = {}
+
+
+class Recipe:
+    """Compact, read-only recipe record shared by every session."""
+    __slots__ = ("title", "ingredients", "directions")
+
+    def __init__(self, title, ingredients, directions):
+        self.title = title
+        self.ingredients = ingredients
+        self.directions = directions
+
+    def __getstate__(self):
+        return (self.title, self.ingredients, self.directions)
+
+    def __setstate__(self, state):
+        self.title, self.ingredients, self.directions = state
+
+
+def file_stamp(path):
+    """(mtime, size) pair used to detect that a file changed on disk."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_cached(path, loader):
+    """
+    Returns loader(path), computed once per process and shared across threads.
+    The value is recomputed when the file's mtime or size changes.
+    """
+    key = (loader, os.path.abspath(path))
+    stamp = file_stamp(path)
+    entry = _CACHE.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    with _CACHE_LOCK:
+        key_lock = _KEY_LOCKS.setdefault(key, threading.Lock())
+    with key_lock:
+        # Another thread may have finished the load while we waited
+        stamp = file_stamp(path)
+        entry = _CACHE.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        value = loader(path)
+        _CACHE[key] = (stamp, value)
+        return value
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def _strings(values):
+    # Ingredient lines ("1 teaspoon salt", "2 large eggs") repeat across
+    # thousands of recipes; interning stores each distinct line once
+    return tuple(sys.intern(v) for v in values or () if isinstance(v, str))
+
+
+def parse_recipes(path):
+    with open(path, "r") as f:
+        records = json.load(f)
+    recipes = []
+    for record in records:
+        recipes.append(Recipe(
+            sys.intern(record.get("title") or ""),
+            _strings(record.get("ingredients")),
+            tuple(d for d in record.get("directions") or () if isinstance(d, str)),
+        ))
+    return tuple(recipes)
+
+
+def load_recipes(path):
+    """The shared, compact recipe list for a dataset path."""
+    return load_cached(path, parse_recipes)
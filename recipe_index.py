@@ -0,0 +1,198 @@
+"""
+Inverted ingredient index over full_format_recipes.json.
+
+Parsing the full Epicurious dump on every fallback is slow, so the index is
+built once offline and persisted next to the dataset:
+
+    python recipe_index.py full_format_recipes.json
+
+At runtime `get_recipe_index` loads it once per process (or builds it in
+memory if the persisted file is missing or stale) and recipe lookups become
+set intersections instead of substring scans. Index hits are candidates
+only; ingredient_matcher.PantryMatcher confirms whole-phrase matches for the
+few recipes that can still make the top k. Both the persisted index and the
+in-memory fallback go through the shared loader in recipe_corpus.py.
+"""
+import heapq
+import logging
+import os
+import pickle
+import sys
+
+from ingredient_matcher import compile_matcher, tokenize
+from recipe_corpus import file_stamp, load_cached, load_recipes
+
+INDEX_VERSION = 3
+logger = logging.getLogger(__name__)
+
+
+def index_path_for(dataset_path):
+    """Where the persisted index for a dataset lives."""
+    return os.path.splitext(dataset_path)[0] + ".index.pkl"
+
+
+# -----------------------------
+# INDEX
+# -----------------------------
+class RecipeIndex:
+    """
+    token -> recipe ids for ingredients and titles. Tokens are plural-folded
+    (see ingredient_matcher.tokenize). Recipes are recipe_corpus.Recipe
+    records in corpus order, so a recipe id is its position.
+    """
+
+    def __init__(self, recipes):
+        self.recipes = recipes
+        ingredient_postings = {}
+        title_postings = {}
+
+        for rid, recipe in enumerate(recipes):
+            tokens = set(sys.intern(t) for t in tokenize(" ".join(recipe.ingredients)))
+            for token in tokens:
+                ingredient_postings.setdefault(token, set()).add(rid)
+            for token in set(tokenize(recipe.title)):
+                title_postings.setdefault(token, set()).add(rid)
+
+        self.ingredient_postings = {t: frozenset(ids) for t, ids in ingredient_postings.items()}
+        self.title_postings = {t: frozenset(ids) for t, ids in title_postings.items()}
+
+    def _lookup(self, postings, tokens):
+        # Intersect rarest postings first so the working set shrinks fast
+        ids = None
+        for token in sorted(tokens, key=lambda t: len(postings.get(t, ()))):
+            found = postings.get(token)
+            if not found:
+                return frozenset()
+            ids = found if ids is None else ids & found
+            if not ids:
+                break
+        return ids or frozenset()
+
+    def recipes_with(self, term):
+        """Ids of recipes whose ingredients or title contain every token of term."""
+        tokens = tokenize(term)
+        if not tokens:
+            return frozenset()
+        return self._lookup(self.ingredient_postings, tokens) | self._lookup(self.title_postings, tokens)
+
+    def candidates(self, surplus_items):
+        """
+        {recipe id: [surplus items]} for every recipe that might use a surplus
+        item. A superset of the real matches: tokens need not be adjacent.
+        """
+        found = {}
+        for item in surplus_items:
+            for rid in self.recipes_with(item):
+                found.setdefault(rid, []).append(item)
+        return found
+
+    def search(self, surplus_items, low_items, k, score_fn=None):
+        """
+        Best k recipes as (score, rid, clears_out): they use surplus items and
+        don't call for any low-stock item (terms of 3+ characters).
+        """
+        score_fn = score_fn or count_score
+        matcher = compile_matcher(tuple(surplus_items), tuple(low for low in low_items if len(low) > 2))
+        return top_k(
+            self.candidates(surplus_items), k, score_fn,
+            verify=lambda rid: matcher.scan(self.recipes[rid]),
+        )
+
+
+# -----------------------------
+# RANKING
+# -----------------------------
+def count_score(clears_out):
+    """Default recipe score: how many surplus items the recipe clears out."""
+    return len(clears_out)
+
+
+def top_k(candidates, k, score_fn=count_score, verify=None):
+    """
+    Best k recipes from {recipe id: clears_out} as (score, rid, clears_out),
+    best first, ties going to the earlier recipe in the corpus.
+
+    Only a k-sized heap is kept. score_fn must never go down when items are
+    added, so a candidate's score before verification is an upper bound on
+    its final score. Candidates are visited best bound first, and the scan
+    stops at the first one whose bound can't beat the k-th best.
+    verify(rid) optionally narrows a candidate's clears_out to its confirmed
+    items (None to drop it); it only runs for candidates that could still
+    make the heap.
+    """
+    if k <= 0:
+        return []
+    bounds = {rid: score_fn(clears_out) for rid, clears_out in candidates.items()}
+    heap = []
+    for rid in sorted(candidates, key=lambda rid: (-bounds[rid], rid)):
+        if len(heap) == k and (bounds[rid], -rid) <= heap[0][:2]:
+            # Every later candidate has a lower bound, or the same one and a later rid
+            break
+        clears_out = candidates[rid]
+        if verify is not None:
+            clears_out = verify(rid)
+            if not clears_out:
+                continue
+        entry = (score_fn(clears_out), -rid, clears_out)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    heap.sort(reverse=True)
+    return [(score, -neg_rid, clears_out) for score, neg_rid, clears_out in heap]
+
+
+# -----------------------------
+# BUILD / PERSIST / LOAD
+# -----------------------------
+def build_index(dataset_path):
+    return RecipeIndex(load_recipes(dataset_path))
+
+
+def save_index(index, dataset_path, index_path=None):
+    index_path = index_path or index_path_for(dataset_path)
+    payload = {
+        "version": INDEX_VERSION,
+        "source_stamp": file_stamp(dataset_path),
+        "index": index,
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def _read_persisted(index_path):
+    with open(index_path, "rb") as f:
+        return pickle.load(f)
+
+
+def _build_in_memory(dataset_path):
+    logger.info("Recipe index missing or stale for %s; building in memory", dataset_path)
+    return build_index(dataset_path)
+
+
+def _is_current(payload, dataset_path):
+    if payload.get("version") != INDEX_VERSION:
+        return False
+    # A stale index is worse than a slow one; rebuild if the dataset moved on
+    if os.path.exists(dataset_path):
+        return payload.get("source_stamp") == file_stamp(dataset_path)
+    return True
+
+
+def get_recipe_index(dataset_path):
+    """Returns the index for a dataset, loading or building it once per process."""
+    index_path = index_path_for(dataset_path)
+    if os.path.exists(index_path):
+        payload = load_cached(index_path, _read_persisted)
+        if _is_current(payload, dataset_path):
+            return payload["index"]
+    return load_cached(dataset_path, _build_in_memory)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "full_format_recipes.json"
+    built = build_index(path)
+    print(f"Indexed {len(built.recipes)} recipes -> {save_index(built, path)}")
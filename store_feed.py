@@ -0,0 +1,265 @@
+"""
+Live store inventory feeds.
+
+Stores publish price/stock dumps as CSV (header row) or JSONL files with
+one offer per row:
+
+    store, item, brand, category, stock, price
+
+A feed file is read one row at a time and compared against the live
+catalog (data_engine.CATALOG) as it streams, so only rows that actually
+changed are held in memory, never the whole file (what remains grows with
+the catalog, not the feed). A file only adds and updates offers; in
+snapshot mode (snapshot=True, or PANTRY_FEED_SNAPSHOT=1 for the watcher) it
+is instead a full snapshot of the stores it mentions, and their items
+missing from the file are removed. The resulting delta is published with
+data_engine.apply_catalog_changes, which swaps in an updated copy of the
+catalog in one step, so price lookups never see half of an update. It is
+only published if the catalog is still the version it was computed
+against; otherwise the file is read again against the newer catalog.
+
+FeedWatcher polls a directory (PANTRY_FEED_DIR) and ingests each feed file
+that is new or has changed. Write feed files elsewhere and move them in,
+so a file is never read half-written. A file that fails to ingest is
+reported and not retried until it changes.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+import time
+
+import data_engine
+from item_registry import ITEMS
+from recipe_corpus import file_stamp
+
+FEED_SUFFIXES = (".csv", ".jsonl")
+FEED_POLL_SECONDS = 5.0
+logger = logging.getLogger(__name__)
+
+
+class FeedError(ValueError):
+    """A feed row that can't be turned into an offer."""
+
+
+def _offer(row, current):
+    """The catalog entry for one feed row, filling brand/category from the current offer."""
+    try:
+        stock = int(float(row["stock"]))
+        price = float(row["price"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise FeedError(f"bad stock/price in {row!r}") from e
+    brand = row.get("brand") or (current or {}).get("brand")
+    category = row.get("category") or (current or {}).get("category")
+    if not category:
+        raise FeedError(f"no category for new item in {row!r}")
+    return {"brand": brand, "category": category, "stock": stock, "price": price}
+
+
+def iter_feed(path):
+    """Yields feed rows as dicts, streaming the file (CSV with a header row, or JSONL)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield row
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            # Unparseable lines come through empty and are counted as skipped
+            yield row if isinstance(row, dict) else {}
+
+
+def compute_delta(rows, catalog, snapshot=False):
+    """
+    Compares streamed feed rows with the catalog. Returns
+    (upserts {store: {item: data}}, removals {store: set(items)}, counts).
+    Rows identical to the current offer are dropped as they arrive. Item
+    names are stored under their canonical spelling (item_registry.py), and
+    items new to the registry are added to it once their row is valid.
+    """
+    store_data = catalog.store_data
+    upserts = {}
+    # Per store, the items the feed hasn't listed yet (holds the catalog's own strings)
+    unlisted = {}
+    counts = {"rows": 0, "added": 0, "changed": 0, "unchanged": 0, "removed": 0, "skipped": 0}
+    bad_rows, first_error = 0, None
+
+    for row in rows:
+        counts["rows"] += 1
+        store = str(row.get("store") or "").strip()
+        item = str(row.get("item") or "").strip()
+        if not store or not item:
+            counts["skipped"] += 1
+            continue
+        item = ITEMS.canonical(item)
+        if snapshot:
+            # A bad row still counts as listed: skipping it shouldn't delete the item
+            if store not in unlisted:
+                unlisted[store] = set(store_data.get(store, ()))
+            unlisted[store].discard(item)
+        current = store_data.get(store, {}).get(item)
+        try:
+            offer = _offer(row, current)
+        except FeedError as e:
+            # Reported once for the whole feed: a bad export can have millions
+            bad_rows += 1
+            first_error = first_error or e
+            counts["skipped"] += 1
+            continue
+        if current is None:
+            item = ITEMS.canonical(item, register=True)
+        if offer == current:
+            counts["unchanged"] += 1
+            continue
+        counts["changed" if current else "added"] += 1
+        upserts.setdefault(store, {})[item] = offer
+
+    if bad_rows:
+        logger.warning("Skipped %d feed rows that aren't valid offers, the first: %s", bad_rows, first_error)
+    removals = {}
+    for store, gone in unlisted.items():
+        if gone:
+            removals[store] = gone
+            counts["removed"] += len(gone)
+    return upserts, removals, counts
+
+
+class IngestStats:
+    """Thread-safe totals and the most recent result of feed ingestion."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.last = None
+
+    def record(self, result):
+        with self._lock:
+            self.files += 1
+            self.rows += result["rows"]
+            self.bytes += result["bytes"]
+            self.seconds += result["read_s"] + result["apply_s"]
+            self.last = result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": self.files,
+                "rows": self.rows,
+                "bytes": self.bytes,
+                "rows_per_sec": self.rows / self.seconds if self.seconds else 0.0,
+                "last": self.last,
+            }
+
+
+INGEST_STATS = IngestStats()
+
+
+def ingest_feed(path, snapshot=False):
+    """Streams one feed file into the live catalog. Returns counts and timings for the file."""
+    read_s = apply_s = 0.0
+    while True:
+        start = time.perf_counter()
+        catalog = data_engine.CATALOG
+        upserts, removals, counts = compute_delta(iter_feed(path), catalog, snapshot)
+        read_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        # A delta against an older catalog would undo whatever changed since
+        applied = not (upserts or removals) or data_engine.apply_catalog_changes(
+            upserts, removals, expected_version=catalog.version) is not None
+        apply_s += time.perf_counter() - start
+        if applied:
+            break
+
+    result = {
+        "path": path,
+        **counts,
+        "bytes": os.path.getsize(path),
+        "read_s": read_s,
+        "apply_s": apply_s,
+        "rows_per_sec": counts["rows"] / (read_s + apply_s) if read_s + apply_s else 0.0,
+    }
+    INGEST_STATS.record(result)
+    return result
+
+
+class FeedWatcher:
+    """Background thread that ingests new or changed feed files in a directory, in name order."""
+
+    def __init__(self, directory, interval=FEED_POLL_SECONDS, snapshot=False):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = snapshot
+        self._stamps = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """Ingests whatever changed since the last poll; returns the per-file results."""
+        results = []
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError as e:
+            logger.warning("Could not list feed directory %s: %s", self.directory, e)
+            return results
+        for name in names:
+            if name.startswith(".") or not name.endswith(FEED_SUFFIXES):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stamp = file_stamp(path)
+            except OSError as e:
+                logger.warning("Could not read feed %s: %s", path, e)
+                continue
+            if self._stamps.get(path) == stamp:
+                continue
+            # Recorded even if the file fails, so a bad file waits for its next change
+            self._stamps[path] = stamp
+            try:
+                results.append(ingest_feed(path, self.snapshot))
+            except Exception as e:
+                logger.exception("Could not ingest feed %s", path)
+        return results
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="store-feed-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_feed_watcher():
+    """The process-wide watcher on PANTRY_FEED_DIR, started on first use; None if unset."""
+    global _watcher
+    directory = os.getenv("PANTRY_FEED_DIR")
+    if not directory:
+        return None
+    if _watcher is None:
+        with _watcher_lock:
+            if _watcher is None:
+                _watcher = FeedWatcher(directory, snapshot=bool(os.getenv("PANTRY_FEED_SNAPSHOT"))).start()
+    return _watcher
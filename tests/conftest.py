@@ -0,0 +1,11 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The local stub model lives with the benchmarks
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+# Tests never touch the real pantry store, event log or response cache
+os.environ["PANTRY_DB"] = ":memory:"
+os.environ["PANTRY_EVENT_LOG"] = ":memory:"
+os.environ["PANTRY_LLM_CACHE"] = "off"
@@ -0,0 +1,77 @@
+import datetime
+import threading
+
+import pytest
+
+import ai_logic
+from stub_model import StubModel
+
+PANTRY = {"Dairy": ["Whole Milk", "Butter"], "Produce": ["Spinach"], "Pantry": ["Rice"]}
+LAST_TRIP = datetime.date.today() - datetime.timedelta(days=6)
+HOUSEHOLD = "test-household"
+
+
+class BarrierModel(StubModel):
+    """Stub whose calls only return once `parties` of them are in flight together."""
+
+    def __init__(self, parties, **kwargs):
+        super().__init__(base_latency=0.0, per_token_latency=0.0, jitter=0.0, **kwargs)
+        self.barrier = threading.Barrier(parties, timeout=10)
+
+    def generate_content(self, prompt, stream=None, **kwargs):
+        self.barrier.wait()
+        return super().generate_content(prompt, stream=stream, **kwargs)
+
+
+class FailingRecipesModel(StubModel):
+    def generate_content(self, prompt, stream=None, **kwargs):
+        if '"recipes"' in prompt:
+            raise RuntimeError("recipes unavailable")
+        return super().generate_content(prompt, stream=stream, **kwargs)
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    def install(model):
+        # Not setattr: reading the old value would build the real model
+        monkeypatch.setitem(vars(ai_logic), "model", model)
+        return model
+    return install
+
+
+def test_recipes_and_shopping_list_calls_run_concurrently(use_model):
+    model = use_model(BarrierModel(parties=2))
+
+    result = ai_logic.generate_shopping_list(4, 2, ["Walmart"], PANTRY, LAST_TRIP, ["Whole Milk"],
+                                             household_id=HOUSEHOLD)
+
+    assert "error" not in result
+    assert model.calls == 2
+    assert [recipe["name"] for recipe in result["recipes"]] == ["Stub Recipe 0", "Stub Recipe 1", "Stub Recipe 2"]
+    assert [entry["item"] for entry in result["shopping_list"]] == ["Whole Milk", "Eggs", "Bread"]
+    # Prices are attached from the catalog afterwards
+    assert result["shopping_list"][0]["store"] == "Walmart"
+
+
+def test_each_call_falls_back_on_its_own(use_model):
+    use_model(FailingRecipesModel(base_latency=0.0, per_token_latency=0.0, jitter=0.0))
+
+    result = ai_logic.generate_shopping_list(4, 2, ["Walmart"], PANTRY, LAST_TRIP, ["Whole Milk"],
+                                             household_id=HOUSEHOLD)
+
+    assert "recipes unavailable" in result["error"]
+    assert [entry["item"] for entry in result["shopping_list"]] == ["Whole Milk", "Eggs", "Bread"]
+    assert isinstance(result["recipes"], list)
+
+
+def test_works_from_inside_a_running_event_loop(use_model):
+    import asyncio
+
+    use_model(StubModel(base_latency=0.0, per_token_latency=0.0, jitter=0.0))
+
+    async def caller():
+        return ai_logic.generate_shopping_list(2, 1, ["Costco"], PANTRY, LAST_TRIP, [], household_id=HOUSEHOLD)
+
+    result = asyncio.run(caller())
+    assert "error" not in result
+    assert result["shopping_list"]
@@ -0,0 +1,64 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from basket_optimizer import _assignment_cost, optimize_basket, solve_exact, solve_greedy
+
+STORES = ["Walmart", "Costco", "Target"]
+
+
+def _brute_force_total(cost, visit_cost):
+    n_stores = cost.shape[1]
+    return min(_assignment_cost(cost, list(cols), visit_cost)
+               for size in range(1, n_stores + 1) for cols in itertools.combinations(range(n_stores), size))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_exact_matches_brute_force_and_greedy_never_beats_it(seed):
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(1, 10, size=(12, 6))
+    cost[rng.random(cost.shape) < 0.3] = np.inf
+    cost[:, 0] = np.where(np.isinf(cost).all(axis=1), 5.0, cost[:, 0])
+    visit_cost = float(rng.uniform(0, 8))
+
+    exact = _assignment_cost(cost, solve_exact(cost, visit_cost), visit_cost)
+    assert exact == pytest.approx(_brute_force_total(cost, visit_cost))
+    assert _assignment_cost(cost, solve_greedy(cost, visit_cost), visit_cost) >= exact - 1e-9
+
+
+def test_high_visit_cost_keeps_to_one_store():
+    plan = optimize_basket(["Whole Milk", "Eggs", "Bread"], STORES, visit_cost=50)
+
+    assert plan["stores"] == ["Walmart"]
+    assert plan["item_cost"] == pytest.approx(3.48 + 3.99 + 2.99)
+    assert plan["total"] == pytest.approx(plan["item_cost"] + 50)
+    assert plan["unavailable"] == []
+
+
+def test_free_visits_buy_each_item_where_it_is_cheapest():
+    plan = optimize_basket(["Whole Milk", "Eggs", "Bread"], STORES, visit_cost=0)
+
+    assert {a["item"]: a["store"] for a in plan["assignments"]} == {
+        "Whole Milk": "Costco", "Eggs": "Walmart", "Bread": "Walmart"}
+    assert plan["visit_cost"] == 0
+
+
+def test_quantity_must_be_in_stock_and_substitutes_fill_gaps():
+    # Walmart has 15 Whole Milk; 16 have to be another in-stock dairy item
+    plan = optimize_basket([("Whole Milk", 16)], ["Walmart"], visit_cost=0)
+    assert plan["assignments"][0]["substitute"] == "Cheddar Cheese"
+    assert plan["assignments"][0]["cost"] == pytest.approx(16 * 2.97)
+
+    no_subs = optimize_basket([{"item": "Whole Milk", "quantity": 16}], ["Walmart"], allow_substitutes=False)
+    assert no_subs["assignments"] == []
+    assert no_subs["unavailable"] == ["Whole Milk"]
+
+
+def test_exact_and_greedy_agree_on_the_demo_catalog():
+    basket = ["Whole Milk", "Eggs", "Bread", "Apples", "Rice", "Almond Butter"]
+    exact = optimize_basket(basket, STORES, visit_cost=2, method="exact")
+    greedy = optimize_basket(basket, STORES, visit_cost=2, method="greedy")
+
+    assert greedy["total"] == exact["total"]
+    assert exact["method"] == "exact" and greedy["method"] == "greedy"
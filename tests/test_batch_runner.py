@@ -0,0 +1,110 @@
+import datetime
+import json
+import os
+
+import pytest
+
+import ai_logic
+import batch_runner
+from batch_runner import ProfileError, completed_households, parse_profile, run_batch
+from stub_model import StubModel
+
+
+class CrashingModel(StubModel):
+    """
+    Kills its worker process when it sees "Crash Cake" in a prompt: only the
+    first time if given a marker file to leave behind, otherwise every time.
+    """
+
+    def __init__(self, marker=None, **kwargs):
+        super().__init__(base_latency=0.0, per_token_latency=0.0, jitter=0.0, **kwargs)
+        self.marker = marker
+
+    def generate_content(self, prompt, stream=None, **kwargs):
+        if "Crash Cake" in prompt and not (self.marker and os.path.exists(self.marker)):
+            if self.marker:
+                open(self.marker, "w").close()
+            os._exit(1)
+        return super().generate_content(prompt, stream=stream, **kwargs)
+
+
+def _profile(household_id, *usuals):
+    return {"household_id": household_id, "household_size": 2, "grocery_freq": 1, "stores": ["Walmart"],
+            "usuals": {"Pantry": list(usuals) or ["Rice"]}, "last_trip": "2026-10-10"}
+
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    # Workers are forked, so they inherit the stub
+    stub = CrashingModel(str(tmp_path / "crashed"))
+    monkeypatch.setitem(vars(ai_logic), "model", stub)
+    return stub
+
+
+def test_parse_profile_normalizes_and_rejects_bad_lines():
+    profile = parse_profile({"household_id": 7, "household_size": 0, "usuals": {"Dairy": ["Milk"]},
+                             "last_trip": "2026-10-10"})
+    assert profile["household_id"] == "7"
+    assert profile["household_size"] == 1
+    assert profile["last_trip"] == datetime.date(2026, 10, 10)
+
+    for row in (None, {}, {"household_id": "x", "last_trip": "yesterday"}):
+        with pytest.raises(ProfileError):
+            parse_profile(row)
+
+
+def test_completed_households_drops_a_torn_line_and_keeps_failures_pending(tmp_path):
+    out = tmp_path / "out.jsonl"
+    out.write_text('{"household_id": "a", "result": {}}\n{"household_id": "b", "error": "x"}\n{"household_')
+
+    assert completed_households(str(out)) == {"a"}
+    assert out.read_text().endswith('"error": "x"}\n')
+
+
+def test_resume_runs_each_remaining_household_once(tmp_path, model):
+    source = tmp_path / "households.jsonl"
+    rows = [_profile(f"h{i}") for i in range(5)] + [{"no": "id"}]
+    source.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    out = tmp_path / "out.jsonl"
+    out.write_text(json.dumps({"household_id": "h0", "result": {}}) + "\n")
+
+    totals = run_batch(str(source), str(out), workers=1, chunk_size=2)
+
+    assert (totals["households"], totals["errors"], totals["already_done"], totals["invalid"]) == (4, 0, 1, 1)
+    records = _records(out)
+    assert sorted(record["household_id"] for record in records) == ["h0", "h1", "h2", "h3", "h4"]
+    assert all("result" in record and record["inputs_key"] for record in records[1:])
+
+
+def test_a_dead_worker_only_reruns_its_unfinished_households(tmp_path, model):
+    source = tmp_path / "households.jsonl"
+    rows = [_profile("h0"), _profile("h1"), _profile("h2", "Crash Cake"), _profile("h3")]
+    source.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    out = tmp_path / "out.jsonl"
+
+    totals = run_batch(str(source), str(out), workers=1, chunk_size=2, llm_concurrency=2)
+
+    assert os.path.exists(model.marker)
+    records = _records(out)
+    assert sorted(record["household_id"] for record in records) == ["h0", "h1", "h2", "h3"]
+    assert all("result" in record for record in records)
+    assert totals["households"] == 4
+
+
+def test_households_whose_worker_keeps_dying_are_written_as_errors(tmp_path, monkeypatch):
+    monkeypatch.setitem(vars(ai_logic), "model", CrashingModel())
+    monkeypatch.setattr(batch_runner, "MAX_CHUNK_ATTEMPTS", 2)
+    source = tmp_path / "households.jsonl"
+    source.write_text(json.dumps(_profile("doomed", "Crash Cake")) + "\n")
+    out = tmp_path / "out.jsonl"
+
+    totals = run_batch(str(source), str(out), workers=1)
+
+    assert totals["errors"] == 1
+    assert _records(out)[0]["error"] == "worker process died"
+    assert completed_households(str(out)) == set()
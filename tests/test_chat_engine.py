@@ -0,0 +1,73 @@
+import threading
+
+from chat_engine import ConversationManager, StreamStats, stream_reply
+from stub_model import StubModel
+from token_budget import estimate_tokens
+
+
+def _model(**kwargs):
+    return StubModel(base_latency=0.0, per_token_latency=0.0, jitter=0.0, stream=True, **kwargs)
+
+
+def test_stream_reply_yields_every_chunk():
+    model = _model(chat_reply_words=40, chunk_tokens=4)
+    stats = StreamStats()
+    chunks = list(stream_reply("What can I cook tonight?", model=model, stats=stats))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == model._reply("What can I cook tonight?")
+    assert stats.first_token_s is not None
+    assert stats.total_s >= stats.first_token_s
+    assert stats.tokens == sum(estimate_tokens(chunk) for chunk in chunks)
+    assert not stats.cancelled
+
+
+def test_stream_reply_stops_at_the_next_chunk_when_cancelled():
+    cancel = threading.Event()
+    stats = StreamStats()
+    received = []
+    for chunk in stream_reply("Any ideas?", model=_model(chat_reply_words=40, chunk_tokens=4),
+                              cancel_event=cancel, stats=stats):
+        received.append(chunk)
+        cancel.set()
+
+    assert len(received) == 1
+    assert stats.cancelled
+    assert stats.total_s is not None
+
+
+def test_conversation_folds_old_turns_to_stay_under_budget():
+    # The budget has to leave room for the preamble and the capped summary
+    conversation = ConversationManager(preamble="You are Pantry AI.", token_budget=200, max_recent_turns=6,
+                                       summary_tokens=60, model=_model(chat_reply_words=30))
+    for turn in range(8):
+        reply = "".join(conversation.stream(f"Question {turn}: what goes with rice and spinach?"))
+        assert reply
+
+    assert all(tokens <= 200 for tokens in conversation.prompt_tokens)
+    assert max(conversation.prompt_tokens) > 100
+    assert conversation.summary_lines
+    assert len(conversation.turns) < 8
+    assert conversation.summary_lines[-1].startswith("User asked: Question")
+
+
+def test_conversation_keeps_at_most_max_recent_turns():
+    conversation = ConversationManager(token_budget=100_000, max_recent_turns=2, model=_model(chat_reply_words=5))
+    for turn in range(5):
+        list(conversation.stream(f"Question {turn}?"))
+    conversation.build("One more?")
+
+    assert [user_text for user_text, _ in conversation.turns] == ["Question 3?", "Question 4?"]
+    assert len(conversation.summary_lines) == 3
+
+
+def test_cancelled_turn_is_kept_with_the_partial_reply():
+    cancel = threading.Event()
+    conversation = ConversationManager(model=_model(chat_reply_words=40, chunk_tokens=4))
+    for _ in conversation.stream("Tell me about rice.", cancel_event=cancel):
+        cancel.set()
+
+    assert len(conversation.turns) == 1
+    user_text, reply = conversation.turns[0]
+    assert user_text == "Tell me about rice."
+    assert reply and len(reply) <= 16
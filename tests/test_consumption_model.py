@@ -0,0 +1,87 @@
+import datetime
+import random
+
+import numpy as np
+import pytest
+
+from consumption_model import HOUSEHOLD_EXPONENT, next_trip_date, predict_low_items, project_depletion
+from event_log import CONSUME, PURCHASE, ItemAggregate
+
+TODAY = datetime.date(2026, 3, 20)
+USUALS = {"Dairy": ["Whole Milk", "Butter"], "Produce": ["Spinach", "Kale"], "Pantry": ["Rice"]}
+
+
+def _day(days_ago):
+    return TODAY - datetime.timedelta(days=days_ago)
+
+
+def _aggregate(events):
+    agg = ItemAggregate()
+    for days_ago, kind, quantity in events:
+        agg.apply(_day(days_ago).toordinal(), kind, quantity)
+    return agg
+
+
+# One item at a time, as project_depletion did before it was vectorized
+def _scalar_remaining(projection, aggregates):
+    remaining = projection["lasts_days"] - projection["days_since"]
+    for i, item in enumerate(projection["items"]):
+        agg = aggregates.get(item)
+        if agg is None or not agg.last_quantity:
+            continue
+        learned = agg.remaining_days(TODAY)
+        remaining[i] = learned if learned is not None else (
+            projection["lasts_days"][i] * agg.stock / agg.last_quantity - projection["days_since"][i])
+    return remaining
+
+
+def test_pack_life_model_counts_from_the_last_purchase_or_trip():
+    projection = project_depletion(USUALS, 2, _day(10), TODAY, purchase_history={"Whole Milk": _day(3)})
+
+    assert projection["items"] == ["Whole Milk", "Butter", "Spinach", "Kale", "Rice"]
+    assert projection["days_since"].tolist() == [3, 10, 10, 10, 10]
+    # Kale falls back to the Produce pack life
+    assert projection["lasts_days"] == pytest.approx(np.array([8, 30, 5, 6, 45]) / 2 ** HOUSEHOLD_EXPONENT)
+    milk_left = 8 / 2 ** HOUSEHOLD_EXPONENT - 3
+    assert projection["remaining_days"][0] == pytest.approx(milk_left)
+    assert projection["depletion_dates"][0] == TODAY + datetime.timedelta(days=int(np.floor(milk_left)))
+    assert all(type(day) is datetime.date for day in projection["depletion_dates"])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_learned_state_matches_the_per_item_rules(seed):
+    rng = random.Random(seed)
+    aggregates = {}
+    for item in ("Whole Milk", "Butter", "Spinach", "Rice"):
+        bought = sorted(rng.sample(range(1, 40), rng.randint(1, 3)), reverse=True)
+        events = [(days_ago, PURCHASE, rng.choice([1, 2])) for days_ago in bought]
+        events += [(rng.randint(0, 5), CONSUME, 0.25) for _ in range(rng.randint(0, 2))]
+        aggregates[item] = _aggregate(events)
+    history = {"Whole Milk": _day(rng.randint(0, 20)), "Kale": _day(rng.randint(0, 20))}
+
+    projection = project_depletion(USUALS, rng.randint(1, 5), _day(12), TODAY, history, aggregates)
+
+    expected = _scalar_remaining(projection, aggregates)
+    assert projection["remaining_days"] == pytest.approx(expected)
+    assert projection["depletion_dates"] == [TODAY + datetime.timedelta(days=int(np.floor(d))) for d in expected]
+
+
+def test_rebought_items_use_the_observed_rate():
+    # Two 2-unit purchases 10 days apart: 0.2 units a day
+    aggregates = {"Rice": _aggregate([(14, PURCHASE, 2), (4, PURCHASE, 2)])}
+
+    projection = project_depletion(USUALS, 1, _day(4), TODAY, {}, aggregates)
+
+    assert projection["remaining_days"][4] == -4 + 10
+    assert projection["depletion_dates"][4] == _day(4) + datetime.timedelta(days=10)
+
+
+def test_low_items_are_those_running_out_before_the_next_trip_soonest_first():
+    # Kale has no history, so it counts from the last trip
+    history = {"Whole Milk": _day(1), "Butter": _day(1), "Spinach": _day(5), "Rice": _day(1)}
+
+    low, projection = predict_low_items(USUALS, 1, 1, _day(1), TODAY, history)
+
+    assert next_trip_date(_day(1), 1, TODAY) == _day(-6)
+    assert low == ["Spinach", "Kale"]
+    assert projection["remaining_days"][2:4].tolist() == [0, 5]
@@ -0,0 +1,142 @@
+import datetime
+import os
+
+import pytest
+
+import event_log
+from event_log import RECORD, EventLog, get_event_log
+
+TODAY = datetime.date(2026, 10, 1)
+
+
+def _days_ago(days):
+    return TODAY - datetime.timedelta(days=days)
+
+
+def _events():
+    return [
+        ("home", "Whole Milk", "purchase", 2, _days_ago(14)),
+        ("home", "Whole Milk", "purchase", 2, _days_ago(7)),
+        ("home", "Whole Milk", "consume", 1, _days_ago(5)),
+        ("home", "Eggs", "purchase", 12, _days_ago(3)),
+        ("cabin", "Whole Milk", "purchase", 1, _days_ago(1)),
+    ]
+
+
+def _summary(log, household):
+    return {item: agg.state() for item, agg in log.aggregates(household).items()}
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "pantry.events")
+
+
+def test_aggregates_track_purchases_and_rate():
+    log = EventLog()
+    log.append(_events())
+
+    milk = log.aggregate("home", "Whole Milk")
+    assert milk.purchases == 2
+    assert milk.last_purchase_date == _days_ago(7)
+    assert milk.consumed == 1
+    # Two units lasted the seven days between purchases
+    assert milk.rate == pytest.approx(2 / 7)
+    assert log.aggregate("cabin", "Whole Milk").last_purchase_date == _days_ago(1)
+    assert log.aggregate("home", "Butter") is None
+    assert len(log) == 5
+
+
+def test_reopen_replays_the_log(log_path):
+    log = EventLog(log_path)
+    log.append(_events())
+    expected = {household: _summary(log, household) for household in ("home", "cabin")}
+    log.close()
+
+    reopened = EventLog(log_path)
+    assert len(reopened) == 5
+    assert {household: _summary(reopened, household) for household in ("home", "cabin")} == expected
+
+
+def test_reopen_from_checkpoint_replays_only_newer_records(log_path):
+    log = EventLog(log_path)
+    log.append(_events()[:3])
+    log.checkpoint()
+    log.append(_events()[3:])
+    expected = _summary(log, "home")
+    log.close()
+
+    reopened = EventLog(log_path)
+    assert len(reopened) == 5
+    assert _summary(reopened, "home") == expected
+
+
+def test_torn_last_record_is_dropped(log_path):
+    log = EventLog(log_path)
+    log.append(_events())
+    log.close()
+    with open(log_path, "ab") as f:
+        f.write(RECORD.pack(TODAY.toordinal(), 0, 1, 1, 1.0)[:RECORD.size // 2])
+
+    reopened = EventLog(log_path)
+    assert len(reopened) == 5
+    reopened.append([("home", "Eggs", "consume", 2, TODAY)])
+    reopened.close()
+    assert len(EventLog(log_path)) == 6
+
+
+def test_backdated_purchase_does_not_move_last_purchase_back():
+    log = EventLog()
+    log.append([("home", "Butter", "purchase", 1, _days_ago(10)),
+                ("home", "Butter", "purchase", 1, _days_ago(1))])
+    before = log.aggregate("home", "Butter").stock
+    log.append([("home", "Butter", "purchase", 1, _days_ago(20))])
+
+    butter = log.aggregate("home", "Butter")
+    assert butter.last_purchase_date == _days_ago(1)
+    assert butter.stock == pytest.approx(before + 1)
+
+
+def test_logs_sharing_a_file_read_each_others_appends(log_path):
+    first, second = EventLog(log_path), EventLog(log_path)
+    first.append(_events()[:2])
+    second.append([("cabin", "Eggs", "purchase", 6, _days_ago(2))])
+    first.append([("home", "Eggs", "consume", 2, _days_ago(1))])
+
+    assert len(first) == 4
+    assert first.aggregate("cabin", "Eggs").purchases == 1
+    assert _summary(first, "home") == _summary(EventLog(log_path), "home")
+    # Name ids agree across writers: the reopened log sees each event under the right names
+    reopened = EventLog(log_path)
+    assert sorted(reopened.aggregates("cabin")) == ["Eggs"]
+    assert reopened.aggregate("home", "Eggs").consumed == 2
+
+
+def test_sync_appends_only_what_the_log_is_missing(log_path):
+    source = _events()
+    first, second = EventLog(log_path), EventLog(log_path)
+    first.sync(lambda count: source[count:3])
+    second.sync(lambda count: source[count:])
+    first.sync(lambda count: source[count:])
+
+    assert len(first) == len(second) == len(EventLog(log_path)) == 5
+    assert first.aggregate("home", "Whole Milk").purchases == 2
+
+
+def test_forked_child_opens_its_own_log_and_skips_the_exit_checkpoint(log_path, monkeypatch):
+    monkeypatch.setenv("PANTRY_EVENT_LOG", log_path)
+    monkeypatch.setattr(event_log, "_log", None)
+    monkeypatch.setattr(event_log, "_log_pid", None)
+    # As if this process had registered the exit checkpoint already
+    monkeypatch.setattr(event_log, "_atexit_pid", os.getpid())
+    parent = get_event_log()
+    parent.append(_events())
+
+    child_pid = os.getpid() + 1
+    monkeypatch.setattr(os, "getpid", lambda: child_pid)
+    child = get_event_log()
+    assert child is not parent
+    assert len(child) == 5
+
+    event_log._checkpoint_at_exit()
+    assert not os.path.exists(f"{log_path}.checkpoint")
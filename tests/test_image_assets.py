@@ -0,0 +1,59 @@
+import io
+import os
+
+import pytest
+
+import image_assets
+from image_assets import encode_variant, get_asset
+from recipe_corpus import clear_cache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setattr(image_assets, "ASSET_CACHE_DIR", str(path))
+    return path
+
+
+def _save(path, mode, size=(400, 200)):
+    Image.new(mode, size, (200, 40, 40, 128) if mode == "RGBA" else (200, 40, 40)).save(path)
+    return str(path)
+
+
+def _decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_opaque_images_become_progressive_jpegs_at_the_served_width(tmp_path):
+    data, fmt = encode_variant(_save(tmp_path / "photo.png", "RGB"), 100)
+
+    image = _decode(data)
+    assert (fmt, image.format, image.size) == ("jpg", "JPEG", (100, 50))
+    assert image.info.get("progressive") or image.info.get("progression")
+
+
+def test_transparent_images_stay_png_and_small_images_keep_their_size(tmp_path):
+    data, fmt = encode_variant(_save(tmp_path / "logo.png", "RGBA", (40, 40)), 100)
+
+    image = _decode(data)
+    assert (fmt, image.format, image.size) == ("png", "PNG", (40, 40))
+    assert image.mode == "P"
+
+
+def test_variants_are_saved_and_reused_until_the_source_changes(tmp_path, cache_dir, monkeypatch):
+    path = _save(tmp_path / "walmart.png", "RGB")
+    first = get_asset(path)
+    assert _decode(first).size == (50, 25)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A fresh process finds the saved variant instead of resizing again
+    clear_cache()
+    monkeypatch.setattr(image_assets, "encode_variant", None)
+    assert get_asset(path) == first
+
+    monkeypatch.setattr(image_assets, "encode_variant", encode_variant)
+    _save(path, "RGB", (300, 300))
+    assert _decode(get_asset(path)).size == (50, 50)
+    assert len(os.listdir(cache_dir)) == 2
@@ -0,0 +1,12 @@
+import subprocess
+import sys
+
+import check_import_time
+
+
+def test_imports_stay_within_budget_and_lazy():
+    result = subprocess.run([sys.executable, check_import_time.__file__], capture_output=True, text=True,
+                            timeout=120)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert [line.split()[0] for line in result.stdout.splitlines()] == ["ok"] * len(check_import_time.BUDGET_MS)
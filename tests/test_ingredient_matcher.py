@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from ingredient_matcher import PantryMatcher, singular, tokenize
+
+
+def _recipe(title, *ingredients):
+    return SimpleNamespace(title=title, ingredients=list(ingredients))
+
+
+def test_plurals_fold_to_the_singular():
+    assert singular("tomatoes") == "tomato"
+    assert singular("berries") == "berry"
+    assert singular("peaches") == "peach"
+    assert singular("eggs") == "egg"
+    assert singular("glass") == "glass"
+    assert singular("hummus") == "hummus"
+    assert tokenize("2 Cups Chopped Tomatoes") == ["cup", "chopped", "tomato"]
+
+
+def test_matches_whole_word_phrases_only():
+    matcher = PantryMatcher(["Olive Oil", "Rice"], [])
+
+    assert matcher.scan(_recipe("Pilaf", "2 tbsp olive oil", "1 cup rice")) == ["Olive Oil", "Rice"]
+    assert matcher.scan(_recipe("Pasta", "boil the pasta", "licorice")) == []
+    # A phrase can't straddle two ingredient lines
+    assert matcher.scan(_recipe("Salad", "1 olive", "oil to taste")) == []
+
+
+def test_surplus_items_come_back_in_pantry_order():
+    matcher = PantryMatcher(["Spinach", "Eggs", "Bread"], [])
+
+    assert matcher.scan(_recipe("Toast", "2 slices bread", "1 egg", "spinach leaves")) == ["Spinach", "Eggs", "Bread"]
+
+
+def test_title_counts_for_surplus_items():
+    matcher = PantryMatcher(["Spinach"], ["Milk"])
+
+    assert matcher.scan(_recipe("Spinach Pie", "flour", "butter")) == ["Spinach"]
+
+
+def test_low_stock_ingredient_rejects_the_recipe():
+    matcher = PantryMatcher(["Rice"], ["Whole Milk"])
+
+    assert matcher.scan(_recipe("Rice Pudding", "1 cup rice", "2 cups whole milk")) is None
+    # Only ingredients count against a recipe, not its title
+    assert matcher.scan(_recipe("Whole Milk Rice", "1 cup rice")) == ["Rice"]
@@ -0,0 +1,33 @@
+import datetime
+
+from item_registry import ItemRegistry
+
+
+def test_spellings_share_one_id():
+    items = ItemRegistry()
+    milk = items.register("Whole Milk", aliases=["whole milk 2%"])
+
+    assert items.id_of("whole  milks") == milk
+    assert items.id_of("Whole Milk 2%") == milk
+    assert items.canonical("WHOLE MILK") == "Whole Milk"
+
+
+def test_misses_are_counted_not_registered():
+    items = ItemRegistry()
+    items.register("Eggs")
+
+    assert items.id_of("Dragonfruit Jam") is None
+    assert items.id_of("dragonfruit jam") is None
+    assert len(items) == 1
+    stats = items.stats()
+    assert stats["misses"] == 2
+    assert stats["top_misses"] == [("dragonfruit jam", 2)]
+
+
+def test_keyed_keeps_the_latest_value_per_id():
+    items = ItemRegistry()
+    chicken = items.register("Chicken Breast")
+    older, newer = datetime.date(2026, 9, 1), datetime.date(2026, 10, 1)
+
+    assert items.keyed({"Chicken Breast": older, "chicken breasts": newer, "Tofu": newer}) == {chicken: newer}
+    assert items.keyed({"chicken breasts": newer, "Chicken Breast": older}) == {chicken: newer}
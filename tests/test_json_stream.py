@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from json_stream import ArrayItemStream, ParseStats, extract_json
+
+REPLY = {"shopping_list": [
+    {"item": "Whole Milk", "reason": "Runs out {soon}"},
+    {"item": "Eggs", "reason": "Says \"low\" ]"},
+    {"item": "Bread", "reason": "Weekly", "tags": [{"a": 1}]},
+]}
+
+
+def test_extract_json_skips_fences_and_prose():
+    text = "Sure! Here is {not json}:\n```json\n" + json.dumps(REPLY) + "\n```\nEnjoy {cooking}."
+    assert extract_json(text) == REPLY
+
+
+def test_extract_json_raises_without_an_object():
+    with pytest.raises(ValueError):
+        extract_json("I couldn't build a list [sorry]")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_array_items_arrive_as_they_close(chunk_size):
+    text = "```json\n" + json.dumps(REPLY) + "\n```"
+    items = ArrayItemStream("shopping_list")
+    seen = []
+    for start in range(0, len(text), chunk_size):
+        seen += items.feed(text[start:start + chunk_size])
+
+    assert seen == REPLY["shopping_list"]
+    assert items.done
+    assert items.skipped == 0
+
+
+def test_array_item_is_returned_before_the_reply_ends():
+    items = ArrayItemStream("shopping_list")
+    assert items.feed('{"shopping_list": [{"item": "Eg') == []
+    assert items.feed('gs"}, {"item": "Br') == [{"item": "Eggs"}]
+    assert items.feed('ead"}]}') == [{"item": "Bread"}]
+    assert items.feed('{"ignored": true}') == []
+
+
+def test_bad_array_items_are_skipped():
+    items = ArrayItemStream("shopping_list")
+    assert items.feed('{"shopping_list": [{"item": Eggs}, "text", {"item": "Rice"}]}') == [{"item": "Rice"}]
+    assert items.skipped == 1
+
+
+def test_parse_stats_failure_rate():
+    stats = ParseStats()
+    stats.record("shopping_list", True)
+    stats.record("shopping_list", False)
+    stats.record("recipes", True)
+
+    totals = stats.stats()
+    assert totals["attempts"] == 3
+    assert totals["failure_rate"] == pytest.approx(1 / 3)
+    assert totals["by_kind"]["shopping_list"]["failure_rate"] == pytest.approx(0.5)
@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from llm_cache import MemoryBackend, NullCache, ResponseCache, SQLiteBackend, canonical_key
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=2)
+    return SQLiteBackend(str(tmp_path / "cache.db"), max_entries=2)
+
+
+def test_key_ignores_case_whitespace_and_order():
+    a = canonical_key("shopping_list", items=["Whole Milk", "eggs"], household_size=4,
+                      last_trip=datetime.date(2026, 10, 1))
+    b = canonical_key("shopping_list", last_trip=datetime.date(2026, 10, 1), household_size=4,
+                      items=["EGGS", "whole  milk"])
+    assert a == b
+    assert a != canonical_key("recipes", items=["Whole Milk", "eggs"], household_size=4,
+                              last_trip=datetime.date(2026, 10, 1))
+    assert a != canonical_key("shopping_list", items=["Whole Milk"], household_size=4,
+                              last_trip=datetime.date(2026, 10, 1))
+
+
+def test_hit_returns_a_fresh_copy(backend):
+    cache = ResponseCache(backend)
+    cache.set("k", {"shopping_list": [{"item": "Eggs"}]})
+
+    first = cache.get("k")
+    first["shopping_list"].clear()
+    assert cache.get("k") == {"shopping_list": [{"item": "Eggs"}]}
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(backend):
+    cache = ResponseCache(backend, ttl_seconds=60)
+    cache.set("k", {"value": 1})
+    stored_at, text = backend.get("k")
+    backend.set("k", stored_at - 61, text)
+
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+    assert len(backend) == 0
+
+
+def test_least_recently_used_entry_is_evicted(backend):
+    cache = ResponseCache(backend)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_sqlite_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(SQLiteBackend(path)).set("k", {"recipes": []})
+
+    assert ResponseCache(SQLiteBackend(path)).get("k") == {"recipes": []}
+
+
+def test_null_cache_stores_nothing():
+    cache = NullCache()
+    cache.set("k", 1)
+    assert cache.get("k") is None
+
+
+def test_prompt_changes_get_new_keys(monkeypatch):
+    import ai_logic
+
+    inputs = {"household_size": 4, "low_items": ["Eggs"]}
+    before = ai_logic._cache_key("shopping_list", inputs)
+    assert ai_logic._cache_key("shopping_list", inputs) == before
+
+    monkeypatch.setattr(ai_logic, "PROMPT_VERSION", "changed")
+    assert ai_logic._cache_key("shopping_list", inputs) != before
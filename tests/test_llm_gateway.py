@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from llm_gateway import PriorityTokenBucket, RateLimitedModel, retry_after_seconds
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class RecordingModel:
+    """Fails the first `failures` calls with a rate-limit error, then answers."""
+
+    def __init__(self, failures=0, error="429 Resource has been exhausted"):
+        self.failures = failures
+        self.error = error
+        self.calls = []
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) <= self.failures:
+            raise RateLimited(self.error)
+        return contents.upper()
+
+
+@pytest.mark.parametrize("message, seconds", [
+    ("429 Please retry in 12.5s.", 12.5),
+    ('{"retryDelay": "7s"}', 7.0),
+    ("429 Quota exceeded [violations {\n}\n, retry_delay {\n  seconds: 37\n}\n]", 37.0),
+    ("retry_delay {\n  seconds: 2\n  nanos: 500000000\n}", 2.5),
+    ("500 Internal error", None),
+])
+def test_retry_after_seconds(message, seconds):
+    assert retry_after_seconds(RateLimited(message)) == seconds
+
+
+def test_acquire_gives_up_at_the_deadline_without_a_token():
+    bucket = PriorityTokenBucket(rate_per_sec=1 / 60, capacity=1)
+    bucket.acquire()
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        bucket.acquire(deadline=start + 0.1)
+    assert time.monotonic() - start < 1.0
+    assert bucket.queue_depth == 0
+
+
+def test_request_is_sent_with_the_time_left():
+    model = RecordingModel()
+    gateway = RateLimitedModel(model, requests_per_minute=600)
+
+    assert gateway.generate_content("hi", request_options={"timeout": 5.0}) == "HI"
+    assert 0 < model.calls[0]["request_options"]["timeout"] <= 5.0
+
+
+def test_retries_stop_once_the_backoff_would_pass_the_deadline():
+    model = RecordingModel(failures=10, error="429 Please retry in 30s")
+    gateway = RateLimitedModel(model, requests_per_minute=600, base_delay=0.01)
+
+    start = time.monotonic()
+    with pytest.raises(RateLimited):
+        gateway.generate_content("hi", request_options={"timeout": 1.0})
+    assert time.monotonic() - start < 1.0
+    assert len(model.calls) == 1
+
+
+def test_retryable_errors_are_retried():
+    model = RecordingModel(failures=2)
+    gateway = RateLimitedModel(model, requests_per_minute=600, base_delay=0.01)
+
+    assert gateway.generate_content("hi", request_options={"timeout": 5.0}) == "HI"
+    assert gateway.metrics()["retries"] == 2
+
+
+class BlockingModel:
+    """Answers only once `release` is set."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(10)
+        return contents.upper()
+
+
+def test_coalesced_callers_share_one_request():
+    model = BlockingModel()
+    gateway = RateLimitedModel(model, requests_per_minute=600)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(gateway.generate_content("hi")))
+    leader.start()
+    model.started.wait(5)
+
+    follower = threading.Thread(target=lambda: results.append(gateway.generate_content("hi")))
+    follower.start()
+    time.sleep(0.05)
+    model.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results == ["HI", "HI"]
+    assert model.calls == 1
+    assert gateway.metrics()["coalesced"] == 1
+
+
+def test_coalesced_caller_times_out_at_its_own_deadline():
+    model = BlockingModel()
+    gateway = RateLimitedModel(model, requests_per_minute=600)
+    options = {"timeout": 0.2}
+    leader = threading.Thread(target=gateway.generate_content, args=("hi",), kwargs={"request_options": options})
+    leader.start()
+    model.started.wait(5)
+
+    start = time.monotonic()
+    try:
+        with pytest.raises(TimeoutError):
+            gateway.generate_content("hi", request_options=options)
+        assert time.monotonic() - start < 1.0
+        assert model.calls == 1
+    finally:
+        model.release.set()
+        leader.join(5)
@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+import data_engine
+from pantry_store import CONSUME, PURCHASE, PantryStore
+
+DAY = datetime.date(2026, 3, 1)
+
+
+def _day(offset):
+    return DAY + datetime.timedelta(days=offset)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PantryStore(str(tmp_path / "pantry.db"))
+    yield store
+    store.close()
+
+
+def test_households_round_trip_and_usuals_are_replaced(store):
+    store.save_household("h1", 3, 2, _day(0), ["Costco"], {"Dairy": ["Whole Milk", "Butter"]})
+    store.save_household("h1", 4, 1, None, ["Walmart", "Target"], {"Produce": ["Spinach"]})
+
+    assert store.load_household("h1") == {"household_size": 4, "grocery_freq": 1, "last_trip": None,
+                                          "stores": ["Walmart", "Target"], "usuals": {"Produce": ["Spinach"]}}
+    assert store.load_household("h2") is None
+
+
+def test_last_purchase_only_moves_forward(store):
+    store.record_events([("h1", "Rice", PURCHASE, 1, _day(5)), ("h1", "Rice", PURCHASE, 1, _day(2)),
+                         ("h1", "Rice", CONSUME, 0.25, _day(9)), ("h2", "Rice", PURCHASE, 1, _day(1))])
+
+    assert store.last_purchase("h1", "Rice") == _day(5)
+    assert store.last_purchases("h2") == {"Rice": _day(1)}
+    assert store.has_history("h1") and not store.has_history("h3")
+
+
+def test_items_older_than_is_oldest_first(store):
+    store.record_events([("h1", item, PURCHASE, 1, _day(offset))
+                         for item, offset in [("Eggs", 8), ("Rice", 0), ("Milk", 3), ("Kale", 12)]])
+
+    assert store.items_older_than("h1", 5, today=_day(14)) == [("Rice", _day(0)), ("Milk", _day(3)),
+                                                                ("Eggs", _day(8))]
+
+
+def test_events_after_returns_the_rest_in_write_order(store):
+    events = [("h1", "Eggs", PURCHASE, 2.0, _day(3)), ("h2", "Rice", CONSUME, 0.25, _day(1)),
+              ("h1", "Eggs", CONSUME, 0.5, _day(4))]
+    store.record_events(events)
+
+    assert store.events_after(0) == events
+    assert store.events_after(2) == events[2:]
+    assert store.events_after(3) == []
+
+
+def test_a_failed_log_append_is_caught_up_from_the_store(monkeypatch):
+    from event_log import EventLog
+
+    def crash(self, events_after):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(EventLog, "sync", crash)
+        with pytest.raises(OSError):
+            data_engine.record_purchases("store-first", ["Rice"], day=_day(0))
+
+    # The purchase was committed, and the log replays it on next use
+    assert data_engine.purchase_history("store-first") == {"Rice": _day(0)}
+    assert data_engine.item_aggregates("store-first")["Rice"].last_purchase_date == _day(0)
+    data_engine.record_purchases("store-first", ["Rice"], day=_day(4))
+    assert data_engine.item_aggregates("store-first")["Rice"].purchases == 2
+
+
+def test_seeding_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(data_engine, "SEED_DEMO_HISTORY", False)
+    monkeypatch.setattr(data_engine, "DEMO_HISTORY", True)
+
+    assert data_engine.purchase_history("never-seeded") == {}
+
+    monkeypatch.setattr(data_engine, "SEED_DEMO_HISTORY", True)
+    data_engine.seed_demo_history(["seeded-ahead"])
+    assert data_engine.purchase_history("seeded-ahead") == data_engine.MOCK_PURCHASE_HISTORY
@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from data_engine import find_best_alternative, find_category_substitute, find_cheapest_store, price_basket
+
+BASKET = ["Whole Milk", "Eggs", "Bread", "Oat Milk", "Almond Butter", "Dragonfruit Jam"]
+STORES = ["Walmart", "Costco", "Target"]
+
+
+def test_entries_match_the_single_item_lookups():
+    priced = price_basket(BASKET, STORES)
+
+    assert priced["items"] == BASKET
+    assert priced["price"].shape == (len(BASKET), len(STORES))
+    for i, item in enumerate(BASKET):
+        assert priced["cheapest"][i] == find_cheapest_store(item, STORES)
+        assert priced["alternatives"][i] == find_best_alternative(item, STORES)
+        assert priced["substitutes"][i] == find_category_substitute(item, STORES)
+        cheapest = priced["cheapest"][i]
+        if cheapest is None:
+            assert math.isnan(priced["cheapest_price"][i])
+        else:
+            assert priced["cheapest_price"][i] == cheapest["price"]
+
+
+def test_totals_and_the_single_store_vs_split_comparison():
+    priced = price_basket(["Whole Milk", "Eggs", "Bread"], STORES)
+
+    # In stock: milk everywhere, eggs at Walmart and Target, bread at Walmart and Costco
+    assert priced["store_totals"] == pytest.approx({"Walmart": 3.48 + 3.99 + 2.99, "Costco": 2.99 + 3.50,
+                                                    "Target": 3.79 + 4.25})
+    assert priced["store_missing"] == {"Walmart": 0, "Costco": 1, "Target": 1}
+    assert priced["single_store"] == {"store": "Walmart", "total": pytest.approx(10.46), "missing": 0}
+    assert priced["split"] == {"total": pytest.approx(2.99 + 3.99 + 2.99), "missing": 0}
+
+
+def test_unknown_items_and_no_stores():
+    priced = price_basket(["Dragonfruit Jam"], STORES)
+    assert priced["cheapest"] == [None]
+    assert priced["split"]["missing"] == 1
+
+    empty = price_basket(["Whole Milk"], [])
+    assert empty["cheapest"] == [None]
+    assert empty["single_store"] is None
@@ -0,0 +1,87 @@
+import datetime
+import types
+
+import pytest
+
+import ai_logic
+from prompt_builder import PANTRY_HEADING, low_items_prompt, recipes_prompt, shopping_prompt
+from token_budget import TokenStats, estimate_tokens
+
+LAST_TRIP = datetime.date(2026, 10, 10)
+PANTRY = {"Produce": ["Spinach", "Onions"], "Dairy": ["Whole Milk", "Butter", "Cheddar Cheese"]}
+AGES = {"Spinach": 14, "Onions": 21, "Butter": 30, "Whole Milk": 2}
+
+
+def _context(prompt):
+    lines = prompt.text.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.startswith("Household:"))
+    end = next(i for i, line in enumerate(lines) if line.startswith(("Rules:", "Output JSON:")))
+    return lines[start:end]
+
+
+def test_compact_context_is_deterministic_and_lists_low_items_once():
+    prompt = shopping_prompt(4, LAST_TRIP, PANTRY, ["Whole Milk", "Eggs", "Whole Milk"], AGES)
+
+    assert _context(prompt) == [
+        "Household: 4 people, last trip 2026-10-10",
+        "Low (must buy): Whole Milk~2d, Eggs",
+        PANTRY_HEADING,
+        "Dairy: Butter~30d, Cheddar Cheese",
+        "Produce: Onions~21d, Spinach~14d",
+    ]
+    assert prompt.omitted == 0
+    assert prompt.tokens == estimate_tokens(prompt.text)
+    reordered = {"Dairy": ["Cheddar Cheese", "Butter", "Whole Milk"], "Produce": ["Onions", "Spinach"]}
+    assert shopping_prompt(4, LAST_TRIP, reordered, ["Whole Milk", "Eggs"], AGES).text == prompt.text
+
+
+@pytest.mark.parametrize("build", [recipes_prompt, shopping_prompt])
+def test_budget_drops_the_newest_pantry_items_first(build):
+    pantry = {"Pantry": [f"Item {i:03d}" for i in range(300)]}
+    ages = {f"Item {i:03d}": i for i in range(300)}
+
+    prompt = build(3, LAST_TRIP, pantry, ["Eggs"], ages, budget=200)
+
+    assert prompt.tokens <= 200
+    assert prompt.omitted > 0
+    assert f"(+{prompt.omitted} more pantry items not listed)" in prompt.text
+    assert "Eggs" in prompt.text and "Item 299~299d" in prompt.text
+    assert "Item 000" not in prompt.text
+
+
+def test_low_items_are_cut_last_and_counted():
+    prompt = low_items_prompt(2, 5, PANTRY, [f"Low {i}" for i in range(200)], budget=120)
+
+    assert prompt.tokens <= 120
+    assert "Household: 2 people, 5 days since last trip" in prompt.text
+    assert "Projected low: Low 0, Low 1" in prompt.text
+    assert f"(+{prompt.omitted - 5} more)" in prompt.text
+    assert "(+5 more pantry items not listed)" in prompt.text
+
+
+def test_estimate_tokens_rounds_up():
+    assert [estimate_tokens(text) for text in ("", "abc", "abcd", "abcde")] == [0, 1, 1, 2]
+
+
+def test_token_stats_totals_by_kind():
+    stats = TokenStats()
+    stats.record("recipes", 100, 40)
+    stats.record("recipes", 300, 60)
+    stats.record("shopping_list", 50, 10)
+
+    totals = stats.stats()
+    assert (totals["calls"], totals["prompt_tokens"], totals["response_tokens"]) == (3, 450, 110)
+    assert totals["by_kind"]["recipes"] == {"calls": 2, "prompt_tokens": 400, "response_tokens": 100,
+                                            "mean_prompt_tokens": 200}
+
+
+def test_calls_are_counted_from_usage_metadata_when_the_response_has_it(monkeypatch):
+    stats = TokenStats()
+    monkeypatch.setattr(ai_logic, "TOKEN_STATS", stats)
+
+    ai_logic._record_tokens("recipes", "x" * 400, "y" * 40,
+                            types.SimpleNamespace(prompt_token_count=90, candidates_token_count=12))
+    ai_logic._record_tokens("recipes", "x" * 400, "y" * 40)
+
+    assert stats.stats()["by_kind"]["recipes"]["prompt_tokens"] == 90 + 100
+    assert stats.stats()["response_tokens"] == 12 + 10
@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+
+import pytest
+
+from recipe_corpus import Recipe, clear_cache, load_cached, load_recipes
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps([
+        {"title": "Rice Bowl", "ingredients": ["1 cup rice", None, "1 tsp salt"], "directions": ["Cook."]},
+        {"title": None, "ingredients": None, "directions": None},
+    ]))
+    yield str(path)
+    clear_cache()
+
+
+def test_recipes_are_parsed_into_compact_records(dataset):
+    recipes = load_recipes(dataset)
+
+    assert all(isinstance(recipe, Recipe) for recipe in recipes)
+    assert recipes[0].title == "Rice Bowl"
+    assert recipes[0].ingredients == ("1 cup rice", "1 tsp salt")
+    assert recipes[0].directions == ("Cook.",)
+    assert (recipes[1].title, recipes[1].ingredients, recipes[1].directions) == ("", (), ())
+
+
+def test_loaded_once_and_shared(dataset):
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(load_cached(dataset, loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_reloaded_when_the_file_changes(dataset):
+    first = load_recipes(dataset)
+    with open(dataset, "w") as f:
+        json.dump([{"title": "Soup", "ingredients": ["water"], "directions": []}], f)
+    stat = os.stat(dataset)
+    os.utime(dataset, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = load_recipes(dataset)
+    assert second is not first
+    assert [recipe.title for recipe in second] == ["Soup"]
+    assert load_recipes(dataset) is second
@@ -0,0 +1,115 @@
+import json
+import os
+import random
+
+import pytest
+
+from recipe_corpus import clear_cache
+from recipe_index import RecipeIndex, build_index, count_score, get_recipe_index, index_path_for, save_index, top_k
+
+RECIPES = [
+    {"title": "Spinach Rice Bowl", "ingredients": ["1 cup rice", "2 cups spinach", "1 tbsp olive oil"],
+     "directions": ["Cook the rice.", "Wilt the spinach."]},
+    {"title": "Tomato Soup", "ingredients": ["4 tomatoes", "1 onion", "2 cups whole milk"],
+     "directions": ["Simmer."]},
+    {"title": "Oil-Free Salad", "ingredients": ["olives", "spinach leaves"], "directions": ["Toss."]},
+    {"title": "Boiled Eggs", "ingredients": ["6 eggs", "salt"], "directions": ["Boil the eggs."]},
+]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(RECIPES))
+    yield str(path)
+    clear_cache()
+
+
+def test_lookup_is_by_whole_plural_folded_tokens(dataset):
+    index = build_index(dataset)
+
+    assert index.recipes_with("Spinach") == {0, 2}
+    assert index.recipes_with("tomato") == {1}
+    assert index.recipes_with("egg") == {3}
+    # Every token must be present, in the ingredients or in the title
+    assert index.recipes_with("olive oil") == {0}
+    assert index.recipes_with("oil") == {0, 2}
+    assert index.recipes_with("bread") == frozenset()
+    assert index.recipes_with("  ") == frozenset()
+
+
+def test_candidates_list_the_surplus_items_each_recipe_might_use(dataset):
+    index = build_index(dataset)
+
+    assert index.candidates(["spinach", "rice", "eggs"]) == {0: ["spinach", "rice"], 2: ["spinach"], 3: ["eggs"]}
+
+
+def test_index_survives_a_pickle_round_trip(dataset):
+    save_index(build_index(dataset), dataset)
+    loaded = get_recipe_index(dataset)
+
+    assert isinstance(loaded, RecipeIndex)
+    assert [recipe.title for recipe in loaded.recipes] == [recipe["title"] for recipe in RECIPES]
+    assert loaded.recipes_with("spinach") == {0, 2}
+
+
+def test_stale_persisted_index_is_not_used(dataset):
+    save_index(build_index(dataset), dataset)
+    with open(dataset, "w") as f:
+        json.dump(RECIPES + [{"title": "Kale Chips", "ingredients": ["1 bunch kale"], "directions": []}], f)
+
+    index = get_recipe_index(dataset)
+    assert index.recipes_with("kale") == {4}
+    assert os.path.exists(index_path_for(dataset))
+
+
+def test_missing_index_is_built_in_memory_once(dataset):
+    first = get_recipe_index(dataset)
+
+    assert get_recipe_index(dataset) is first
+    assert not os.path.exists(index_path_for(dataset))
+
+
+def test_search_ranks_by_surplus_items_and_skips_low_stock(dataset):
+    index = build_index(dataset)
+
+    best = index.search(["spinach", "rice", "onion", "tomatoes"], ["whole milk"], k=3)
+    assert [(score, rid) for score, rid, _ in best] == [(2, 0), (1, 2)]
+    assert best[0][2] == ["spinach", "rice"]
+
+
+def _brute_force(candidates, k, score_fn, verify):
+    entries = []
+    for rid, clears_out in candidates.items():
+        clears_out = verify(rid)
+        if clears_out:
+            entries.append((score_fn(clears_out), -rid, clears_out))
+    entries.sort(reverse=True)
+    return [(score, -neg_rid, clears_out) for score, neg_rid, clears_out in entries[:k]]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_top_k_matches_a_full_sort(seed):
+    rng = random.Random(seed)
+    items = [f"item{i}" for i in range(6)]
+    candidates = {rid: rng.sample(items, rng.randint(1, 6)) for rid in rng.sample(range(500), 80)}
+    # Verification drops some candidates and confirms a subset of the rest
+    confirmed = {rid: [item for item in found if rng.random() < 0.7] for rid, found in candidates.items()}
+
+    expected = _brute_force(candidates, 5, count_score, confirmed.get)
+    assert top_k(candidates, 5, count_score, verify=confirmed.get) == expected
+
+
+def test_top_k_stops_once_no_candidate_can_beat_the_kth_best():
+    candidates = {rid: ["a"] for rid in range(1000)}
+    candidates.update({2000: ["a", "b", "c"], 2001: ["a", "b", "c"]})
+    verified = []
+
+    def verify(rid):
+        verified.append(rid)
+        return candidates[rid]
+
+    best = top_k(candidates, 2, count_score, verify=verify)
+    assert [rid for _, rid, _ in best] == [2000, 2001]
+    assert verified == [2000, 2001]
+    assert top_k(candidates, 0) == []
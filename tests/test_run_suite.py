@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import ai_logic
+from recipe_corpus import clear_cache
+from run_suite import compare
+from stub_model import StubModel
+from synthetic import make_pantry, make_recipe_corpus, make_store_catalog, write_recipe_corpus
+
+
+class FailingRecipesModel(StubModel):
+    def generate_content(self, prompt, stream=None, **kwargs):
+        if '"recipes"' in prompt:
+            raise RuntimeError("recipes unavailable")
+        return super().generate_content(prompt, stream=stream, **kwargs)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    yield write_recipe_corpus(str(tmp_path / "recipes.json"), 200)
+    clear_cache()
+
+
+def _result(case, best, **params):
+    return {"case": case, "params": params, "min": best}
+
+
+def test_synthetic_data_is_the_same_for_a_seed(corpus):
+    assert make_recipe_corpus(50, seed=3) == make_recipe_corpus(50, seed=3)
+    assert make_recipe_corpus(50, seed=3) != make_recipe_corpus(50, seed=4)
+    assert make_store_catalog(100, 4, seed=1) == make_store_catalog(100, 4, seed=1)
+    assert make_pantry(10) == make_pantry(10)
+    with open(corpus) as f:
+        assert json.load(f) == make_recipe_corpus(200)
+
+
+def test_compare_flags_only_cases_past_the_tolerance():
+    baseline = {"results": [_result("a", 10.0, items=10), _result("b", 10.0), _result("c", 10.0), _result("z", 0)]}
+    results = [_result("a", 11.0, items=10), _result("b", 13.0), _result("c", 5.0), _result("a", 1.0, items=99),
+               _result("z", 1.0)]
+
+    rows, regressed = compare(results, baseline, tolerance=0.2)
+
+    assert [(row["compare"], row["status"]) for row in rows] == [
+        ("a[items=10]", "ok"), ("b", "slower"), ("c", "faster"), ("a[items=99]", "new"), ("z", "new")]
+    assert rows[1]["ratio"] == 1.3
+    assert regressed
+    assert not compare(results[:1], baseline, tolerance=0.2)[1]
+
+
+def test_failed_recipe_calls_fall_back_to_the_configured_corpus(corpus, monkeypatch):
+    monkeypatch.setattr(ai_logic, "RECIPE_DATASET", corpus)
+    monkeypatch.setitem(vars(ai_logic), "model", FailingRecipesModel(base_latency=0.0, per_token_latency=0.0,
+                                                                       jitter=0.0))
+    pantry = {"Pantry": ["Rice", "Onions", "Garlic"], "Dairy": ["Butter"]}
+
+    result = ai_logic.generate_shopping_list(2, 2, ["Walmart"], pantry, None, [], household_id="bench-test")
+
+    assert "recipes unavailable" in result["error"]
+    assert len(result["recipes"]) == 3
@@ -0,0 +1,158 @@
+import copy
+import itertools
+import math
+import random
+
+import pytest
+
+import data_engine
+from data_engine import StoreCatalog, find_best_alternative, find_category_substitute, find_cheapest_store
+
+STORES = list(data_engine.LIVE_STORE_DATA)
+ITEM_NAMES = sorted({item for inventory in data_engine.LIVE_STORE_DATA.values() for item in inventory}) + ["Kale"]
+STORE_LISTS = [list(stores) for n in (1, 2, 3) for stores in itertools.permutations(STORES, n)]
+
+
+def _offer(category, stock, price, brand="Brand"):
+    return {"brand": brand, "category": category, "stock": stock, "price": price}
+
+
+def _assert_same(incremental, rebuilt):
+    assert incremental.store_data == rebuilt.store_data
+    assert incremental.stores == rebuilt.stores
+    assert incremental.category == rebuilt.category
+    assert incremental.offers == rebuilt.offers
+    assert incremental.in_stock == rebuilt.in_stock
+
+
+@pytest.fixture
+def store_data():
+    return copy.deepcopy(data_engine.LIVE_STORE_DATA)
+
+
+# Straight scans of the catalog, as data_engine did before it was indexed
+def _scan_cheapest(store_data, item, stores):
+    best = None
+    for store in stores:
+        data = store_data.get(store, {}).get(item)
+        if data and data["stock"] > 0 and (best is None or data["price"] < best[1]["price"]):
+            best = (store, data)
+    return best
+
+
+def _scan_alternative(store_data, item, excluded):
+    for store, inventory in store_data.items():
+        data = inventory.get(item)
+        if store not in excluded and data and data["stock"] > 0:
+            return store, data
+    return None
+
+
+def _scan_substitute(store_data, item, stores):
+    category = next((store_data[s][item]["category"] for s in store_data if item in store_data[s]), None)
+    if category is None or not any(item in store_data.get(store, {}) for store in stores):
+        return None
+    for store in stores:
+        for alt_item, data in store_data.get(store, {}).items():
+            if data["category"] == category and data["stock"] > 0:
+                return alt_item, store, data
+    return None
+
+
+@pytest.mark.parametrize("stores", STORE_LISTS)
+def test_indexed_lookups_match_a_catalog_scan(store_data, stores):
+    catalog = StoreCatalog(store_data)
+    for item in ITEM_NAMES:
+        assert catalog.cheapest(item, stores) == _scan_cheapest(store_data, item, stores)
+        assert catalog.alternative(item, stores) == _scan_alternative(store_data, item, stores)
+        assert catalog.substitute(item, stores) == _scan_substitute(store_data, item, stores)
+
+
+def test_cheapest_tie_goes_to_the_store_listed_first(store_data):
+    store_data["Target"]["Whole Milk"] = _offer("Dairy", 5, store_data["Costco"]["Whole Milk"]["price"])
+    catalog = StoreCatalog(store_data)
+
+    assert catalog.cheapest("Whole Milk", ["Target", "Costco"])[0] == "Target"
+    assert catalog.cheapest("Whole Milk", ["Costco", "Target"])[0] == "Costco"
+
+
+def test_public_lookups_use_the_live_catalog():
+    assert find_cheapest_store("Whole Milk", ["Walmart", "Costco"])["store"] == "Costco"
+    # Out of stock at Walmart
+    assert find_cheapest_store("Oat Milk", ["Walmart"]) is None
+    assert find_best_alternative("Oat Milk", ["Walmart"])["store"] == "Costco"
+    assert find_category_substitute("Bread", ["Target"]) is None
+    assert find_category_substitute("Eggs", ["Costco", "Walmart"])["item"] == "Chicken Breast"
+    # Other spellings resolve to the catalog's item
+    assert find_cheapest_store("whole milk", ["Walmart"])["store"] == "Walmart"
+
+
+def test_upsert_matches_a_full_rebuild(store_data):
+    catalog = StoreCatalog(store_data)
+    changed = catalog.with_changes({
+        "Walmart": {"Whole Milk": _offer("Dairy", 15, 2.49), "Kale": _offer("Produce", 5, 1.99)},
+        "Target": {"Eggs": _offer("Protein", 0, 4.25)},
+    })
+
+    _assert_same(changed, StoreCatalog(changed.store_data))
+    assert changed.cheapest("Whole Milk", ["Walmart", "Costco"])[0] == "Walmart"
+
+
+def test_original_catalog_is_unchanged(store_data):
+    catalog = StoreCatalog(store_data)
+    catalog.with_changes({"Walmart": {"Whole Milk": _offer("Dairy", 15, 0.99)}}, {"Costco": {"Rice"}})
+
+    assert catalog.store_data["Walmart"]["Whole Milk"]["price"] == 3.48
+    assert "Rice" in catalog.store_data["Costco"]
+    _assert_same(catalog, StoreCatalog(store_data))
+
+
+def test_removal_matches_a_full_rebuild(store_data):
+    changed = StoreCatalog(store_data).with_changes({}, {"Target": {"Almond Butter"}, "Costco": {"Rice", "Eggs"}})
+
+    _assert_same(changed, StoreCatalog(changed.store_data))
+    assert "Almond Butter" not in changed.offers
+    assert "Almond Butter" not in changed.category
+
+
+def test_category_change_moves_the_item(store_data):
+    dairy = {store: {"Oat Milk": _offer("Dairy", 5, inventory["Oat Milk"]["price"])}
+             for store, inventory in store_data.items() if "Oat Milk" in inventory}
+    changed = StoreCatalog(store_data).with_changes(dairy)
+
+    _assert_same(changed, StoreCatalog(changed.store_data))
+    assert changed.category["Oat Milk"] == "Dairy"
+    assert find_category_substitute("Oat Milk", ["Walmart"], changed)["item"] == "Whole Milk"
+
+
+def test_new_store_and_price_matrices(store_data):
+    catalog = StoreCatalog(store_data)
+    catalog.price  # built before the change, so it is patched or rebuilt
+    changed = catalog.with_changes({"Aldi": {"Bread": _offer("Bakery", 10, 1.49)}})
+
+    _assert_same(changed, StoreCatalog(changed.store_data))
+    assert changed.price[changed.item_row["Bread"], changed.store_rank["Aldi"]] == 1.49
+
+
+def test_random_changes_match_a_full_rebuild(store_data):
+    rng = random.Random(0)
+    catalog = StoreCatalog(store_data)
+    catalog.price
+    items = sorted(catalog.offers) + ["Kale", "Tofu"]
+    for _ in range(50):
+        upserts, removals = {}, {}
+        for _ in range(4):
+            store = rng.choice(list(catalog.store_data) + ["Aldi"])
+            if rng.random() < 0.3 and catalog.store_data.get(store):
+                removals.setdefault(store, set()).add(rng.choice(list(catalog.store_data[store])))
+            else:
+                upserts.setdefault(store, {})[rng.choice(items)] = _offer(
+                    rng.choice(["Dairy", "Produce", "Pantry"]), rng.choice([0, 5]), rng.choice([1.0, 2.5, 4.0]))
+        catalog = catalog.with_changes(upserts, removals)
+        rebuilt = StoreCatalog(catalog.store_data)
+        _assert_same(catalog, rebuilt)
+        for item, row in catalog.item_row.items():
+            for store, col in catalog.store_rank.items():
+                data = catalog.store_data[store].get(item)
+                value = catalog.price[row, col]
+                assert (math.isnan(value) and data is None) or value == data["price"]
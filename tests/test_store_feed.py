@@ -0,0 +1,131 @@
+import copy
+import json
+import logging
+import os
+
+import pytest
+
+import data_engine
+from data_engine import StoreCatalog
+from item_registry import ITEMS
+from store_feed import FeedWatcher, compute_delta, ingest_feed
+
+
+@pytest.fixture
+def catalog():
+    return StoreCatalog(copy.deepcopy(data_engine.LIVE_STORE_DATA))
+
+
+@pytest.fixture
+def live_catalog(monkeypatch):
+    # ingest_feed publishes to these; put the originals back afterwards
+    monkeypatch.setattr(data_engine, "CATALOG", StoreCatalog(copy.deepcopy(data_engine.LIVE_STORE_DATA)))
+    monkeypatch.setattr(data_engine, "LIVE_STORE_DATA", data_engine.CATALOG.store_data)
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return str(path)
+
+
+def test_delta_keeps_only_changed_rows(catalog):
+    walmart_milk = catalog.store_data["Walmart"]["Whole Milk"]
+    rows = [
+        {"store": "Walmart", "item": "whole milk", "stock": walmart_milk["stock"], "price": walmart_milk["price"]},
+        {"store": "Walmart", "item": "Eggs", "stock": 0, "price": 3.99},
+        {"store": "Costco", "item": "Kohlrabi", "category": "Produce", "stock": 3, "price": 1.25},
+        {"store": "", "item": "Eggs"},
+    ]
+
+    upserts, removals, counts = compute_delta(rows, catalog)
+
+    assert upserts["Walmart"]["Eggs"]["stock"] == 0
+    # Brand comes from the current offer when the feed leaves it out
+    assert upserts["Walmart"]["Eggs"]["brand"] == catalog.store_data["Walmart"]["Eggs"]["brand"]
+    assert upserts["Costco"]["Kohlrabi"]["category"] == "Produce"
+    assert removals == {}
+    assert counts == {"rows": 4, "added": 1, "changed": 1, "unchanged": 1, "removed": 0, "skipped": 1}
+
+
+def test_invalid_rows_do_not_register_their_item(catalog):
+    rows = [{"store": "Target", "item": "Mystery Meat", "stock": "lots", "price": 2.0},
+            {"store": "Target", "item": "Starfruit Soda", "stock": 4, "price": 1.5}]
+
+    upserts, _, counts = compute_delta(rows, catalog)
+
+    assert upserts == {}
+    assert counts["skipped"] == 2
+    assert ITEMS.id_of("Mystery Meat") is None and ITEMS.id_of("Starfruit Soda") is None
+
+
+def test_snapshot_removes_unlisted_items_but_not_bad_rows(catalog):
+    rows = [{"store": "Target", "item": item, "stock": data["stock"], "price": data["price"]}
+            for item, data in catalog.store_data["Target"].items()][1:]
+    kept = rows[0]["item"]
+    rows[0] = dict(rows[0], price="n/a")
+
+    _, removals, counts = compute_delta(rows, catalog, snapshot=True)
+
+    assert removals == {"Target": {next(iter(catalog.store_data["Target"]))}}
+    assert kept not in removals["Target"]
+    assert counts["removed"] == 1 and counts["skipped"] == 1
+
+
+def test_ingest_publishes_the_delta(tmp_path, live_catalog):
+    before = data_engine.CATALOG.version
+    path = _write_jsonl(tmp_path / "feed.jsonl", [{"store": "Walmart", "item": "Eggs", "stock": 7, "price": 2.5}])
+
+    result = ingest_feed(path)
+
+    assert result["changed"] == 1
+    assert data_engine.CATALOG.version == before + 1
+    assert data_engine.find_cheapest_store("Eggs", ["Walmart"])["price"] == 2.5
+
+
+def test_ingest_recomputes_when_the_catalog_moves_underneath(tmp_path, live_catalog, monkeypatch):
+    path = _write_jsonl(tmp_path / "feed.jsonl", [{"store": "Walmart", "item": "Eggs", "stock": 7, "price": 2.5}])
+    apply = data_engine.apply_catalog_changes
+    calls = []
+
+    def racing_apply(upserts, removals=None, expected_version=None):
+        calls.append(expected_version)
+        if len(calls) == 1:
+            # Another feed lands between the read and the publish
+            apply({"Walmart": {"Eggs": dict(data_engine.CATALOG.store_data["Walmart"]["Eggs"], price=9.99)},
+                   "Costco": {"Rice": dict(data_engine.CATALOG.store_data["Costco"]["Rice"], price=0.5)}})
+        return apply(upserts, removals, expected_version)
+
+    monkeypatch.setattr(data_engine, "apply_catalog_changes", racing_apply)
+    ingest_feed(path)
+
+    assert calls[1] == calls[0] + 1
+    assert data_engine.CATALOG.store_data["Walmart"]["Eggs"]["price"] == 2.5
+    assert data_engine.CATALOG.store_data["Costco"]["Rice"]["price"] == 0.5
+
+
+def test_stale_expected_version_changes_nothing(live_catalog):
+    catalog = data_engine.CATALOG
+    data_engine.apply_catalog_changes({"Walmart": {}})
+
+    assert data_engine.apply_catalog_changes({"Walmart": {}}, expected_version=catalog.version) is None
+    assert data_engine.CATALOG.version == catalog.version + 1
+
+
+def test_watcher_ingests_changed_files_once(tmp_path, live_catalog):
+    _write_jsonl(tmp_path / "a.jsonl", [{"store": "Target", "item": "Eggs", "stock": 1, "price": 4.0}])
+    (tmp_path / "notes.txt").write_text("not a feed")
+    (tmp_path / "b.csv").write_text("store,item,stock,price\nTarget,Eggs,oops,4.0\n")
+    watcher = FeedWatcher(str(tmp_path))
+
+    assert [os.path.basename(result["path"]) for result in watcher.poll()] == ["a.jsonl", "b.csv"]
+    assert watcher.poll() == []
+
+
+def test_bad_rows_are_logged_once_as_a_count(catalog, caplog):
+    rows = [{"store": "Walmart", "item": "Eggs", "stock": "?", "price": 1.0} for _ in range(50)]
+
+    with caplog.at_level(logging.WARNING, logger="store_feed"):
+        compute_delta(rows, catalog)
+
+    assert len(caplog.records) == 1
+    assert "Skipped 50 feed rows" in caplog.text
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+import tracing
+from tracing import NOOP_SPAN, current_span, recent_traces, span, trace_rows, traced
+
+
+@pytest.fixture
+def tracing_on(tmp_path):
+    tracing.reset()
+    tracing.enable(True, trace_file=str(tmp_path / "spans.jsonl"), prom_path=str(tmp_path / "spans.prom"))
+    yield tmp_path
+    tracing.enable(False)
+    tracing.reset()
+
+
+@traced("test.work")
+def _work(fail=False):
+    current_span().set(done=True)
+    if fail:
+        raise ValueError("boom")
+    return 1
+
+
+def test_disabled_tracing_is_a_no_op():
+    assert not tracing.enabled()
+    assert span("anything") is NOOP_SPAN
+    assert current_span() is NOOP_SPAN
+    assert _work() == 1
+
+
+def test_spans_nest_into_one_trace_across_asyncio_tasks(tracing_on):
+    async def child():
+        with span("test.child"):
+            await asyncio.sleep(0)
+
+    async def main():
+        with span("test.root", kind="demo"):
+            _work()
+            await asyncio.gather(child(), child())
+
+    asyncio.run(main())
+
+    root = recent_traces("test.")[0]
+    assert [(depth, s.name) for depth, s in trace_rows(root)] == [
+        (0, "test.root"), (1, "test.work"), (1, "test.child"), (1, "test.child")]
+    assert root.attrs == {"kind": "demo"}
+    assert root.children[0].attrs == {"done": True}
+
+
+def test_errors_and_exporters(tracing_on):
+    with pytest.raises(ValueError):
+        _work(fail=True)
+
+    record = json.loads((tracing_on / "spans.jsonl").read_text().splitlines()[-1])
+    assert (record["name"], record["error"], record["parent"]) == ("test.work", "ValueError", None)
+    prom = (tracing_on / "spans.prom").read_text()
+    assert 'pantry_span_duration_seconds_count{name="test.work"} 1' in prom
+    assert 'pantry_span_errors_total{name="test.work"} 1' in prom
+
+
+def test_unwritable_metrics_file_is_logged(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger="tracing"):
+        tracing.write_prometheus(str(tmp_path / "missing" / "spans.prom"))
+
+    assert "Could not write trace metrics" in caplog.text
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+import data_engine
+from data_engine import freshness_view, shopping_cards
+from image_assets import get_asset
+from item_registry import ITEMS
+
+TODAY = datetime.date(2026, 3, 20)
+
+
+@pytest.fixture
+def live_catalog(monkeypatch):
+    # apply_catalog_changes replaces these; put the originals back afterwards
+    monkeypatch.setattr(data_engine, "CATALOG", data_engine.CATALOG)
+    monkeypatch.setattr(data_engine, "LIVE_STORE_DATA", data_engine.LIVE_STORE_DATA)
+
+
+def test_freshness_rows_are_memoized_on_the_history_snapshot():
+    history = {"Whole Milk": TODAY - datetime.timedelta(days=3), "Rice": TODAY - datetime.timedelta(days=20)}
+
+    rows = freshness_view(history, TODAY)
+    assert [(row["item"], row["days_old"], row["color"]) for row in rows] == [
+        ("Whole Milk", 3, "green"), ("Rice", 20, "red")]
+    assert freshness_view(dict(history), TODAY) is rows
+    assert freshness_view({**history, "Rice": TODAY}, TODAY) is not rows
+
+
+def test_cards_merge_spellings_of_one_item_and_fill_in_defaults():
+    cards = shopping_cards([{"item": "whole milk", "price": "3.5"}, {"item": "Whole Milk", "store": "Costco"},
+                            {"item": "Moon Cheese"}])
+
+    assert [(card["item"], card["store"], card["reason"], card["price"]) for card in cards] == [
+        ("Whole Milk", "Walmart", "Refill", 3.5), ("Moon Cheese", "Walmart", "Refill", 0.0)]
+    assert cards[0]["key"] == str(ITEMS.id_of("Whole Milk"))
+    assert cards[1]["item_id"] is None and cards[1]["key"] == "name:moon cheese"
+
+
+def test_cards_are_rebuilt_once_a_feed_adds_the_item(live_catalog):
+    shopping_list = [{"item": "dragon fruit jelly"}]
+    before = shopping_cards(shopping_list)
+    assert before[0]["item_id"] is None
+
+    # What a store feed does for an item new to the catalog
+    data_engine.apply_catalog_changes({"Walmart": {ITEMS.canonical("Dragon Fruit Jelly", register=True): {
+        "brand": "Great Value", "category": "Pantry", "stock": 4, "price": 2.5}}})
+
+    after = shopping_cards(shopping_list)
+    assert after[0]["item"] == "Dragon Fruit Jelly"
+    assert after[0]["key"] == str(ITEMS.id_of("Dragon Fruit Jelly"))
+
+
+def test_catalog_versions_count_changes():
+    catalog = data_engine.StoreCatalog({"Walmart": {}})
+    changed = catalog.with_changes({"Walmart": {"Kale": {"brand": "B", "category": "Produce", "stock": 1,
+                                                         "price": 1.0}}})
+
+    assert (catalog.version, changed.version, changed.with_changes({}).version) == (0, 1, 2)
+
+
+def test_assets_are_reloaded_when_the_file_changes(tmp_path):
+    path = tmp_path / "notes.bin"
+    path.write_bytes(b"first")
+    assert get_asset(str(path)) == b"first"
+
+    path.write_bytes(b"second!")
+    assert get_asset(str(path)) == b"second!"
@@ -0,0 +1,43 @@
+"""
+Cheap local token accounting.
+
+Asking Gemini to count tokens is a network round-trip, so prompt budgets use
+the usual estimate of about four characters per token for English text.
+TokenStats keeps per-call totals, from the API's usage metadata where the
+response has it.
+"""
+import math
+import threading
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Approximate token count of a string (0 for empty text)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class TokenStats:
+    """Thread-safe prompt and response token totals, overall and per kind of call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, kind, prompt_tokens, response_tokens):
+        with self._lock:
+            calls, prompt, response = self._counts.get(kind, (0, 0, 0))
+            self._counts[kind] = (calls + 1, prompt + prompt_tokens, response + response_tokens)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "calls": sum(c for c, _, _ in counts.values()),
+            "prompt_tokens": sum(p for _, p, _ in counts.values()),
+            "response_tokens": sum(r for _, _, r in counts.values()),
+            "by_kind": {
+                kind: {"calls": c, "prompt_tokens": p, "response_tokens": r, "mean_prompt_tokens": p / c}
+                for kind, (c, p, r) in sorted(counts.items())
+            },
+        }
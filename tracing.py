@@ -0,0 +1,280 @@
+"""
+Lightweight spans for timing the hot paths.
+
+    with span("gemini.generate_content", kind="recipes") as s:
+        ...
+        s.set(response_chars=len(text), fallback="local_recipes")
+
+    @traced("data_engine.find_cheapest_store")
+    def find_cheapest_store(...): ...
+
+Spans nest through a context variable, so a span opened while another is
+active (in the same thread, or in asyncio tasks and to_thread calls started
+from it) becomes its child. The outermost span of a tree is a trace; the
+most recent traces are kept in memory for the dashboard's debug panel.
+
+Tracing is off unless PANTRY_TRACE is set (or enable() is called). Off,
+span() returns a shared no-op object and @traced functions call straight
+through, so instrumented code pays one global flag check.
+
+Exporters, when their variable names a file:
+  PANTRY_TRACE_FILE  every finished span as one JSON line
+  PANTRY_TRACE_PROM  per-span-name duration histograms in Prometheus text
+                     format, rewritten after each trace
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+RECENT_TRACES = 50
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar("pantry_span", default=None)
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_traces = deque(maxlen=RECENT_TRACES)
+# span name -> [count, sum seconds, errors, bucket counts]
+_histograms = {}
+_trace_file = None
+_prom_path = None
+_enabled = False
+
+
+class Span:
+    """One timed operation: name, attributes, duration and any error, plus child spans."""
+    __slots__ = ("name", "attrs", "span_id", "parent", "children", "started_at", "start", "duration",
+                 "error", "_activate", "_token")
+
+    def __init__(self, name, attrs, activate=True):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_ids)
+        self.parent = None
+        self.children = []
+        self.started_at = None
+        self.start = None
+        self.duration = None
+        self.error = None
+        self._activate = activate
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.parent = _current.get()
+        if self.parent is not None:
+            self.parent.children.append(self)
+        if self._activate:
+            self._token = _current.set(self)
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if self._token is not None:
+            _current.reset(self._token)
+        if exc_type is not None:
+            if issubclass(exc_type, Exception):
+                self.error = exc_type.__name__
+            else:
+                # Control flow, not a failure: st.rerun(), a generator closed early
+                self.attrs["exit"] = exc_type.__name__
+        _finish(self)
+        return False
+
+    @property
+    def trace(self):
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        return root
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name, activate=True, **attrs):
+    """
+    A span to use as a context manager, or the no-op span when tracing is
+    off. With activate=False it is timed and attached to the current span
+    but doesn't become the parent of spans opened inside it; use that in
+    generators, whose body runs interleaved with the caller's code.
+    """
+    if not _enabled:
+        return NOOP_SPAN
+    return Span(name, attrs, activate)
+
+
+def traced(name=None):
+    """Decorator: runs the function inside a span (named after it by default)."""
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span():
+    """The active span, or the no-op span if there is none."""
+    return (_current.get() if _enabled else None) or NOOP_SPAN
+
+
+# -----------------------------
+# COLLECTION + EXPORT
+# -----------------------------
+def _finish(finished):
+    with _lock:
+        histogram = _histograms.get(finished.name)
+        if histogram is None:
+            histogram = _histograms[finished.name] = [0, 0.0, 0, [0] * len(DURATION_BUCKETS)]
+        histogram[0] += 1
+        histogram[1] += finished.duration
+        histogram[2] += finished.error is not None
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if finished.duration <= bound:
+                histogram[3][i] += 1
+                break
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(span_record(finished), default=str) + "\n")
+            _trace_file.flush()
+        if finished.parent is None:
+            _traces.append(finished)
+    if finished.parent is None and _prom_path:
+        write_prometheus(_prom_path)
+
+
+def span_record(s):
+    """JSON-ready dict for one finished span."""
+    return {
+        "trace": s.trace.span_id,
+        "span": s.span_id,
+        "parent": s.parent.span_id if s.parent is not None else None,
+        "name": s.name,
+        "started_at": s.started_at,
+        "ms": round(s.duration * 1000, 3),
+        "error": s.error,
+        "attrs": s.attrs,
+    }
+
+
+def recent_traces(prefix=""):
+    """Finished traces, newest first, optionally only those whose root span name starts with prefix."""
+    with _lock:
+        traces = list(_traces)
+    return [t for t in reversed(traces) if t.name.startswith(prefix)]
+
+
+def trace_rows(root):
+    """Depth-first (depth, span) pairs for one trace, children in start order."""
+    rows = []
+    stack = [(0, root)]
+    while stack:
+        depth, s = stack.pop()
+        rows.append((depth, s))
+        for child in sorted(s.children, key=lambda c: c.start or 0, reverse=True):
+            stack.append((depth + 1, child))
+    return rows
+
+
+def format_trace(root):
+    """Indented, human-readable timing breakdown of one trace."""
+    lines = []
+    for depth, s in trace_rows(root):
+        offset = (s.start - root.start) * 1000 if s.start is not None else 0.0
+        duration = f"{s.duration * 1000:9.1f} ms" if s.duration is not None else "  running"
+        attrs = " ".join(f"{key}={value}" for key, value in s.attrs.items())
+        error = f" !{s.error}" if s.error else ""
+        lines.append(f"{duration} @{offset:8.1f}  {'  ' * depth}{s.name}{error}  {attrs}".rstrip())
+    return "\n".join(lines)
+
+
+def prometheus_text():
+    """Span duration histograms in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {name: (count, total, errors, list(buckets))
+                      for name, (count, total, errors, buckets) in _histograms.items()}
+    lines = [
+        "# HELP pantry_span_duration_seconds Time spent in instrumented operations.",
+        "# TYPE pantry_span_duration_seconds histogram",
+    ]
+    for name, (count, total, _, buckets) in sorted(histograms.items()):
+        cumulative = 0
+        for bound, n in zip(DURATION_BUCKETS, buckets):
+            cumulative += n
+            lines.append(f'pantry_span_duration_seconds_bucket{{name="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'pantry_span_duration_seconds_bucket{{name="{name}",le="+Inf"}} {count}')
+        lines.append(f'pantry_span_duration_seconds_sum{{name="{name}"}} {total:.6f}')
+        lines.append(f'pantry_span_duration_seconds_count{{name="{name}"}} {count}')
+    lines += [
+        "# HELP pantry_span_errors_total Instrumented operations that raised.",
+        "# TYPE pantry_span_errors_total counter",
+    ]
+    for name, (_, _, errors, _) in sorted(histograms.items()):
+        lines.append(f'pantry_span_errors_total{{name="{name}"}} {errors}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, path)
+    except OSError as e:
+        # logging is imported here, not at the top: data_engine imports this module
+        # and is held to an import-time budget (benchmarks/check_import_time.py)
+        import logging
+
+        logging.getLogger(__name__).warning("Could not write trace metrics to %s: %s", path, e)
+
+
+def enable(on=True, trace_file=None, prom_path=None):
+    """Turns tracing on or off; trace_file/prom_path set the exporters (None leaves them off)."""
+    global _enabled, _trace_file, _prom_path
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(trace_file, "a", encoding="utf-8") if on and trace_file else None
+        _prom_path = prom_path if on else None
+        _enabled = on
+
+
+def reset():
+    """Forgets recent traces and histograms."""
+    with _lock:
+        _traces.clear()
+        _histograms.clear()
+
+
+def enabled():
+    return _enabled
+
+
+if os.getenv("PANTRY_TRACE") or os.getenv("PANTRY_TRACE_FILE") or os.getenv("PANTRY_TRACE_PROM"):
+    enable(True, os.getenv("PANTRY_TRACE_FILE"), os.getenv("PANTRY_TRACE_PROM"))